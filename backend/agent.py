@@ -26,6 +26,8 @@ class Agent:
         self.MONGO_DB = "calendar_app"
         self.QDRANT_HOST = "localhost"
         self.QDRANT_PORT = 6333
+        # ":memory:" or a directory runs Qdrant in-process (local mode) instead of the server
+        self.QDRANT_LOCATION = os.getenv("QDRANT_LOCATION")
         self.OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
         self.COLLECTION_NAME = "calendar_vectors"
         self.CURRENT_DATE = datetime.now().strftime("%B %d, %Y")
@@ -33,7 +35,7 @@ class Agent:
         # Initialize clients
         self.mongo_client = MongoClient(self.MONGO_URI)
         self.db = self.mongo_client[self.MONGO_DB]
-        self.qdrant_client = QdrantClient(host=self.QDRANT_HOST, port=self.QDRANT_PORT)
+        self.qdrant_client = self.create_qdrant_client()
         self.openai_client = openai.AsyncOpenAI(api_key=self.OPENAI_API_KEY)
         
         # Logging setup
@@ -44,6 +46,14 @@ class Agent:
         self.UUID_PATTERN = re.compile(r'^[a-f0-9]{8}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{4}-[a-f0-9]{12}$', re.I)
         self.OID_PATTERN = re.compile(r'^[a-f0-9]{24}$', re.I)
 
+    def create_qdrant_client(self) -> QdrantClient:
+        """Qdrant server client, or an in-process one when QDRANT_LOCATION is set."""
+        if self.QDRANT_LOCATION == ":memory:":
+            return QdrantClient(location=":memory:")
+        if self.QDRANT_LOCATION:
+            return QdrantClient(path=self.QDRANT_LOCATION)
+        return QdrantClient(host=self.QDRANT_HOST, port=self.QDRANT_PORT)
+
     def is_potential_id(self, value: str) -> bool:
         """Check if a string looks like a UUID or ObjectId."""
         return bool(self.UUID_PATTERN.match(value) or self.OID_PATTERN.match(value))
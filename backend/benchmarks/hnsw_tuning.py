@@ -0,0 +1,248 @@
+"""
+Dense index tuning: recall@k against p50/p95 latency for HNSW (M, efConstruction, ef) and
+IVF / quantized alternatives (nlist, nprobe), measured against exact brute-force ground truth.
+
+    python -m benchmarks.hnsw_tuning --source live --sample 20000 --queries 200 --k 100
+    python -m benchmarks.hnsw_tuning --source synthetic --dim 1536 --target-recall 0.95 --write-config
+
+Indexes are built on a scratch Milvus (--uri, a local standalone server by default). Milvus
+Lite builds FLAT whatever index is requested, so it only checks the harness, not the curves.
+With --write-config the fastest setting (by p95) reaching --target-recall is written to
+db/milvus/index_params.json, which the collection schema and searches load.
+"""
+import argparse
+import itertools
+import json
+import os
+import sys
+import time
+from typing import Dict, Iterator, List, Tuple
+
+import numpy as np
+from pymilvus import DataType, MilvusClient
+
+from benchmarks.matching import percentile
+from benchmarks.synthetic import SyntheticProfileGenerator
+from db.milvus.schema import DENSE_FIELD, EMBEDDING_DIM, INDEX_PARAMS_PATH, load_index_params
+
+SCRATCH_COLLECTION = "dense_index_tuning"
+INSERT_BATCH_SIZE = 1000
+METRIC = "COSINE"
+# Quantized IVF variants take the same build/search parameters as IVF_FLAT
+IVF_INDEXES = ("IVF_FLAT", "IVF_SQ8")
+
+
+def live_vectors(sample: int) -> np.ndarray:
+    """Up to `sample` stored chunk embeddings from the production collection"""
+    from db.milvus.config import collection_name, milvus_client
+    iterator = milvus_client.query_iterator(collection_name=collection_name, batch_size=1000, filter="",
+                                            output_fields=[DENSE_FIELD], limit=sample)
+    vectors = []
+    try:
+        while True:
+            batch = iterator.next()
+            if not batch:
+                break
+            vectors.extend(row[DENSE_FIELD] for row in batch)
+    finally:
+        iterator.close()
+    return np.asarray(vectors, dtype=np.float32)
+
+
+def synthetic_vectors(sample: int, dim: int, seed: int, clusters: int = 50) -> np.ndarray:
+    """Clustered unit vectors, closer to real embeddings than uniform noise"""
+    generator = SyntheticProfileGenerator(seed=seed)
+    centers = np.asarray([generator.embedding(dim) for _ in range(clusters)], dtype=np.float32)
+    rng = np.random.default_rng(seed)
+    vectors = centers[rng.integers(0, clusters, sample)] + rng.normal(0, 0.35 / np.sqrt(dim), (sample, dim))
+    return vectors.astype(np.float32)
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+def exact_top_k(base: np.ndarray, queries: np.ndarray, k: int, chunk: int = 256) -> List[set]:
+    """Brute-force cosine top-k ids (row positions in `base`) for every query"""
+    base = normalize(base)
+    truth = []
+    for start in range(0, len(queries), chunk):
+        sims = normalize(queries[start:start + chunk]) @ base.T
+        top = np.argpartition(-sims, kth=min(k, base.shape[0] - 1), axis=1)[:, :k]
+        truth.extend(set(row.tolist()) for row in top)
+    return truth
+
+
+def index_grid(args) -> Iterator[Tuple[Dict, List[Dict]]]:
+    """(index params, [search params]) for every build configuration in the sweep"""
+    for index_type in args.index_types:
+        if index_type == "HNSW":
+            for m, ef_construction in itertools.product(args.m, args.ef_construction):
+                searches = [{"metric_type": METRIC, "params": {"ef": ef}} for ef in args.ef if ef >= args.k]
+                yield {"index_type": "HNSW", "metric_type": METRIC,
+                       "params": {"M": m, "efConstruction": ef_construction}}, searches
+        elif index_type in IVF_INDEXES:
+            for nlist in args.nlist:
+                searches = [{"metric_type": METRIC, "params": {"nprobe": nprobe}} for nprobe in args.nprobe
+                            if nprobe <= nlist]
+                yield {"index_type": index_type, "metric_type": METRIC, "params": {"nlist": nlist}}, searches
+        else:
+            raise ValueError(f"Unsupported index type {index_type}")
+
+
+def build_index(client: MilvusClient, base: np.ndarray, index: Dict) -> float:
+    """(Re)create the scratch collection with `index` and return the build time in seconds"""
+    if client.has_collection(SCRATCH_COLLECTION):
+        client.drop_collection(SCRATCH_COLLECTION)
+    schema = MilvusClient.create_schema(auto_id=False, enable_dynamic_field=False)
+    schema.add_field("id", DataType.INT64, is_primary=True)
+    schema.add_field(DENSE_FIELD, DataType.FLOAT_VECTOR, dim=base.shape[1])
+    client.create_collection(collection_name=SCRATCH_COLLECTION, schema=schema)
+    for start in range(0, len(base), INSERT_BATCH_SIZE):
+        client.insert(collection_name=SCRATCH_COLLECTION, data=[
+            {"id": start + i, DENSE_FIELD: vector.tolist()}
+            for i, vector in enumerate(base[start:start + INSERT_BATCH_SIZE])
+        ])
+    client.flush(SCRATCH_COLLECTION)
+
+    start = time.perf_counter()
+    index_params = client.prepare_index_params()
+    index_params.add_index(field_name=DENSE_FIELD, **index)
+    client.create_index(SCRATCH_COLLECTION, index_params, sync=True)
+    client.load_collection(SCRATCH_COLLECTION)
+    return time.perf_counter() - start
+
+
+def measure(client: MilvusClient, queries: np.ndarray, truth: List[set], k: int, search: Dict) -> Dict:
+    client.search(collection_name=SCRATCH_COLLECTION, data=[queries[0].tolist()], anns_field=DENSE_FIELD,
+                  limit=k, search_params=search)
+    latencies, recalls = [], []
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        hits = client.search(collection_name=SCRATCH_COLLECTION, data=[query.tolist()], anns_field=DENSE_FIELD,
+                             limit=k, search_params=search)[0]
+        latencies.append(time.perf_counter() - start)
+        recalls.append(len({hit["id"] for hit in hits} & expected) / max(1, len(expected)))
+    return {
+        "recall_at_k": round(sum(recalls) / len(recalls), 4),
+        "p50_latency_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_latency_ms": round(percentile(latencies, 95) * 1000, 2),
+    }
+
+
+def run_sweep(client: MilvusClient, vectors: np.ndarray, args) -> List[Dict]:
+    rng = np.random.default_rng(args.seed)
+    order = rng.permutation(len(vectors))
+    queries, base = vectors[order[:args.queries]], vectors[order[args.queries:]]
+    print(f"Ground truth: {len(queries)} queries over {len(base)} vectors (dim {base.shape[1]}), k={args.k}")
+    truth = exact_top_k(base, queries, args.k)
+
+    report = []
+    print_header()
+    for index, searches in index_grid(args):
+        build_s = build_index(client, base, index)
+        for search in searches:
+            row = {
+                "index_type": index["index_type"],
+                "build": index["params"],
+                "search": search["params"],
+                "build_s": round(build_s, 2),
+                **measure(client, queries, truth, args.k, search),
+            }
+            report.append({"index": index, "search_params": search, **row})
+            print_row(row)
+    client.drop_collection(SCRATCH_COLLECTION)
+    return report
+
+
+def choose(report: List[Dict], target_recall: float) -> Dict:
+    eligible = [row for row in report if row["recall_at_k"] >= target_recall]
+    if not eligible:
+        raise ValueError(f"No configuration reached recall@k {target_recall}")
+    return min(eligible, key=lambda row: (row["p95_latency_ms"], row["p50_latency_ms"]))
+
+
+def write_config(row: Dict, path: str = INDEX_PARAMS_PATH):
+    config = load_index_params(path)
+    config["dense"] = row["index"]
+    config["dense_search"] = row["search_params"]
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(config, f, indent=2)
+        f.write("\n")
+
+
+COLUMNS = ["index_type", "build", "search", "build_s", "recall_at_k", "p50_latency_ms", "p95_latency_ms"]
+
+
+def print_header():
+    print(" | ".join(f"{col:>16}" for col in COLUMNS))
+
+
+def print_row(row: Dict):
+    print(" | ".join(f"{json.dumps(row[col]) if isinstance(row[col], dict) else str(row[col]):>16}"
+                     for col in COLUMNS), flush=True)
+
+
+def int_list(value: str) -> List[int]:
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Sweep dense index parameters for recall@k vs latency")
+    parser.add_argument("--uri", default=os.getenv("MILVUS_TUNING_URI", "http://localhost:19530"),
+                        help="scratch Milvus server (or Milvus Lite file) the indexes are built on")
+    parser.add_argument("--token", default=os.getenv("MILVUS_TUNING_TOKEN", ""))
+    parser.add_argument("--source", choices=("live", "synthetic"), default="synthetic",
+                        help="sample stored embeddings or generate clustered vectors")
+    parser.add_argument("--sample", type=int, default=20000, help="vectors sampled (queries included)")
+    parser.add_argument("--queries", type=int, default=200, help="held-out query vectors")
+    parser.add_argument("--dim", type=int, default=EMBEDDING_DIM, help="dimension of synthetic vectors")
+    parser.add_argument("--k", type=int, default=100)
+    parser.add_argument("--index-types", default="HNSW," + ",".join(IVF_INDEXES),
+                        type=lambda v: [t.strip().upper() for t in v.split(",") if t.strip()])
+    parser.add_argument("--m", type=int_list, default=[16, 32, 48])
+    parser.add_argument("--ef-construction", type=int_list, default=[200, 512])
+    parser.add_argument("--ef", type=int_list, default=[100, 200, 400, 800, 1600, 3200, 12000])
+    parser.add_argument("--nlist", type=int_list, default=[256, 1024])
+    parser.add_argument("--nprobe", type=int_list, default=[8, 16, 32, 64, 128])
+    parser.add_argument("--target-recall", type=float, default=0.95)
+    parser.add_argument("--write-config", action="store_true",
+                        help=f"write the chosen dense parameters to {INDEX_PARAMS_PATH}")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="write the report as JSON to this path")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    if args.source == "live":
+        vectors = live_vectors(args.sample)
+    else:
+        vectors = synthetic_vectors(args.sample, args.dim, args.seed)
+    if len(vectors) <= args.queries:
+        print(f"Only {len(vectors)} vectors available for {args.queries} queries", file=sys.stderr)
+        return 2
+
+    client = MilvusClient(uri=args.uri, token=args.token)
+    report = run_sweep(client, vectors, args)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    try:
+        best = choose(report, args.target_recall)
+    except ValueError as err:
+        print(err, file=sys.stderr)
+        return 1
+    print(f"Fastest with recall@{args.k} >= {args.target_recall}: {best['index']} search {best['search_params']} "
+          f"(recall {best['recall_at_k']}, p95 {best['p95_latency_ms']} ms)")
+    if args.write_config:
+        write_config(best)
+        print(f"Wrote {INDEX_PARAMS_PATH}; rebuild the collection (initialize_milvus.py or db.milvus.migrate) "
+              f"for build parameter changes to apply")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
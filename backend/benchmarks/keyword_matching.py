@@ -0,0 +1,116 @@
+"""
+Keyword analytics micro-benchmark: the per-keyword scans EnhancedMilvusSearch used to run
+against the single-pass KeywordMatcher, with an equivalence check of their results.
+
+    python -m benchmarks.keyword_matching --keywords 50 --documents 1000 --repeat 5
+"""
+import argparse
+import json
+import re
+import sys
+import time
+from typing import Dict, List
+
+from benchmarks.partition_search import skills_text
+from benchmarks.synthetic import SyntheticProfileGenerator
+from utils.rag import KeywordMatcher
+
+FIELD = "content"
+
+
+def synthetic_documents(generator: SyntheticProfileGenerator, count: int) -> List[Dict]:
+    documents = []
+    for profile in generator.profiles(count, fingerprint=False):
+        sentences = [f"Worked with {line}." for line in skills_text(profile).splitlines()]
+        documents.append({FIELD: " ".join(sentences), "name": profile["name"]})
+    return documents
+
+
+def query_keywords(generator: SyntheticProfileGenerator, documents: List[Dict], count: int) -> str:
+    vocabulary = sorted({token for doc in documents for token in re.findall(r"\b\w+\b", doc[FIELD].lower())})
+    return " ".join(generator.random.sample(vocabulary, min(count, len(vocabulary))))
+
+
+def legacy_analyze(query: str, doc: Dict) -> int:
+    keywords = set(re.findall(r'\b\w+\b', query.lower()))
+    field_text = str(doc[FIELD]).lower()
+    return sum(1 for kw in keywords if kw in field_text)
+
+
+def legacy_highlights(query: str, doc: Dict) -> List[str]:
+    keywords = set(re.findall(r'\b\w+\b', query.lower()))
+    matches = []
+    for keyword in keywords:
+        pattern = re.compile(f'[^.]*{keyword}[^.]*\\.', re.I)
+        matches.extend(pattern.findall(str(doc[FIELD])))
+    return matches
+
+
+def run_legacy(query: str, documents: List[Dict]) -> List[Dict]:
+    return [{"matches": legacy_analyze(query, doc), "highlights": legacy_highlights(query, doc)}
+            for doc in documents]
+
+
+def run_single_pass(query: str, documents: List[Dict]) -> List[Dict]:
+    matcher = KeywordMatcher.from_query(query)
+    results = []
+    for doc in documents:
+        text = str(doc[FIELD])
+        spans = matcher.spans(text)
+        results.append({"matches": len(matcher.present(spans)), "highlights": matcher.sentences(text, spans)})
+    return results
+
+
+def timed(fn, query: str, documents: List[Dict], repeat: int):
+    timings, result = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(query, documents)
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def run_benchmark(keywords: int = 50, documents: int = 1000, repeat: int = 5, seed: int = 42) -> Dict:
+    generator = SyntheticProfileGenerator(seed=seed)
+    docs = synthetic_documents(generator, documents)
+    query = query_keywords(generator, docs, keywords)
+
+    legacy_s, legacy = timed(run_legacy, query, docs, repeat)
+    single_s, single = timed(run_single_pass, query, docs, repeat)
+    # Legacy highlights repeat a sentence once per keyword it holds; the matcher lists it once
+    mismatches = sum(1 for old, new in zip(legacy, single)
+                     if old["matches"] != new["matches"] or set(old["highlights"]) != set(new["highlights"]))
+    report = {
+        "keywords": len(set(query.split())),
+        "documents": len(docs),
+        "avg_document_chars": round(sum(len(doc[FIELD]) for doc in docs) / len(docs)),
+        "legacy_ms": round(legacy_s * 1000, 2),
+        "single_pass_ms": round(single_s * 1000, 2),
+        "speedup": round(legacy_s / max(single_s, 1e-9), 2),
+        "mismatches": mismatches,
+    }
+    print(" | ".join(f"{key}={value}" for key, value in report.items()))
+    return report
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark single-pass keyword matching against per-keyword scans")
+    parser.add_argument("--keywords", type=int, default=50)
+    parser.add_argument("--documents", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=5, help="runs per implementation (best is reported)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="write the report as JSON to this path")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    report = run_benchmark(args.keywords, args.documents, args.repeat, args.seed)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return 1 if report["mismatches"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
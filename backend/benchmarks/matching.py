@@ -0,0 +1,209 @@
+"""
+Matching benchmark: scoring throughput, latency and memory per engine, plus a
+score-equivalence check of every engine against the reference engine.
+
+    python -m benchmarks.matching --sizes 1000,10000,100000 --repeat 3 --output bench.json
+
+Engines are registered with `register_engine`; a new scoring engine only needs to be
+registered here to be benchmarked and checked against the current implementation.
+"""
+import argparse
+import asyncio
+import json
+import math
+import sys
+import time
+import tracemalloc
+from typing import Awaitable, Callable, Dict, List
+
+from benchmarks.synthetic import SyntheticProfileGenerator
+from process import AggregatedScore, GenericSkillMatcher
+from utils.scoring import ScoringExecutor, score_shard
+
+# Score every profile (no threshold) so equivalence is checked over the whole pool
+ALL_SCORES = float("-inf")
+
+EngineFn = Callable[[List[Dict], Dict, Dict[str, float], GenericSkillMatcher], Awaitable[List[AggregatedScore]]]
+ENGINES: Dict[str, EngineFn] = {}
+REFERENCE_ENGINE = "inline"
+
+_executor = ScoringExecutor()
+
+
+def register_engine(name: str):
+    def decorator(fn: EngineFn) -> EngineFn:
+        ENGINES[name] = fn
+        return fn
+    return decorator
+
+
+@register_engine("inline")
+async def inline_engine(resumes, jd, vector_scores, matcher):
+    """Current implementation, single-threaded on the calling thread"""
+    return score_shard(resumes, jd, matcher, vector_scores, min_score=ALL_SCORES)
+
+
+@register_engine("executor")
+async def executor_engine(resumes, jd, vector_scores, matcher):
+    """ScoringExecutor as used by /find-match (thread below the shard threshold, process pool above)"""
+    return await _executor.score(resumes, jd, vector_scores, matcher=matcher, min_score=ALL_SCORES)
+
+
+@register_engine("raw_names")
+async def raw_names_engine(resumes, jd, vector_scores, matcher):
+    """Profiles without stored fingerprints, so every skill name is canonicalized while scoring"""
+    stripped = [{k: v for k, v in resume.items() if k != "skill_fingerprint"} for resume in resumes]
+    return score_shard(stripped, jd, matcher, vector_scores, min_score=ALL_SCORES)
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = max(0, math.ceil(pct / 100 * len(ordered)) - 1)
+    return ordered[index]
+
+
+def ranking(matches: List[AggregatedScore]) -> List[str]:
+    return [m.profile_id for m in sorted(matches, key=lambda m: (-m.aggregated_score, m.profile_id))]
+
+
+def compare_scores(reference: List[AggregatedScore], candidate: List[AggregatedScore],
+                   top_k: int, tolerance: float) -> Dict:
+    """Score and ranking differences of one engine's output against the reference output"""
+    expected = {m.profile_id: m.aggregated_score for m in reference}
+    actual = {m.profile_id: m.aggregated_score for m in candidate}
+    shared = expected.keys() & actual.keys()
+    max_abs_diff = max((abs(expected[pid] - actual[pid]) for pid in shared), default=0.0)
+    mismatched = sum(1 for pid in shared if abs(expected[pid] - actual[pid]) > tolerance)
+    missing = len(expected.keys() ^ actual.keys())
+
+    expected_top = ranking(reference)[:top_k]
+    actual_top = ranking(candidate)[:top_k]
+    overlap = len(set(expected_top) & set(actual_top)) / max(1, len(expected_top))
+
+    return {
+        "max_abs_diff": round(max_abs_diff, 6),
+        "mismatched_scores": mismatched,
+        "missing_profiles": missing,
+        "top_k_overlap": round(overlap, 4),
+        "top_k_identical": expected_top == actual_top,
+        "equivalent": not missing and not mismatched and expected_top == actual_top
+    }
+
+
+async def run_engine(engine: EngineFn, profiles: List[Dict], jds: List[Dict],
+                     vector_scores: List[Dict[str, float]], matcher: GenericSkillMatcher,
+                     measure_memory: bool):
+    latencies, outputs = [], []
+    for jd, scores in zip(jds, vector_scores):
+        start = time.perf_counter()
+        outputs.append(await engine(profiles, jd, scores, matcher))
+        latencies.append(time.perf_counter() - start)
+
+    # Memory is measured on a separate run so tracing overhead doesn't skew the timings.
+    # tracemalloc only sees this process; process-pool workers are not included.
+    peak_mb = None
+    if measure_memory:
+        tracemalloc.start()
+        await engine(profiles, jds[0], vector_scores[0], matcher)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        peak_mb = round(peak / (1024 * 1024), 2)
+
+    return latencies, outputs, peak_mb
+
+
+async def run_benchmark(sizes: List[int], engines: List[str], repeat: int = 3, top_k: int = 50,
+                        tolerance: float = 1e-9, seed: int = 42, measure_memory: bool = True) -> List[Dict]:
+    generator = SyntheticProfileGenerator(seed=seed)
+    matcher = GenericSkillMatcher()
+    report = []
+    print_header()
+
+    for size in sizes:
+        profiles = list(generator.profiles(size))
+        jds = [generator.job_description() for _ in range(repeat)]
+        vector_scores = [generator.vector_scores(profiles) for _ in jds]
+
+        reference_outputs = None
+        for name in [REFERENCE_ENGINE] + [e for e in engines if e != REFERENCE_ENGINE]:
+            latencies, outputs, peak_mb = await run_engine(
+                ENGINES[name], profiles, jds, vector_scores, matcher, measure_memory
+            )
+            if reference_outputs is None:
+                reference_outputs = outputs
+
+            checks = [compare_scores(ref, out, top_k, tolerance) for ref, out in zip(reference_outputs, outputs)]
+            row = {
+                "engine": name,
+                "profiles": size,
+                "runs": len(latencies),
+                "throughput_per_s": round(size * len(latencies) / sum(latencies), 1),
+                "p50_latency_ms": round(percentile(latencies, 50) * 1000, 2),
+                "p95_latency_ms": round(percentile(latencies, 95) * 1000, 2),
+                "peak_memory_mb": peak_mb,
+                "max_abs_diff": max(c["max_abs_diff"] for c in checks),
+                "top_k_overlap": min(c["top_k_overlap"] for c in checks),
+                "equivalent": all(c["equivalent"] for c in checks)
+            }
+            report.append(row)
+            print_row(row)
+
+    _executor.shutdown()
+    return report
+
+
+COLUMNS = ["engine", "profiles", "throughput_per_s", "p50_latency_ms", "p95_latency_ms", "peak_memory_mb",
+           "max_abs_diff", "top_k_overlap", "equivalent"]
+
+
+def print_header():
+    print(" | ".join(f"{col:>16}" for col in COLUMNS))
+
+
+def print_row(row: Dict):
+    print(" | ".join(f"{str(row[col]):>16}" for col in COLUMNS), flush=True)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark resume scoring engines on synthetic profiles")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="comma-separated profile pool sizes")
+    parser.add_argument("--engines", default=",".join(ENGINES), help=f"comma-separated engines ({', '.join(ENGINES)})")
+    parser.add_argument("--repeat", type=int, default=3, help="job descriptions scored per pool size")
+    parser.add_argument("--top-k", type=int, default=50, help="ranking depth compared by the equivalence check")
+    parser.add_argument("--tolerance", type=float, default=1e-9, help="allowed absolute score difference")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc memory pass")
+    parser.add_argument("--output", help="write the report as JSON to this path")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    engines = [e.strip() for e in args.engines.split(",") if e.strip()]
+    unknown = [e for e in engines if e not in ENGINES]
+    if unknown:
+        print(f"Unknown engines: {unknown}. Available: {list(ENGINES)}", file=sys.stderr)
+        return 2
+
+    report = asyncio.run(run_benchmark(
+        sizes=[int(s) for s in args.sizes.split(",")],
+        engines=engines,
+        repeat=args.repeat,
+        top_k=args.top_k,
+        tolerance=args.tolerance,
+        seed=args.seed,
+        measure_memory=not args.no_memory
+    ))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    # Non-zero exit when any engine changed scores or rankings
+    return 0 if all(row["equivalent"] for row in report) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,153 @@
+"""
+Scoped vector search latency on a flat collection vs a partition-key collection.
+
+    python -m benchmarks.partition_search --campaigns 200 --profiles 100 --queries 200
+
+Both collections get the same synthetic chunks (real schema, random unit vectors) and are
+searched with the `campaign_id == '...'` filter used by /find-match. Runs against Milvus
+Lite by default; pass --uri/--token to benchmark a Milvus server, or --uri memory for the
+in-process backend (db/milvus/memory.py).
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Dict, List, Optional
+
+from pymilvus import MilvusClient
+
+from benchmarks.matching import percentile
+from benchmarks.synthetic import SyntheticProfileGenerator
+from db.milvus.backend import create_client
+from db.milvus.schema import DENSE_FIELD, DENSE_SEARCH_PARAMS, ensure_collection
+
+LAYOUTS = {"flat": None, "partition_key": "campaign_id"}
+INSERT_BATCH_SIZE = 1000
+
+
+def skills_text(profile: Dict) -> str:
+    lines = []
+    for group in ("primary_skills", "secondary_skills"):
+        for domain, categories in profile[group].items():
+            for category, skills in categories.items():
+                lines.append(f"{domain}: {category}: {', '.join(skills)}")
+    return "\n".join(lines)
+
+
+def synthetic_rows(generator: SyntheticProfileGenerator, campaigns: int, profiles: int, clients: int,
+                   dim: int) -> List[Dict]:
+    rows = []
+    for c in range(campaigns):
+        campaign_id = f"campaign-{c}"
+        for profile in generator.profiles(profiles, campaign_id=campaign_id, fingerprint=False):
+            rows.append({
+                "id": len(rows),
+                "content": skills_text(profile),
+                DENSE_FIELD: generator.embedding(dim),
+                "profile_id": profile["profile_id"],
+                "name": profile["name"],
+                "type": "experience",
+                "active": True,
+                "campaign_id": campaign_id,
+                "client_id": f"client-{c % clients}",
+            })
+    return rows
+
+
+def build_collection(client: MilvusClient, name: str, partition_key: Optional[str], rows: List[Dict],
+                     dim: int, num_partitions: int):
+    ensure_collection(client, name, drop_old=True, dim=dim, partition_key=partition_key,
+                      num_partitions=num_partitions)
+    for start in range(0, len(rows), INSERT_BATCH_SIZE):
+        client.insert(collection_name=name, data=rows[start:start + INSERT_BATCH_SIZE])
+    client.flush(name)
+
+
+def run_queries(client: MilvusClient, name: str, queries: List[Dict], k: int, search_params: Dict):
+    # One unmeasured search so segment loading isn't timed
+    client.search(collection_name=name, data=[queries[0]["vector"]], anns_field=DENSE_FIELD, limit=k,
+                  filter=queries[0]["filter"], search_params=search_params)
+    latencies, results = [], []
+    for query in queries:
+        start = time.perf_counter()
+        hits = client.search(collection_name=name, data=[query["vector"]], anns_field=DENSE_FIELD, limit=k,
+                             filter=query["filter"], search_params=search_params, output_fields=["profile_id"])[0]
+        latencies.append(time.perf_counter() - start)
+        results.append({hit["entity"]["profile_id"] for hit in hits})
+    return latencies, results
+
+
+def run_benchmark(client: MilvusClient, campaigns: int = 200, profiles: int = 100, clients: int = 20,
+                  queries: int = 200, k: int = 100, dim: int = 256, ef: Optional[int] = None,
+                  num_partitions: int = 64, seed: int = 42, keep: bool = False) -> List[Dict]:
+    generator = SyntheticProfileGenerator(seed=seed)
+    rows = synthetic_rows(generator, campaigns, profiles, clients, dim)
+    query_set = []
+    for _ in range(queries):
+        campaign_id = f"campaign-{generator.random.randrange(campaigns)}"
+        query_set.append({"vector": generator.embedding(dim), "filter": f"campaign_id == '{campaign_id}'"})
+
+    search_params = DENSE_SEARCH_PARAMS if ef is None else {**DENSE_SEARCH_PARAMS, "params": {"ef": max(k, ef)}}
+    report, reference = [], None
+    for layout, partition_key in LAYOUTS.items():
+        name = f"partition_bench_{layout}"
+        build_collection(client, name, partition_key, rows, dim, num_partitions)
+        latencies, results = run_queries(client, name, query_set, k, search_params)
+        if reference is None:
+            reference = results
+        overlap = sum(len(a & b) / max(1, len(a)) for a, b in zip(reference, results)) / len(results)
+        row = {
+            "layout": layout,
+            "rows": len(rows),
+            "campaigns": campaigns,
+            "queries": len(latencies),
+            "p50_latency_ms": round(percentile(latencies, 50) * 1000, 2),
+            "p95_latency_ms": round(percentile(latencies, 95) * 1000, 2),
+            "mean_latency_ms": round(sum(latencies) / len(latencies) * 1000, 2),
+            "result_overlap": round(overlap, 4),
+        }
+        report.append(row)
+        print(" | ".join(f"{k_}={v}" for k_, v in row.items()), flush=True)
+        if not keep:
+            client.drop_collection(name)
+
+    flat, partitioned = report
+    print(f"p50 speedup: {flat['p50_latency_ms'] / max(partitioned['p50_latency_ms'], 1e-9):.2f}x, "
+          f"p95 speedup: {flat['p95_latency_ms'] / max(partitioned['p95_latency_ms'], 1e-9):.2f}x")
+    return report
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark scoped search on flat vs partition-key collections")
+    parser.add_argument("--uri", default=os.getenv("MILVUS_BENCH_URI", "./partition_bench.db"),
+                        help="Milvus server URI, Milvus Lite file, or memory for the in-process backend")
+    parser.add_argument("--token", default=os.getenv("MILVUS_BENCH_TOKEN", ""))
+    parser.add_argument("--campaigns", type=int, default=200)
+    parser.add_argument("--profiles", type=int, default=100, help="profiles (chunks) per campaign")
+    parser.add_argument("--clients", type=int, default=20)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=100)
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--ef", type=int, help="HNSW ef for the searches (defaults to the configured value)")
+    parser.add_argument("--num-partitions", type=int, default=64)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--keep", action="store_true", help="keep the benchmark collections")
+    parser.add_argument("--output", help="write the report as JSON to this path")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    client = create_client(args.uri, token=args.token)
+    report = run_benchmark(client, campaigns=args.campaigns, profiles=args.profiles, clients=args.clients,
+                           queries=args.queries, k=args.k, dim=args.dim, ef=args.ef,
+                           num_partitions=args.num_partitions, seed=args.seed, keep=args.keep)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
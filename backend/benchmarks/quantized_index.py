@@ -0,0 +1,164 @@
+"""
+Memory and recall report for the dense index presets (full-precision HNSW vs HNSW_SQ, IVF_SQ8,
+IVF_PQ), with and without the exact rerank searches apply to quantized indexes.
+
+    python -m benchmarks.quantized_index --source live --sample 20000 --queries 200 --k 100
+    python -m benchmarks.quantized_index --source synthetic --presets HNSW_SQ,IVF_PQ
+
+Each preset from db/milvus/index_params.json is built on a scratch Milvus (see
+benchmarks.hnsw_tuning) over the same vectors and scored against brute-force ground truth.
+Index memory is estimated from the index layout (raw vectors, codes, graph links, centroids),
+since Milvus does not report per-index memory. Pick a preset with MILVUS_DENSE_INDEX.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Dict, List
+
+import numpy as np
+from pymilvus import MilvusClient
+
+from benchmarks.hnsw_tuning import (SCRATCH_COLLECTION, build_index, exact_top_k, live_vectors,
+                                    synthetic_vectors)
+from benchmarks.matching import percentile
+from db.milvus.schema import DENSE_FIELD, EMBEDDING_DIM, INDEX_PARAMS, dense_index_config
+from db.milvus.search import rerank_exact
+
+BASELINE = "HNSW"
+# Bytes per value of HNSW_SQ refine data
+REFINE_BYTES = {"SQ6": 0.75, "SQ8": 1, "BF16": 2, "FP16": 2, "FP32": 4}
+# Each profile is stored as two chunks (experience and learning)
+CHUNKS_PER_PROFILE = 2
+
+
+def presets(names: List[str]) -> Dict[str, Dict]:
+    """Index settings per preset name; BASELINE is the configured full-precision index"""
+    settings = {}
+    for name in names:
+        settings[name] = dense_index_config(INDEX_PARAMS, None if name == BASELINE else name)
+    return settings
+
+
+def estimated_index_bytes(index: Dict, count: int, dim: int) -> float:
+    """Approximate loaded size of a dense index over `count` vectors"""
+    index_type, params = index["index_type"], index.get("params", {})
+    if index_type in ("HNSW", "HNSW_SQ"):
+        # Level-0 links dominate the graph: 2*M neighbour ids per vector
+        links = count * params.get("M", 16) * 2 * 4
+        if index_type == "HNSW":
+            return count * dim * 4 + links
+        refine = count * dim * REFINE_BYTES.get(params.get("refine_type", "FP32"), 4) if params.get("refine") else 0
+        return count * dim * REFINE_BYTES.get(params.get("sq_type", "SQ8"), 1) + links + refine
+    centroids = params.get("nlist", 0) * dim * 4
+    if index_type == "IVF_FLAT":
+        return count * dim * 4 + centroids
+    if index_type == "IVF_SQ8":
+        return count * dim + centroids
+    if index_type == "IVF_PQ":
+        m, nbits = params["m"], params.get("nbits", 8)
+        codebooks = m * (2 ** nbits) * (dim // m) * 4
+        return count * m * nbits / 8 + centroids + codebooks
+    return count * dim * 4
+
+
+def measure(client: MilvusClient, queries: np.ndarray, truth: List[set], k: int, search: Dict,
+            rerank_factor: int) -> Dict:
+    rerank = rerank_factor > 1
+    output_fields = [DENSE_FIELD] if rerank else []
+    client.search(collection_name=SCRATCH_COLLECTION, data=[queries[0].tolist()], anns_field=DENSE_FIELD,
+                  limit=k, search_params=search)
+    latencies, recalls = [], []
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        hits = client.search(collection_name=SCRATCH_COLLECTION, data=[query.tolist()], anns_field=DENSE_FIELD,
+                             limit=k * rerank_factor, search_params=search, output_fields=output_fields)[0]
+        if rerank:
+            hits = rerank_exact(query.tolist(), hits, k)
+        latencies.append(time.perf_counter() - start)
+        recalls.append(len({hit["id"] for hit in hits} & expected) / max(1, len(expected)))
+    return {
+        "recall_at_k": round(sum(recalls) / len(recalls), 4),
+        "p50_latency_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_latency_ms": round(percentile(latencies, 95) * 1000, 2),
+    }
+
+
+def run_report(client: MilvusClient, vectors: np.ndarray, names: List[str], k: int, queries: int,
+               seed: int) -> List[Dict]:
+    rng = np.random.default_rng(seed)
+    order = rng.permutation(len(vectors))
+    query_vectors, base = vectors[order[:queries]], vectors[order[queries:]]
+    count, dim = base.shape
+    print(f"Ground truth: {len(query_vectors)} queries over {count} vectors (dim {dim}), k={k}")
+    truth = exact_top_k(base, query_vectors, k)
+
+    report = []
+    for name, settings in presets(names).items():
+        index = settings["dense"]
+        build_s = build_index(client, base, index)
+        size = estimated_index_bytes(index, count, dim)
+        for rerank_factor in sorted({1, settings["dense_rerank_factor"]}):
+            row = {
+                "preset": name,
+                "index_type": index["index_type"],
+                "rerank_factor": rerank_factor,
+                "build_s": round(build_s, 2),
+                "index_mb": round(size / 2 ** 20, 1),
+                "bytes_per_vector": round(size / count, 1),
+                "kb_per_profile": round(size / count * CHUNKS_PER_PROFILE / 1024, 2),
+                **measure(client, query_vectors, truth, k, settings["dense_search"], rerank_factor),
+            }
+            report.append(row)
+            print(" | ".join(f"{key}={value}" for key, value in row.items()), flush=True)
+    client.drop_collection(SCRATCH_COLLECTION)
+
+    baseline = next((row for row in report if row["preset"] == BASELINE), None)
+    if baseline:
+        for row in report:
+            if row["preset"] != BASELINE:
+                print(f"{row['preset']} (rerank x{row['rerank_factor']}): "
+                      f"{baseline['index_mb'] / max(row['index_mb'], 1e-9):.1f}x less memory, "
+                      f"recall {row['recall_at_k'] - baseline['recall_at_k']:+.4f} vs {BASELINE}")
+    return report
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Compare memory and recall of the dense index presets")
+    parser.add_argument("--uri", default=os.getenv("MILVUS_TUNING_URI", "http://localhost:19530"),
+                        help="scratch Milvus server the indexes are built on")
+    parser.add_argument("--token", default=os.getenv("MILVUS_TUNING_TOKEN", ""))
+    parser.add_argument("--source", choices=("live", "synthetic"), default="live",
+                        help="sample stored embeddings or generate clustered vectors")
+    parser.add_argument("--sample", type=int, default=20000, help="vectors sampled (queries included)")
+    parser.add_argument("--queries", type=int, default=200, help="held-out query vectors")
+    parser.add_argument("--dim", type=int, default=EMBEDDING_DIM, help="dimension of synthetic vectors")
+    parser.add_argument("--k", type=int, default=100)
+    parser.add_argument("--presets", default=",".join([BASELINE] + sorted(INDEX_PARAMS.get("dense_presets", {}))),
+                        type=lambda v: [p.strip() for p in v.split(",") if p.strip()])
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="write the report as JSON to this path")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    if args.source == "live":
+        vectors = live_vectors(args.sample)
+    else:
+        vectors = synthetic_vectors(args.sample, args.dim, args.seed)
+    if len(vectors) <= args.queries:
+        print(f"Only {len(vectors)} vectors available for {args.queries} queries", file=sys.stderr)
+        return 2
+
+    client = MilvusClient(uri=args.uri, token=args.token)
+    report = run_report(client, vectors, args.presets, args.k, args.queries, args.seed)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
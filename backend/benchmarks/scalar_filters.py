@@ -0,0 +1,156 @@
+"""
+Filtered search and filtered query latency with and without scalar indexes on the metadata fields.
+
+    python -m benchmarks.scalar_filters --uri http://localhost:19530 --campaigns 200 --profiles 100
+
+Both collections get the same synthetic chunks and differ only in the scalar indexes configured in
+db/milvus/index_params.json. Every filter is run as a vector search (what /ai/query-match and
+/find-match do) and as a scalar query (what filtered deletes like the sync worker's do). Milvus
+Lite ignores scalar indexes, so use a Milvus server for meaningful numbers.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Dict, List, Optional
+
+from pymilvus import MilvusClient
+
+from benchmarks.matching import percentile
+from benchmarks.partition_search import INSERT_BATCH_SIZE, synthetic_rows
+from benchmarks.synthetic import SyntheticProfileGenerator
+from db.milvus.backend import create_client
+from db.milvus.schema import DENSE_FIELD, DENSE_SEARCH_PARAMS, ensure_collection
+
+LAYOUTS = {"no_scalar_index": False, "scalar_index": True}
+STATUSES = ["new", "screened", "shortlisted", "interviewed", "rejected", "hired"]
+CHUNK_TYPES = ["experience", "learning"]
+
+
+def benchmark_rows(generator: SyntheticProfileGenerator, campaigns: int, profiles: int, clients: int,
+                   dim: int) -> List[Dict]:
+    rows = synthetic_rows(generator, campaigns, profiles, clients, dim)
+    for row in rows:
+        row["type"] = generator.random.choice(CHUNK_TYPES)
+        row["status"] = generator.random.choice(STATUSES)
+        row["total_experience"] = round(generator.random.uniform(0, 25), 1)
+        row["active"] = generator.random.random() > 0.1
+    return rows
+
+
+def benchmark_filters(generator: SyntheticProfileGenerator, rows: List[Dict], clients: int,
+                      count: int) -> List[Dict]:
+    """`count` filters of each shape used by the API, with a random vector each"""
+    profile_ids = [row["profile_id"] for row in rows]
+    shapes = {
+        "profile_id_in": lambda: "profile_id in [{}]".format(
+            ", ".join(f"'{pid}'" for pid in generator.random.sample(profile_ids, 50))),
+        "client_eq": lambda: f"client_id == 'client-{generator.random.randrange(clients)}'",
+        "type_status": lambda: f"type == 'experience' and status == '{generator.random.choice(STATUSES)}'",
+        "experience_range": lambda: "total_experience >= {0} and total_experience <= {1}".format(
+            *sorted(generator.random.sample(range(26), 2))),
+        "active_client_experience": lambda: (f"active == true and client_id == "
+                                             f"'client-{generator.random.randrange(clients)}' and "
+                                             f"total_experience >= {generator.random.randint(0, 15)}"),
+    }
+    dim = len(rows[0][DENSE_FIELD])
+    filters = []
+    for shape, build in shapes.items():
+        for _ in range(count):
+            filters.append({"shape": shape, "filter": build(), "vector": generator.embedding(dim)})
+    return filters
+
+
+def build_collection(client: MilvusClient, name: str, scalar_indexes: bool, rows: List[Dict], dim: int,
+                     partition_key: Optional[str]):
+    ensure_collection(client, name, drop_old=True, dim=dim, partition_key=partition_key,
+                      scalar_indexes=scalar_indexes)
+    for start in range(0, len(rows), INSERT_BATCH_SIZE):
+        client.insert(collection_name=name, data=rows[start:start + INSERT_BATCH_SIZE])
+    client.flush(name)
+    # Indexes are built on the flushed segments; release/load so searches use them
+    client.release_collection(name)
+    client.load_collection(name)
+
+
+def run_filters(client: MilvusClient, name: str, filters: List[Dict], k: int, search_params: Dict) -> Dict:
+    client.search(collection_name=name, data=[filters[0]["vector"]], anns_field=DENSE_FIELD, limit=k,
+                  filter=filters[0]["filter"], search_params=search_params)
+    timings: Dict[str, Dict[str, List[float]]] = {}
+    for item in filters:
+        shape = timings.setdefault(item["shape"], {"search": [], "query": []})
+        start = time.perf_counter()
+        client.search(collection_name=name, data=[item["vector"]], anns_field=DENSE_FIELD, limit=k,
+                      filter=item["filter"], search_params=search_params, output_fields=["profile_id"])
+        shape["search"].append(time.perf_counter() - start)
+        start = time.perf_counter()
+        client.query(collection_name=name, filter=item["filter"], output_fields=["count(*)"])
+        shape["query"].append(time.perf_counter() - start)
+    return timings
+
+
+def run_benchmark(client: MilvusClient, campaigns: int = 200, profiles: int = 100, clients: int = 20,
+                  queries: int = 50, k: int = 100, dim: int = 256, partition_key: Optional[str] = None,
+                  seed: int = 42, keep: bool = False) -> List[Dict]:
+    generator = SyntheticProfileGenerator(seed=seed)
+    rows = benchmark_rows(generator, campaigns, profiles, clients, dim)
+    filters = benchmark_filters(generator, rows, clients, queries)
+
+    report = []
+    for layout, scalar_indexes in LAYOUTS.items():
+        name = f"scalar_bench_{layout}"
+        build_collection(client, name, scalar_indexes, rows, dim, partition_key)
+        for shape, timings in run_filters(client, name, filters, k, DENSE_SEARCH_PARAMS).items():
+            row = {"layout": layout, "filter": shape, "rows": len(rows)}
+            for op, latencies in timings.items():
+                row[f"{op}_p50_ms"] = round(percentile(latencies, 50) * 1000, 2)
+                row[f"{op}_p95_ms"] = round(percentile(latencies, 95) * 1000, 2)
+            report.append(row)
+            print(" | ".join(f"{key}={value}" for key, value in row.items()), flush=True)
+        if not keep:
+            client.drop_collection(name)
+
+    baseline = {row["filter"]: row for row in report if row["layout"] == "no_scalar_index"}
+    for row in report:
+        if row["layout"] == "scalar_index":
+            base = baseline[row["filter"]]
+            print(f"{row['filter']}: search p95 {base['search_p95_ms'] / max(row['search_p95_ms'], 1e-9):.2f}x, "
+                  f"query p95 {base['query_p95_ms'] / max(row['query_p95_ms'], 1e-9):.2f}x faster")
+    return report
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark filtered search with and without scalar indexes")
+    parser.add_argument("--uri", default=os.getenv("MILVUS_BENCH_URI", "http://localhost:19530"),
+                        help="Milvus server URI, or memory for the in-process backend "
+                             "(Milvus Lite and memory ignore scalar indexes)")
+    parser.add_argument("--token", default=os.getenv("MILVUS_BENCH_TOKEN", ""))
+    parser.add_argument("--campaigns", type=int, default=200)
+    parser.add_argument("--profiles", type=int, default=100, help="profiles (chunks) per campaign")
+    parser.add_argument("--clients", type=int, default=20)
+    parser.add_argument("--queries", type=int, default=50, help="queries per filter shape")
+    parser.add_argument("--k", type=int, default=100)
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--partition-key", choices=("campaign_id", "client_id"),
+                        help="partition both collections by this field (flat by default)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--keep", action="store_true", help="keep the benchmark collections")
+    parser.add_argument("--output", help="write the report as JSON to this path")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    client = create_client(args.uri, token=args.token)
+    report = run_benchmark(client, campaigns=args.campaigns, profiles=args.profiles, clients=args.clients,
+                           queries=args.queries, k=args.k, dim=args.dim, partition_key=args.partition_key,
+                           seed=args.seed, keep=args.keep)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
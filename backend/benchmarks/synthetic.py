@@ -0,0 +1,99 @@
+import json
+import random
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterator, List, Optional
+from uuid import UUID
+
+from utils.skill_vocabulary import SKILL_ALIASES_PATH, SKILL_MATRIX_PATH, build_skill_fingerprint
+
+# Share of skills written with an alias (k8s, NLP, ...) instead of the canonical name,
+# and of skills that are outside the vocabulary altogether, as in real parsed resumes.
+ALIAS_RATE = 0.15
+UNKNOWN_RATE = 0.05
+UNKNOWN_SKILLS = ["Jira", "Confluence", "Power BI", "Tableau", "Figma", "Postman", "Excel", "Bitbucket",
+                  "SAP", "Salesforce", "Unity", "Unreal Engine", "Solidity", "COBOL", "Fortran"]
+
+
+class SyntheticProfileGenerator:
+    """
+    Deterministic generator of profiles and parsed JDs shaped like the LLM output stored in
+    Mongo: nested domain -> category -> [skill] dicts drawn from skill_matrix.json.
+    """
+
+    def __init__(self, seed: int = 42, matrix_path: str = SKILL_MATRIX_PATH,
+                 aliases_path: Optional[str] = SKILL_ALIASES_PATH):
+        self.random = random.Random(seed)
+        with open(matrix_path, "r", encoding="utf-8") as f:
+            self.matrix: Dict[str, Dict[str, List[str]]] = json.load(f)
+        self.aliases: Dict[str, List[str]] = {}
+        if aliases_path:
+            with open(aliases_path, "r", encoding="utf-8") as f:
+                self.aliases = json.load(f)
+        self.domains = list(self.matrix)
+
+    def _surface(self, skill: str) -> str:
+        roll = self.random.random()
+        if roll < ALIAS_RATE and self.aliases.get(skill):
+            return self.random.choice(self.aliases[skill])
+        if roll > 1 - UNKNOWN_RATE:
+            return self.random.choice(UNKNOWN_SKILLS)
+        return skill
+
+    def skills(self, domains: List[str], min_skills: int, max_skills: int) -> Dict[str, Dict[str, List[str]]]:
+        """Nested skills for the given domains with min..max skills per category"""
+        nested = {}
+        for domain in domains:
+            categories = {}
+            for category, pool in self.matrix[domain].items():
+                if self.random.random() < 0.3:
+                    continue
+                count = min(len(pool), self.random.randint(min_skills, max_skills))
+                picked = [self._surface(skill) for skill in self.random.sample(pool, count)]
+                categories[category] = list(dict.fromkeys(picked))
+            if categories:
+                nested[domain] = categories
+        return nested
+
+    def profile(self, campaign_id: str = "benchmark", fingerprint: bool = True) -> Dict:
+        domains = self.random.sample(self.domains, self.random.randint(2, 5))
+        split = self.random.randint(1, len(domains) - 1)
+        profile_id = str(UUID(int=self.random.getrandbits(128), version=4))
+        profile = {
+            "profile_id": profile_id,
+            "name": f"Candidate {profile_id[:8]}",
+            "campaign_id": campaign_id,
+            "active": True,
+            "primary_skills": self.skills(domains[:split], 1, 6),
+            "secondary_skills": self.skills(domains[split:], 1, 4),
+            "processed_at": datetime(2025, 1, 1, tzinfo=timezone.utc) + timedelta(
+                seconds=self.random.randint(0, 365 * 24 * 3600)),
+        }
+        if fingerprint:
+            profile["skill_fingerprint"] = build_skill_fingerprint(profile)
+        return profile
+
+    def profiles(self, count: int, campaign_id: str = "benchmark", fingerprint: bool = True) -> Iterator[Dict]:
+        for _ in range(count):
+            yield self.profile(campaign_id, fingerprint)
+
+    def job_description(self) -> Dict:
+        domains = self.random.sample(self.domains, self.random.randint(2, 4))
+        return {
+            "job_title": f"Synthetic role {self.random.randint(1000, 9999)}",
+            "primary_skills": self.skills(domains[:2], 2, 5),
+            "secondary_skills": self.skills(domains[2:] or domains[:1], 1, 3),
+            "other_specifications": [],
+        }
+
+    def vector_scores(self, profiles: List[Dict], hit_rate: float = 0.3) -> Dict[str, float]:
+        """Vector similarities for a share of profiles, as returned by the campaign vector search"""
+        return {
+            p["profile_id"]: round(self.random.uniform(0.4, 0.95), 4)
+            for p in profiles if self.random.random() < hit_rate
+        }
+
+    def embedding(self, dim: int) -> List[float]:
+        """Random unit vector standing in for a chunk or query embedding"""
+        vector = [self.random.gauss(0.0, 1.0) for _ in range(dim)]
+        norm = sum(x * x for x in vector) ** 0.5 or 1.0
+        return [x / norm for x in vector]
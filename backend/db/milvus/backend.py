@@ -0,0 +1,39 @@
+"""
+Vector store client selection.
+
+MILVUS_BACKEND=milvus (default) connects to the Milvus server at MILVUS_URI. MILVUS_BACKEND=memory
+(or MILVUS_URI=memory://) uses the in-process InMemoryMilvusClient from db/milvus/memory.py,
+which serves the same calls with NumPy, so the API, ingest and benchmarks run without a server.
+MILVUS_MEMORY_PATH (or memory://<path>) persists its collections across restarts.
+"""
+import os
+from typing import Optional
+
+MILVUS_BACKEND = os.getenv("MILVUS_BACKEND", "milvus").lower()
+MILVUS_MEMORY_PATH = os.getenv("MILVUS_MEMORY_PATH") or None
+MEMORY_SCHEME = "memory"
+
+MILVUS_BACKENDS = ("milvus", "memory")
+
+
+def is_memory_uri(uri: Optional[str]) -> bool:
+    return bool(uri) and (uri == MEMORY_SCHEME or uri.startswith(f"{MEMORY_SCHEME}://"))
+
+
+def uses_memory_backend(uri: Optional[str] = None) -> bool:
+    if MILVUS_BACKEND not in MILVUS_BACKENDS:
+        raise ValueError(f"MILVUS_BACKEND must be one of {MILVUS_BACKENDS}, got '{MILVUS_BACKEND}'")
+    return MILVUS_BACKEND == "memory" or is_memory_uri(uri)
+
+
+def create_client(uri: Optional[str] = None, user: str = "", password: str = "", token: str = ""):
+    """MilvusClient for `uri`, or the in-process client when the memory backend is selected"""
+    if uses_memory_backend(uri):
+        from db.milvus.memory import InMemoryMilvusClient
+
+        path = uri[len(MEMORY_SCHEME) + 3:] if is_memory_uri(uri) and uri != MEMORY_SCHEME else ""
+        return InMemoryMilvusClient(path=path or MILVUS_MEMORY_PATH)
+
+    from pymilvus import MilvusClient
+
+    return MilvusClient(uri=uri, user=user, password=password, token=token)
@@ -0,0 +1,345 @@
+"""
+Milvus filter expressions built from escaped values instead of string concatenation.
+
+    expr = (FilterBuilder()
+            .eq("client_id", client_id)
+            .between("total_experience", 3, 8)
+            .text_match("content", ["python", "o'reilly certified"])
+            .build())
+
+Values are rendered as Milvus literals (quotes and backslashes escaped), equality and IN
+conditions on the same field are merged into one IN list, and keyword conditions use
+`text_match` on the analyzer-enabled `content` field rather than `like '%...%'` scans
+(one text_match per word, ANDed within a term and ORed across terms). Terms the analyzer
+would mangle ("C++", "C#", ".NET" all lose their symbols) fall back to an exact `like`.
+
+compile_filter evaluates the same expressions in Python for the in-process backend.
+"""
+import math
+import re
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+FIELD_PATTERN = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+# Words of a text_match term, as the standard analyzer splits them
+TERM_WORD_PATTERN = re.compile(r"\w+")
+# Symbols the analyzer drops, which make a term ("c++", "c#", ".net") differ from its words
+TERM_SYMBOL_PATTERN = re.compile(r"[^\w\s]")
+
+
+def field_name(field: str) -> str:
+    if not FIELD_PATTERN.match(field or ""):
+        raise ValueError(f"Invalid Milvus field name: {field!r}")
+    return field
+
+
+def literal(value: Any) -> str:
+    """`value` as a Milvus literal"""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (int, float)):
+        if isinstance(value, float) and not math.isfinite(value):
+            raise ValueError(f"Non-finite number in filter: {value}")
+        return repr(value)
+    if isinstance(value, str):
+        escaped = value.replace("\\", "\\\\").replace("'", "\\'").replace("\n", " ").replace("\r", " ")
+        return f"'{escaped}'"
+    raise TypeError(f"Unsupported filter value type: {type(value).__name__}")
+
+
+def like_literal(text: str) -> str:
+    """`like` pattern literal matching `text` anywhere in the field (wildcards in `text` escaped)"""
+    escaped = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return literal(f"%{escaped}%")
+
+
+def in_list(field: str, values: Iterable) -> str:
+    """`field in [...]` (or `field == value` for a single value); values are de-duplicated"""
+    unique = list(dict.fromkeys(values))
+    if len(unique) == 1:
+        return f"{field_name(field)} == {literal(unique[0])}"
+    return f"{field_name(field)} in [{', '.join(literal(value) for value in unique)}]"
+
+
+def all_of(*clauses: Optional[str]) -> str:
+    """Conjunction of the non-empty clauses ("" when there are none)"""
+    clauses = [clause for clause in clauses if clause]
+    if len(clauses) == 1:
+        return clauses[0]
+    return " and ".join(f"({clause})" for clause in clauses)
+
+
+def any_of(*clauses: Optional[str]) -> str:
+    """Disjunction of the non-empty clauses ("" when there are none)"""
+    clauses = [clause for clause in clauses if clause]
+    if len(clauses) == 1:
+        return clauses[0]
+    return " or ".join(f"({clause})" for clause in clauses)
+
+
+class FilterBuilder:
+    """Conjunction of filter conditions, rendered by build()"""
+
+    def __init__(self):
+        self._in: Dict[str, List] = {}
+        self._clauses: List[str] = []
+
+    def eq(self, field: str, value: Any) -> "FilterBuilder":
+        """`field == value`; skipped when value is None"""
+        if value is None:
+            return self
+        return self.isin(field, [value])
+
+    def isin(self, field: str, values: Optional[Iterable]) -> "FilterBuilder":
+        """
+        `field in values`; skipped when values is None. Conditions on the same field are
+        intersected, so the rendered filter holds a single IN list per field.
+        """
+        if values is None:
+            return self
+        values = list(dict.fromkeys(values))
+        field_name(field)
+        if field in self._in:
+            allowed = set(values)
+            self._in[field] = [value for value in self._in[field] if value in allowed]
+        else:
+            self._in[field] = values
+        return self
+
+    def between(self, field: str, low: Optional[float] = None, high: Optional[float] = None) -> "FilterBuilder":
+        """`low <= field <= high`; either bound may be None"""
+        field_name(field)
+        if low is not None:
+            self._clauses.append(f"{field} >= {literal(low)}")
+        if high is not None:
+            self._clauses.append(f"{field} <= {literal(high)}")
+        return self
+
+    def text_match(self, field: str, terms: Union[str, Iterable[str]]) -> "FilterBuilder":
+        """
+        Rows whose `field` matches any of `terms` (served by the field's text index; the field
+        needs enable_match). A multi-word term needs all of its words, so "spring boot" does not
+        match a resume that only mentions "boot". Terms with symbols the analyzer drops
+        ("C++", "C#", ".NET") are matched as exact substrings with `like` instead, in the casings
+        resumes use (as given, lower and upper case), so "C++" does not match every "C".
+        Skipped when there are no terms.
+        """
+        if isinstance(terms, str):
+            terms = [terms]
+        field_name(field)
+        alternatives = []
+        for term in dict.fromkeys(term.strip() for term in terms if term and term.strip()):
+            if TERM_SYMBOL_PATTERN.search(term):
+                variants = dict.fromkeys((term, term.lower(), term.upper()))
+                alternatives.append(any_of(*(f"{field} like {like_literal(variant)}" for variant in variants)))
+                continue
+            words = list(dict.fromkeys(TERM_WORD_PATTERN.findall(term.lower()))) or [term]
+            alternatives.append(all_of(*(f"text_match({field}, {literal(word)})" for word in words)))
+        clause = any_of(*alternatives)
+        if clause:
+            self._clauses.append(clause)
+        return self
+
+    def where(self, clause: Optional[str]) -> "FilterBuilder":
+        """An already rendered expression (e.g. from another builder)"""
+        if clause:
+            self._clauses.append(clause)
+        return self
+
+    def build(self) -> str:
+        """The filter expression ("" when no condition was added)"""
+        clauses = []
+        for field, values in self._in.items():
+            # An empty intersection (or empty list) matches nothing
+            clauses.append(in_list(field, values) if values else f"{field} in []")
+        return all_of(*clauses, *self._clauses)
+
+    def __bool__(self) -> bool:
+        return bool(self._in or self._clauses)
+
+    def __str__(self) -> str:
+        return self.build()
+
+
+# ---- evaluation (in-process backend, db/milvus/memory.py) ----
+
+TOKEN_PATTERN = re.compile(r"""
+    \s*(?:
+        (?P<string>'(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*")
+      | (?P<number>-?\d+(?:\.\d*)?(?:[eE][-+]?\d+)?)
+      | (?P<op>==|!=|>=|<=|>|<|&&|\|\||\(|\)|\[|\]|,)
+      | (?P<name>[A-Za-z_][A-Za-z0-9_]*)
+    )""", re.VERBOSE)
+COMPARISONS = {
+    "==": lambda a, b: a == b,
+    "!=": lambda a, b: a != b,
+    ">=": lambda a, b: a >= b,
+    "<=": lambda a, b: a <= b,
+    ">": lambda a, b: a > b,
+    "<": lambda a, b: a < b,
+}
+
+
+def analyze(text: Any) -> set:
+    """Tokens of `text` as the standard analyzer of a text-match field sees them"""
+    return set(re.findall(r"\w+", str(text or "").lower()))
+
+
+def like_regex(pattern: str) -> "re.Pattern":
+    """Regex of a `like` pattern (`%` any run, `_` any character, backslash escapes)"""
+    parts = []
+    for escaped, char in re.findall(r"(\\)?(.)", pattern, re.DOTALL):
+        if escaped:
+            parts.append(re.escape(char))
+        elif char == "%":
+            parts.append(".*")
+        elif char == "_":
+            parts.append(".")
+        else:
+            parts.append(re.escape(char))
+    return re.compile("".join(parts), re.DOTALL)
+
+
+def tokenize(expr: str) -> List[Tuple[str, Any]]:
+    tokens, pos = [], 0
+    expr = expr.strip()
+    while pos < len(expr):
+        match = TOKEN_PATTERN.match(expr, pos)
+        if not match or match.end() == pos:
+            raise ValueError(f"Cannot parse filter at {pos}: {expr[pos:pos + 20]!r}")
+        pos = match.end()
+        kind = match.lastgroup
+        value = match.group(kind)
+        if kind == "string":
+            value = re.sub(r"\\(.)", r"\1", value[1:-1])
+        elif kind == "number":
+            value = float(value) if any(c in value for c in ".eE") else int(value)
+        elif kind == "name":
+            lowered = value.lower()
+            if lowered in ("and", "or", "not", "in", "like"):
+                kind, value = "op", lowered
+            elif lowered in ("true", "false"):
+                kind, value = "bool", lowered == "true"
+        elif value == "&&":
+            value = "and"
+        elif value == "||":
+            value = "or"
+        tokens.append((kind, value))
+        while pos < len(expr) and expr[pos].isspace():
+            pos += 1
+    return tokens
+
+
+class FilterParser:
+    """
+    Recursive-descent parser of the filter subset this codebase renders (comparisons, [not] in
+    lists, like, text_match, and/or/not, parentheses) into a predicate over a row dict.
+    Comparisons against a missing (null) value are false, as in Milvus.
+    """
+
+    def __init__(self, expr: str):
+        self.tokens = tokenize(expr)
+        self.pos = 0
+
+    def peek(self, offset: int = 0) -> Optional[Tuple[str, Any]]:
+        index = self.pos + offset
+        return self.tokens[index] if index < len(self.tokens) else None
+
+    def take(self, kind: Optional[str] = None, value: Any = None) -> Tuple[str, Any]:
+        token = self.peek()
+        if token is None or (kind and token[0] != kind) or (value is not None and token[1] != value):
+            raise ValueError(f"Unexpected token {token} in filter, expected {value or kind}")
+        self.pos += 1
+        return token
+
+    def accept(self, value: str) -> bool:
+        token = self.peek()
+        if token and token[0] == "op" and token[1] == value:
+            self.pos += 1
+            return True
+        return False
+
+    def parse(self) -> Callable[[Dict], bool]:
+        if not self.tokens:
+            return lambda row: True
+        predicate = self.parse_or()
+        if self.peek() is not None:
+            raise ValueError(f"Unexpected token {self.peek()} in filter")
+        return predicate
+
+    def parse_or(self):
+        clauses = [self.parse_and()]
+        while self.accept("or"):
+            clauses.append(self.parse_and())
+        return clauses[0] if len(clauses) == 1 else lambda row: any(clause(row) for clause in clauses)
+
+    def parse_and(self):
+        clauses = [self.parse_not()]
+        while self.accept("and"):
+            clauses.append(self.parse_not())
+        return clauses[0] if len(clauses) == 1 else lambda row: all(clause(row) for clause in clauses)
+
+    def parse_not(self):
+        if self.accept("not"):
+            inner = self.parse_not()
+            return lambda row: not inner(row)
+        return self.parse_atom()
+
+    def parse_value(self) -> Any:
+        kind, value = self.take()
+        if kind not in ("string", "number", "bool"):
+            raise ValueError(f"Expected a literal in filter, got {value!r}")
+        return value
+
+    def parse_atom(self):
+        if self.accept("("):
+            inner = self.parse_or()
+            self.take("op", ")")
+            return inner
+        kind, value = self.take()
+        if kind == "bool":
+            return lambda row: value
+        if kind != "name":
+            raise ValueError(f"Unexpected token {value!r} in filter")
+        if value == "text_match":
+            self.take("op", "(")
+            field = self.take("name")[1]
+            self.take("op", ",")
+            terms = analyze(self.parse_value())
+            self.take("op", ")")
+            return lambda row: bool(terms & analyze(row.get(field)))
+        field = value
+        if self.accept("like"):
+            pattern = like_regex(self.parse_value())
+            return lambda row: isinstance(row.get(field), str) and bool(pattern.fullmatch(row[field]))
+        negate = self.accept("not")
+        if self.accept("in"):
+            self.take("op", "[")
+            values = []
+            while not self.accept("]"):
+                values.append(self.parse_value())
+                self.accept(",")
+            allowed = set(values)
+            if negate:
+                return lambda row: row.get(field) is not None and row.get(field) not in allowed
+            return lambda row: row.get(field) in allowed
+        if negate:
+            raise ValueError("Expected 'in' after 'not' in filter")
+        op = self.take("op")[1]
+        if op not in COMPARISONS:
+            raise ValueError(f"Unsupported operator {op!r} in filter")
+        literal_value, compare = self.parse_value(), COMPARISONS[op]
+
+        def predicate(row):
+            current = row.get(field)
+            if current is None:
+                return False
+            try:
+                return compare(current, literal_value)
+            except TypeError:
+                return False
+        return predicate
+
+
+def compile_filter(expr: Optional[str]) -> Callable[[Dict], bool]:
+    """Predicate evaluating a Milvus filter expression against a row dict"""
+    return FilterParser(expr or "").parse()
@@ -0,0 +1,187 @@
+import asyncio
+import hashlib
+import logging
+import math
+import os
+from collections import defaultdict
+from typing import Dict, List, Optional, Set
+
+from langchain_core.documents import Document
+
+from db.milvus.expr import all_of, in_list, literal
+from db.milvus.schema import DENSE_FIELD, METADATA_FIELDS, MILVUS_PARTITION_KEY, PRIMARY_FIELD, TEXT_FIELD
+from utils.chatgpt import dense_embedding
+
+logger = logging.getLogger(__name__)
+
+MILVUS_INSERT_BATCH_SIZE = int(os.getenv("MILVUS_INSERT_BATCH_SIZE", 256))
+STALE_DELETE_BATCH_SIZE = 100
+
+BOOL_FIELDS = {"active"}
+FLOAT_FIELDS = {"total_experience"}
+
+
+def _clean(value):
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return None
+    return value
+
+
+def chunk_id(profile_id: str, chunk_type: Optional[str], content: str) -> int:
+    """
+    Deterministic primary key of a chunk: the same profile, chunk type and content always map to
+    the same id, so re-ingesting a resume overwrites its chunks instead of duplicating them.
+    """
+    content_hash = hashlib.sha256(content.encode("utf-8")).digest()
+    key = f"{profile_id}\x1f{chunk_type or ''}\x1f".encode("utf-8") + content_hash
+    # 63 bits so the id fits a signed INT64 primary key
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "big") & 0x7FFFFFFFFFFFFFFF
+
+
+def metadata_value(field: str, value):
+    """Metadata value coerced to the field's Milvus type (None for missing values)"""
+    value = _clean(value)
+    if value is None or value == "":
+        return "" if field in ("profile_id", MILVUS_PARTITION_KEY) else None
+    if field in BOOL_FIELDS:
+        return bool(value)
+    if field in FLOAT_FIELDS:
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return None
+    return str(value)
+
+
+def document_row(doc: Document, vector: List[float]) -> Dict:
+    """Collection row for one chunk; the BM25 sparse vector is computed by Milvus from `content`"""
+    row = {TEXT_FIELD: doc.page_content, DENSE_FIELD: vector}
+    for field in METADATA_FIELDS:
+        row[field] = metadata_value(field, doc.metadata.get(field))
+    row[PRIMARY_FIELD] = chunk_id(row["profile_id"], row["type"], doc.page_content)
+    return row
+
+
+def id_list(ids) -> str:
+    return ", ".join(str(i) for i in ids)
+
+
+def stored_vectors(client, collection_name: str, ids: List[int]) -> Dict[int, List[float]]:
+    """Embeddings already stored for `ids` (unchanged chunks are not re-embedded)"""
+    rows = client.query(collection_name=collection_name, filter=in_list(PRIMARY_FIELD, ids),
+                        output_fields=[PRIMARY_FIELD, DENSE_FIELD])
+    return {row[PRIMARY_FIELD]: row[DENSE_FIELD] for row in rows}
+
+
+def delete_stale_chunks(client, collection_name: str, chunk_ids: Dict[str, Set[int]],
+                        batch_size: int = STALE_DELETE_BATCH_SIZE) -> int:
+    """Delete chunks of the given profiles whose id is not among their current chunk ids"""
+    deleted = 0
+    profiles = sorted(chunk_ids)
+    for start in range(0, len(profiles), batch_size):
+        batch = profiles[start:start + batch_size]
+        keep = id_list(set().union(*(chunk_ids[pid] for pid in batch)))
+        result = client.delete(collection_name=collection_name,
+                               filter=all_of(in_list("profile_id", batch), f"{PRIMARY_FIELD} not in [{keep}]"))
+        deleted += result.get("delete_count", 0) if isinstance(result, dict) else 0
+    return deleted
+
+
+def delete_moved_chunks(client, collection_name: str, partitions: Dict[str, str],
+                        partition_key: Optional[str] = MILVUS_PARTITION_KEY,
+                        batch_size: int = STALE_DELETE_BATCH_SIZE) -> int:
+    """
+    Delete chunks of each profile stored under a partition key value other than its current one
+    ({profile_id: value}). Run before upserting reassigned profiles: an upsert only replaces the
+    row in the new partition and would leave the old one behind.
+    """
+    if not partition_key:
+        return 0
+    by_value: Dict[str, List[str]] = defaultdict(list)
+    for profile_id, value in partitions.items():
+        by_value[metadata_value(partition_key, value)].append(profile_id)
+    deleted = 0
+    for value, profile_ids in by_value.items():
+        profile_ids = sorted(profile_ids)
+        for start in range(0, len(profile_ids), batch_size):
+            batch = profile_ids[start:start + batch_size]
+            result = client.delete(collection_name=collection_name,
+                                   filter=all_of(in_list("profile_id", batch), f"{partition_key} != {literal(value)}"))
+            deleted += result.get("delete_count", 0) if isinstance(result, dict) else 0
+    return deleted
+
+
+async def upsert_documents(documents: List[Document], client=None, collection_name: Optional[str] = None,
+                           batch_size: int = MILVUS_INSERT_BATCH_SIZE, replace_profiles: bool = True) -> int:
+    """
+    Upsert chunk documents by their deterministic ids, returning the number of rows written.
+
+    Only chunks whose content is not stored yet are embedded. With `replace_profiles`, chunks of
+    the same profiles that are no longer produced (edited content) are deleted afterwards, so the
+    documents become the complete set of chunks for their profiles.
+    """
+    if client is None or collection_name is None:
+        from db.milvus import config
+        client = client or config.milvus_client
+        collection_name = collection_name or config.collection_name
+
+    unique = {}
+    for doc in documents:
+        if doc.page_content and doc.page_content.strip():
+            row = document_row(doc, [])
+            unique[row[PRIMARY_FIELD]] = (doc, row)
+
+    written, embedded = 0, 0
+    chunk_ids: Dict[str, Set[int]] = defaultdict(set)
+    items = list(unique.values())
+    for start in range(0, len(items), batch_size):
+        batch = items[start:start + batch_size]
+        ids = [row[PRIMARY_FIELD] for _, row in batch]
+        vectors = await asyncio.to_thread(stored_vectors, client, collection_name, ids)
+        missing = [(doc, row) for doc, row in batch if row[PRIMARY_FIELD] not in vectors]
+        if missing:
+            new_vectors = await dense_embedding.aembed_documents([doc.page_content for doc, _ in missing])
+            vectors.update((row[PRIMARY_FIELD], vector) for (_, row), vector in zip(missing, new_vectors))
+            embedded += len(missing)
+
+        rows = []
+        for _, row in batch:
+            row[DENSE_FIELD] = vectors[row[PRIMARY_FIELD]]
+            rows.append(row)
+            chunk_ids[row["profile_id"]].add(row[PRIMARY_FIELD])
+        result = await asyncio.to_thread(client.upsert, collection_name=collection_name, data=rows)
+        written += result.get("upsert_count", len(rows))
+
+    stale = 0
+    if replace_profiles and chunk_ids:
+        stale = await asyncio.to_thread(delete_stale_chunks, client, collection_name, chunk_ids)
+    logger.info(f"Upserted {written} chunks into {collection_name} ({embedded} embedded, {stale} stale deleted)")
+    return written
+
+
+def update_metadata(client, collection_name: str, updates: Dict[str, Dict],
+                    batch_size: int = STALE_DELETE_BATCH_SIZE) -> int:
+    """
+    Rewrite metadata fields (active, status, campaign_id, ...) of the stored chunks of each profile
+    in `updates` ({profile_id: {field: value}}) without re-embedding, returning the rows rewritten.
+
+    Rows are deleted and re-inserted rather than upserted: when the partition key changes (campaign
+    reassignment) an upsert could leave the old row behind in its previous partition.
+    """
+    rewritten = 0
+    profile_ids = sorted(updates)
+    for start in range(0, len(profile_ids), batch_size):
+        batch = profile_ids[start:start + batch_size]
+        rows = client.query(collection_name=collection_name, filter=in_list("profile_id", batch),
+                            output_fields=[PRIMARY_FIELD, TEXT_FIELD, DENSE_FIELD] + METADATA_FIELDS)
+        if not rows:
+            continue
+        for row in rows:
+            for field, value in updates[row["profile_id"]].items():
+                if field in METADATA_FIELDS and field != "profile_id":
+                    row[field] = metadata_value(field, value)
+        ids = [row[PRIMARY_FIELD] for row in rows]
+        client.delete(collection_name=collection_name, filter=in_list(PRIMARY_FIELD, ids))
+        client.insert(collection_name=collection_name, data=rows)
+        rewritten += len(rows)
+    return rewritten
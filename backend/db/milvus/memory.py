@@ -0,0 +1,437 @@
+"""
+In-process stand-in for MilvusClient, for development, benchmarks and small deployments.
+
+    MILVUS_BACKEND=memory MILVUS_MEMORY_PATH=./milvus_memory.pkl uvicorn main:app
+
+Implements the part of the MilvusClient API this codebase uses: collections and aliases,
+insert/upsert/delete/query/query_iterator, dense search with NumPy (COSINE, IP or L2, exact),
+BM25 search on fields fed by a BM25 function, hybrid search with weighted or RRF fusion,
+grouping search and filters (parsed by db.milvus.expr.compile_filter). Indexes are recorded but
+every search is exact brute force, so it suits up to some hundred thousand chunks. With a path,
+collections are pickled on flush (and at exit) and loaded at start; otherwise they live only in
+the process.
+"""
+import atexit
+import logging
+import math
+import os
+import pickle
+import re
+import threading
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+from pymilvus import DataType, FunctionType, MilvusClient
+
+from db.milvus.expr import compile_filter
+
+logger = logging.getLogger(__name__)
+
+# BM25 parameters (Milvus defaults)
+BM25_K1 = 1.2
+BM25_B = 0.75
+VECTOR_TYPES = {DataType.FLOAT_VECTOR, DataType.FLOAT16_VECTOR, DataType.BFLOAT16_VECTOR}
+
+
+def tokens(text: Any) -> List[str]:
+    """Analyzed tokens of `text` with repeats (term frequencies count for BM25)"""
+    return re.findall(r"\w+", str(text or "").lower())
+
+
+class MemoryCollection:
+    """Rows of one collection keyed by primary key, with lazily rebuilt search structures"""
+
+    def __init__(self, name: str, schema, num_partitions: int = 0):
+        self.name = name
+        self.auto_id = bool(getattr(schema, "auto_id", False))
+        self.fields = []
+        self.primary = None
+        self.dims: Dict[str, int] = {}
+        self.partition_key = None
+        for field in schema.fields:
+            params = dict(getattr(field, "params", {}) or {})
+            info = {
+                "name": field.name,
+                "type": field.dtype,
+                "params": params,
+                "is_primary": bool(getattr(field, "is_primary", False)),
+                "is_partition_key": bool(getattr(field, "is_partition_key", False)),
+                "nullable": bool(getattr(field, "nullable", False)),
+            }
+            self.fields.append(info)
+            if info["is_primary"]:
+                self.primary = field.name
+            if info["is_partition_key"]:
+                self.partition_key = field.name
+            if field.dtype in VECTOR_TYPES:
+                self.dims[field.name] = int(params.get("dim", 0))
+        # BM25 output field -> input text field
+        self.bm25 = {}
+        for function in getattr(schema, "functions", None) or []:
+            if getattr(function, "type", None) == FunctionType.BM25:
+                self.bm25[function.output_field_names[0]] = function.input_field_names[0]
+        self.num_partitions = num_partitions
+        self.indexes: Dict[str, Dict] = {}
+        self.rows: Dict[Any, Dict] = {}
+        self.next_id = 1
+        self._cache: Dict[str, Any] = {}
+
+    def description(self) -> Dict:
+        return {
+            "collection_name": self.name,
+            "auto_id": self.auto_id,
+            "num_partitions": self.num_partitions,
+            "fields": [{key: value for key, value in field.items()} for field in self.fields],
+        }
+
+    def add_indexes(self, index_params: Optional[Iterable]):
+        for index in index_params or []:
+            field = getattr(index, "field_name", None)
+            name = getattr(index, "index_name", None) or field
+            params = dict(getattr(index, "params", None) or {})
+            self.indexes[name] = {
+                "field_name": field,
+                "index_name": name,
+                "index_type": getattr(index, "index_type", None) or params.get("index_type"),
+                "metric_type": getattr(index, "metric_type", None) or params.get("metric_type"),
+            }
+
+    def metric(self, field: str) -> str:
+        for index in self.indexes.values():
+            if index["field_name"] == field and index.get("metric_type"):
+                return index["metric_type"]
+        return "BM25" if field in self.bm25 else "COSINE"
+
+    def write(self, data: List[Dict]) -> List[Any]:
+        ids = []
+        for row in data:
+            row = dict(row)
+            if self.primary not in row or row[self.primary] is None:
+                if not self.auto_id:
+                    raise ValueError(f"Row without primary key {self.primary} for {self.name}")
+                row[self.primary] = self.next_id
+                self.next_id += 1
+            for field in self.bm25:
+                row.pop(field, None)
+            for field in self.dims:
+                if row.get(field) is not None:
+                    row[field] = np.asarray(row[field], dtype=np.float32)
+            self.rows[row[self.primary]] = row
+            ids.append(row[self.primary])
+        self._cache.clear()
+        return ids
+
+    def matching(self, expr: Optional[str]) -> List[Dict]:
+        predicate = compile_filter(expr)
+        return [row for row in self.rows.values() if predicate(row)]
+
+    def output(self, row: Dict, output_fields: Optional[List[str]]) -> Dict:
+        fields = output_fields
+        if not fields or "*" in fields:
+            fields = [field["name"] for field in self.fields if field["name"] not in self.bm25]
+        entity = {}
+        for field in fields:
+            value = row.get(field)
+            entity[field] = value.tolist() if isinstance(value, np.ndarray) else value
+        return entity
+
+    def bm25_stats(self, text_field: str):
+        key = f"bm25:{text_field}"
+        if key not in self._cache:
+            docs = {pk: Counter(tokens(row.get(text_field))) for pk, row in self.rows.items()}
+            df = Counter(token for counts in docs.values() for token in counts)
+            avgdl = sum(sum(counts.values()) for counts in docs.values()) / max(1, len(docs))
+            self._cache[key] = (docs, df, avgdl)
+        return self._cache[key]
+
+    def scores(self, field: str, query: Any, rows: List[Dict]) -> np.ndarray:
+        """Similarity of `query` to every row (higher is better, except for L2 distances)"""
+        if field in self.bm25:
+            docs, df, avgdl = self.bm25_stats(self.bm25[field])
+            n = len(docs)
+            terms = tokens(query)
+            scores = np.zeros(len(rows), dtype=np.float32)
+            for i, row in enumerate(rows):
+                counts = docs.get(row[self.primary], Counter())
+                length = sum(counts.values())
+                for term in terms:
+                    tf = counts.get(term, 0)
+                    if tf:
+                        idf = math.log(1 + (n - df[term] + 0.5) / (df[term] + 0.5))
+                        scores[i] += idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * (1 - BM25_B + BM25_B * length / avgdl))
+            return scores
+        vectors = np.stack([row[field] for row in rows]).astype(np.float32)
+        query = np.asarray(query, dtype=np.float32)
+        metric = self.metric(field)
+        if metric == "L2":
+            return ((vectors - query) ** 2).sum(axis=1)
+        if metric == "IP":
+            return vectors @ query
+        norms = np.linalg.norm(vectors, axis=1) * (np.linalg.norm(query) or 1.0)
+        return vectors @ query / np.where(norms == 0, 1.0, norms)
+
+
+def group_hits(hits: List[Dict], limit: int, group_by_field: Optional[str], group_size: int = 1) -> List[Dict]:
+    """Best `limit` groups of up to `group_size` hits (hits are best first), flattened"""
+    if not group_by_field:
+        return hits[:limit]
+    groups: Dict[Any, List[Dict]] = {}
+    for hit in hits:
+        key = hit["entity"].get(group_by_field)
+        if key not in groups:
+            if len(groups) >= limit:
+                continue
+            groups[key] = []
+        if len(groups[key]) < max(1, group_size):
+            groups[key].append(hit)
+    return [hit for group in groups.values() for hit in group]
+
+
+class MemoryQueryIterator:
+    def __init__(self, rows: List[Dict], batch_size: int):
+        self.rows = rows
+        self.batch_size = max(1, batch_size)
+        self.pos = 0
+
+    def next(self) -> List[Dict]:
+        batch = self.rows[self.pos:self.pos + self.batch_size]
+        self.pos += len(batch)
+        return batch
+
+    def close(self):
+        self.rows = []
+
+
+class InMemoryMilvusClient:
+    """MilvusClient look-alike over MemoryCollection objects (thread-safe)"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.collections: Dict[str, MemoryCollection] = {}
+        self.aliases: Dict[str, str] = {}
+        self._lock = threading.RLock()
+        if path and os.path.exists(path):
+            with open(path, "rb") as f:
+                self.collections, self.aliases = pickle.load(f)
+            logger.info(f"Loaded {len(self.collections)} in-memory collections from {path}")
+        if path:
+            # Writes don't flush on every call; make sure they survive a normal shutdown
+            atexit.register(self.flush)
+
+    # ---- schema and collections ----
+
+    create_schema = staticmethod(MilvusClient.create_schema)
+
+    @staticmethod
+    def prepare_index_params(*args, **kwargs):
+        return MilvusClient.prepare_index_params(*args, **kwargs)
+
+    def _collection(self, name: str) -> MemoryCollection:
+        name = self.aliases.get(name, name)
+        if name not in self.collections:
+            raise ValueError(f"Collection {name} does not exist")
+        return self.collections[name]
+
+    def has_collection(self, collection_name: str, **kwargs) -> bool:
+        return collection_name in self.collections or collection_name in self.aliases
+
+    def list_collections(self, **kwargs) -> List[str]:
+        return sorted(self.collections)
+
+    def create_collection(self, collection_name: str, dimension: Optional[int] = None, schema=None,
+                          index_params=None, num_partitions: int = 0, **kwargs):
+        with self._lock:
+            if collection_name in self.collections:
+                return
+            if schema is None:
+                # Quick-setup collections: int64 "id" and a float "vector"
+                schema = MilvusClient.create_schema(auto_id=False)
+                schema.add_field("id", DataType.INT64, is_primary=True)
+                schema.add_field("vector", DataType.FLOAT_VECTOR, dim=dimension)
+            collection = MemoryCollection(collection_name, schema, num_partitions)
+            collection.add_indexes(index_params)
+            self.collections[collection_name] = collection
+
+    def drop_collection(self, collection_name: str, **kwargs):
+        with self._lock:
+            self.collections.pop(collection_name, None)
+            self.aliases = {alias: target for alias, target in self.aliases.items() if target != collection_name}
+
+    def rename_collection(self, old_name: str, new_name: str, **kwargs):
+        with self._lock:
+            collection = self.collections.pop(old_name)
+            collection.name = new_name
+            self.collections[new_name] = collection
+            self.aliases = {alias: new_name if target == old_name else target
+                            for alias, target in self.aliases.items()}
+
+    def describe_collection(self, collection_name: str, **kwargs) -> Dict:
+        return self._collection(collection_name).description()
+
+    def load_collection(self, collection_name: str, **kwargs):
+        self._collection(collection_name)
+
+    def release_collection(self, collection_name: str, **kwargs):
+        self._collection(collection_name)
+
+    def flush(self, collection_name: Optional[str] = None, **kwargs):
+        if not self.path:
+            return
+        with self._lock:
+            with open(self.path, "wb") as f:
+                pickle.dump((self.collections, self.aliases), f)
+
+    # ---- aliases ----
+
+    def create_alias(self, collection_name: str, alias: str, **kwargs):
+        with self._lock:
+            if alias in self.aliases or alias in self.collections:
+                raise ValueError(f"Alias {alias} already exists")
+            self._collection(collection_name)
+            self.aliases[alias] = collection_name
+
+    def alter_alias(self, collection_name: str, alias: str, **kwargs):
+        with self._lock:
+            self._collection(collection_name)
+            self.aliases[alias] = collection_name
+
+    def describe_alias(self, alias: str, **kwargs) -> Dict:
+        if alias not in self.aliases:
+            raise ValueError(f"Alias {alias} does not exist")
+        return {"alias": alias, "collection_name": self.aliases[alias]}
+
+    # ---- indexes ----
+
+    def create_index(self, collection_name: str, index_params, **kwargs):
+        with self._lock:
+            self._collection(collection_name).add_indexes(index_params)
+
+    def list_indexes(self, collection_name: str, **kwargs) -> List[str]:
+        return list(self._collection(collection_name).indexes)
+
+    def describe_index(self, collection_name: str, index_name: str, **kwargs) -> Dict:
+        indexes = self._collection(collection_name).indexes
+        if index_name not in indexes:
+            raise ValueError(f"Index {index_name} does not exist")
+        return dict(indexes[index_name])
+
+    # ---- data ----
+
+    def insert(self, collection_name: str, data, **kwargs) -> Dict:
+        with self._lock:
+            ids = self._collection(collection_name).write(data if isinstance(data, list) else [data])
+        return {"insert_count": len(ids), "ids": ids}
+
+    def upsert(self, collection_name: str, data, **kwargs) -> Dict:
+        with self._lock:
+            ids = self._collection(collection_name).write(data if isinstance(data, list) else [data])
+        return {"upsert_count": len(ids), "ids": ids}
+
+    def delete(self, collection_name: str, ids=None, filter: str = "", **kwargs) -> Dict:
+        with self._lock:
+            collection = self._collection(collection_name)
+            if ids is not None:
+                keys = [pk for pk in (ids if isinstance(ids, list) else [ids]) if pk in collection.rows]
+            else:
+                keys = [row[collection.primary] for row in collection.matching(filter)]
+            for pk in keys:
+                del collection.rows[pk]
+            collection._cache.clear()
+        return {"delete_count": len(keys)}
+
+    def query(self, collection_name: str, filter: str = "", output_fields: Optional[List[str]] = None,
+              ids=None, limit: Optional[int] = None, offset: int = 0, **kwargs) -> List[Dict]:
+        with self._lock:
+            collection = self._collection(collection_name)
+            if ids is not None:
+                rows = [collection.rows[pk] for pk in (ids if isinstance(ids, list) else [ids])
+                        if pk in collection.rows]
+            else:
+                rows = collection.matching(filter)
+            if output_fields and "count(*)" in output_fields:
+                return [{"count(*)": len(rows)}]
+            rows = rows[offset:offset + limit] if limit else rows[offset:]
+            fields = list(dict.fromkeys([collection.primary] + list(output_fields or [])))
+            return [collection.output(row, fields) for row in rows]
+
+    def query_iterator(self, collection_name: str, batch_size: int = 1000, filter: str = "",
+                       output_fields: Optional[List[str]] = None, limit: int = -1, **kwargs) -> MemoryQueryIterator:
+        rows = self.query(collection_name, filter=filter, output_fields=output_fields)
+        return MemoryQueryIterator(rows[:limit] if limit and limit > 0 else rows, batch_size)
+
+    # ---- search ----
+
+    def _search_one(self, collection: MemoryCollection, query, anns_field: str, rows: List[Dict],
+                    limit: int) -> List[Dict]:
+        rows = [row for row in rows if anns_field in collection.bm25 or row.get(anns_field) is not None]
+        if not rows:
+            return []
+        scores = collection.scores(anns_field, query, rows)
+        ascending = collection.metric(anns_field) == "L2"
+        order = np.argsort(scores if ascending else -scores)
+        hits = []
+        for i in order[:limit]:
+            if anns_field in collection.bm25 and scores[i] <= 0:
+                break
+            hits.append({"id": rows[i][collection.primary], "distance": float(scores[i]), "row": rows[i]})
+        return hits
+
+    def search(self, collection_name: str, data: List, anns_field: Optional[str] = None, limit: int = 10,
+               filter: str = "", output_fields: Optional[List[str]] = None, search_params: Optional[Dict] = None,
+               group_by_field: Optional[str] = None, group_size: int = 1, **kwargs) -> List[List[Dict]]:
+        with self._lock:
+            collection = self._collection(collection_name)
+            anns_field = anns_field or next(iter(collection.dims), None)
+            rows = collection.matching(filter)
+            fields = list(output_fields or []) + ([group_by_field] if group_by_field else [])
+            results = []
+            for query in data:
+                candidates = len(rows) if group_by_field else limit
+                hits = self._search_one(collection, query, anns_field, rows, candidates)
+                hits = [{"id": hit["id"], "distance": hit["distance"], "entity": collection.output(hit["row"], fields)}
+                        for hit in hits]
+                results.append(self._trim(group_hits(hits, limit, group_by_field, group_size), output_fields))
+            return results
+
+    def hybrid_search(self, collection_name: str, reqs: List, ranker, limit: int = 10,
+                      output_fields: Optional[List[str]] = None, group_by_field: Optional[str] = None,
+                      group_size: int = 1, **kwargs) -> List[List[Dict]]:
+        with self._lock:
+            collection = self._collection(collection_name)
+            strategy = ranker.dict() if hasattr(ranker, "dict") else {"strategy": "rrf", "params": {"k": 60}}
+            fused: Dict[Any, float] = {}
+            rows_by_id: Dict[Any, Dict] = {}
+            for position, req in enumerate(reqs):
+                rows = collection.matching(req.expr)
+                hits = self._search_one(collection, req.data[0], req.anns_field, rows, req.limit)
+                metric = collection.metric(req.anns_field)
+                for rank, hit in enumerate(hits):
+                    rows_by_id[hit["id"]] = hit["row"]
+                    if strategy.get("strategy") == "weighted":
+                        weight = strategy["params"]["weights"][position]
+                        score = weight * normalize_score(hit["distance"], metric)
+                    else:
+                        score = 1.0 / (strategy.get("params", {}).get("k", 60) + rank + 1)
+                    fused[hit["id"]] = fused.get(hit["id"], 0.0) + score
+            fields = list(output_fields or []) + ([group_by_field] if group_by_field else [])
+            hits = [{"id": pk, "distance": score, "entity": collection.output(rows_by_id[pk], fields)}
+                    for pk, score in sorted(fused.items(), key=lambda item: item[1], reverse=True)]
+            return [self._trim(group_hits(hits, limit, group_by_field, group_size), output_fields)]
+
+    @staticmethod
+    def _trim(hits: List[Dict], output_fields: Optional[List[str]]) -> List[Dict]:
+        """Drop the grouping field from entities when it was not asked for"""
+        wanted = set(output_fields or [])
+        for hit in hits:
+            hit["entity"] = {key: value for key, value in hit["entity"].items() if key in wanted}
+        return hits
+
+
+def normalize_score(distance: float, metric: str) -> float:
+    """Map a metric's distance to [0, 1], higher is better (as weighted fusion does)"""
+    if metric == "COSINE":
+        return (distance + 1.0) / 2.0
+    if metric == "L2":
+        return 1.0 - 2.0 * math.atan(distance) / math.pi
+    return 0.5 + math.atan(distance) / math.pi
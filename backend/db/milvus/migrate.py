@@ -0,0 +1,126 @@
+"""
+Copy the chunk collection into a collection partitioned by campaign_id (or client_id).
+
+    python -m db.milvus.migrate --partition-key campaign_id --swap
+
+Rows are copied with their stored embeddings, so nothing is re-embedded; the BM25 field is
+recomputed by Milvus on insert and duplicate chunks collapse onto their deterministic ids. The copy is a new blue/green version (db/milvus/versions.py);
+with --swap the source alias is switched to it once the row counts match, and the old
+collection is kept as a version for rollback.
+"""
+import argparse
+import logging
+import sys
+import time
+from typing import Dict, List, Optional
+
+from langchain_core.documents import Document
+
+from db.milvus.ingest import MILVUS_INSERT_BATCH_SIZE, document_row
+from db.milvus.schema import (DENSE_FIELD, EMBEDDING_DIM, MILVUS_NUM_PARTITIONS, MILVUS_PARTITION_KEY,
+                              PARTITION_KEY_FIELDS, SPARSE_FIELD, TEXT_FIELD, alias_target, ensure_collection,
+                              partition_key_field)
+from db.milvus.versions import adopt_legacy_collection, new_version_name, row_count, switch_alias
+
+logger = logging.getLogger(__name__)
+
+
+def copy_fields(client, collection_name: str) -> List[str]:
+    """Fields to read from the source: everything but the primary key (derived from content) and BM25 output"""
+    fields = []
+    for field in client.describe_collection(collection_name)["fields"]:
+        if field.get("is_primary") or field["name"] == SPARSE_FIELD:
+            continue
+        fields.append(field["name"])
+    return fields
+
+
+def migrated_row(row: Dict) -> Optional[Dict]:
+    content = row.get(TEXT_FIELD) or ""
+    vector = row.get(DENSE_FIELD)
+    if not content.strip() or vector is None:
+        return None
+    return document_row(Document(page_content=content, metadata=row), [float(x) for x in vector])
+
+
+def copy_collection(client, source: str, target: str, batch_size: int = MILVUS_INSERT_BATCH_SIZE) -> int:
+    iterator = client.query_iterator(collection_name=source, batch_size=batch_size, filter="",
+                                     output_fields=copy_fields(client, source))
+    copied = skipped = 0
+    try:
+        while True:
+            batch = iterator.next()
+            if not batch:
+                break
+            rows = [migrated_row(row) for row in batch]
+            skipped += sum(1 for row in rows if row is None)
+            rows = [row for row in rows if row is not None]
+            if rows:
+                # Upsert: duplicate chunks of the old auto-id layout collapse onto one deterministic id
+                copied += client.upsert(collection_name=target, data=rows).get("upsert_count", len(rows))
+            logger.info(f"Copied {copied} rows from {source} to {target}")
+    finally:
+        iterator.close()
+    if skipped:
+        logger.warning(f"Skipped {skipped} rows without content or embedding")
+    return copied
+
+
+def migrate(client, source: str, target: Optional[str] = None, partition_key: str = MILVUS_PARTITION_KEY,
+            num_partitions: int = MILVUS_NUM_PARTITIONS, dim: int = EMBEDDING_DIM,
+            batch_size: int = MILVUS_INSERT_BATCH_SIZE, swap: bool = False) -> Dict:
+    live = alias_target(client, source) or source
+    if not client.has_collection(live):
+        raise ValueError(f"Collection {source} does not exist")
+    if partition_key_field(client, live) == partition_key:
+        logger.info(f"{source} is already partitioned by {partition_key}")
+        return {"source": live, "target": live, "copied": 0, "swapped": False}
+
+    target = target or new_version_name(source)
+    ensure_collection(client, target, drop_old=True, dim=dim, partition_key=partition_key,
+                      num_partitions=num_partitions)
+    start = time.perf_counter()
+    copied = copy_collection(client, live, target, batch_size)
+    client.flush(target)
+    source_rows, target_rows = row_count(client, live), row_count(client, target)
+    logger.info(f"Copied {copied} rows in {time.perf_counter() - start:.1f}s "
+                f"({live}: {source_rows} rows, {target}: {target_rows} rows)")
+
+    swapped = False
+    if swap:
+        if target_rows == 0 or target_rows > copied:
+            raise RuntimeError(f"{target} has {target_rows} rows but {copied} were copied; not swapping")
+        # The old collection stays as a version for rollback (python -m db.milvus.versions rollback)
+        adopt_legacy_collection(client, source)
+        switch_alias(client, source, target)
+        swapped = True
+
+    return {"source": live, "target": target, "copied": copied, "source_rows": source_rows,
+            "target_rows": target_rows, "duplicates_removed": copied - target_rows, "swapped": swapped}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Migrate the Milvus chunk collection to a partition-key layout")
+    parser.add_argument("--source", help="collection to copy (defaults to MILVUS_COLLECTION)")
+    parser.add_argument("--target", help="new collection (defaults to a new version of the source alias)")
+    parser.add_argument("--partition-key", default=MILVUS_PARTITION_KEY, choices=PARTITION_KEY_FIELDS)
+    parser.add_argument("--num-partitions", type=int, default=MILVUS_NUM_PARTITIONS)
+    parser.add_argument("--batch-size", type=int, default=MILVUS_INSERT_BATCH_SIZE)
+    parser.add_argument("--swap", action="store_true", help="switch the source alias to the new collection")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    logging.basicConfig(level=logging.INFO)
+    args = parse_args(argv)
+
+    from db.milvus.config import collection_name, milvus_client
+    source = args.source or collection_name
+    result = migrate(milvus_client, source, args.target, partition_key=args.partition_key,
+                     num_partitions=args.num_partitions, batch_size=args.batch_size, swap=args.swap)
+    print(result)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
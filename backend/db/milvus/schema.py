@@ -0,0 +1,231 @@
+import json
+import logging
+import os
+from typing import Dict, Optional
+
+from pymilvus import DataType, Function, FunctionType, MilvusClient
+
+from utils.embeddings import default_embedding_dim
+
+logger = logging.getLogger(__name__)
+
+# 1536 for text-embedding-3-small, ONNX_EMBEDDING_DIM with the local ONNX backend
+EMBEDDING_DIM = int(os.getenv("EMBEDDING_DIM", default_embedding_dim()))
+
+# Scoped searches filter on this field, so Milvus only searches the partitions holding its values
+MILVUS_PARTITION_KEY = os.getenv("MILVUS_PARTITION_KEY", "campaign_id") or None
+MILVUS_NUM_PARTITIONS = int(os.getenv("MILVUS_NUM_PARTITIONS", 64))
+PARTITION_KEY_FIELDS = ("campaign_id", "client_id")
+
+PRIMARY_FIELD = "id"
+TEXT_FIELD = "content"
+DENSE_FIELD = "content_dense"
+SPARSE_FIELD = "content_sparse"
+
+# Scalar fields copied from each chunk's metadata
+METADATA_FIELDS = ["name", "profile_id", "type", "status", "active", "total_experience", "job_title",
+                   "campaign_id", "client_id"]
+
+# Fields returned with search hits (vector fields and the BM25 output are never returned)
+OUTPUT_FIELDS = [TEXT_FIELD] + METADATA_FIELDS
+
+INDEX_PARAMS_PATH = os.getenv("MILVUS_INDEX_PARAMS_PATH",
+                              os.path.join(os.path.dirname(os.path.abspath(__file__)), "index_params.json"))
+
+
+def load_index_params(path: str = INDEX_PARAMS_PATH) -> Dict[str, Dict]:
+    """Index and search parameters of the dense and sparse fields (tuned with benchmarks.hnsw_tuning)"""
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def dense_index_config(config: Dict, preset: Optional[str] = None) -> Dict:
+    """
+    Dense index, search and rerank settings: the tuned defaults, or a quantized preset from
+    `dense_presets` (HNSW_SQ, IVF_SQ8, IVF_PQ) overriding them
+    """
+    settings = {key: config[key] for key in ("dense", "dense_search")}
+    settings["dense_rerank_factor"] = config.get("dense_rerank_factor", 1)
+    if preset:
+        presets = config.get("dense_presets", {})
+        if preset not in presets:
+            raise ValueError(f"Unknown dense index preset '{preset}', expected one of {sorted(presets)}")
+        settings.update(presets[preset])
+    return settings
+
+
+# The index type is fixed when a collection is created: set MILVUS_DENSE_INDEX and rebuild
+# (python -m db.milvus.versions rebuild) before deploying searches with it
+MILVUS_DENSE_INDEX = os.getenv("MILVUS_DENSE_INDEX") or None
+
+INDEX_PARAMS = load_index_params()
+DENSE_CONFIG = dense_index_config(INDEX_PARAMS, MILVUS_DENSE_INDEX)
+DENSE_INDEX_PARAMS = DENSE_CONFIG["dense"]
+DENSE_SEARCH_PARAMS = DENSE_CONFIG["dense_search"]
+# Quantized indexes rank approximately; searches fetch this many times k candidates and rerank
+# them by exact cosine on the stored full-precision vectors (1 disables the rerank)
+DENSE_RERANK_FACTOR = max(1, int(DENSE_CONFIG["dense_rerank_factor"]))
+SPARSE_INDEX_PARAMS = INDEX_PARAMS["sparse"]
+SPARSE_SEARCH_PARAMS = INDEX_PARAMS["sparse_search"]
+# Scalar index type per filtered metadata field: INVERTED for high-cardinality strings (profile_id
+# IN lists, campaign/client equality), BITMAP for low-cardinality ones, STL_SORT for experience ranges
+SCALAR_INDEX_PARAMS = INDEX_PARAMS.get("scalar", {})
+
+
+def build_schema(dim: int = EMBEDDING_DIM, partition_key: Optional[str] = MILVUS_PARTITION_KEY):
+    """
+    Chunk collection schema: dense embedding of `content` plus a BM25 sparse vector that
+    Milvus computes from `content` on insert, so exact terms are searchable without LIKE scans.
+
+    `partition_key` (campaign_id or client_id, None for a flat collection) hashes rows into
+    partitions by that field; searches with an equality or IN filter on it skip other partitions.
+    """
+    if partition_key is not None and partition_key not in PARTITION_KEY_FIELDS:
+        raise ValueError(f"Partition key must be one of {PARTITION_KEY_FIELDS}, got '{partition_key}'")
+    # Ids are derived from (profile_id, chunk type, content hash) at ingest, see ingest.chunk_id
+    schema = MilvusClient.create_schema(auto_id=False, enable_dynamic_field=False)
+    schema.add_field(PRIMARY_FIELD, DataType.INT64, is_primary=True)
+    schema.add_field(TEXT_FIELD, DataType.VARCHAR, max_length=65535, enable_analyzer=True, enable_match=True)
+    schema.add_field(DENSE_FIELD, DataType.FLOAT_VECTOR, dim=dim)
+    schema.add_field(SPARSE_FIELD, DataType.SPARSE_FLOAT_VECTOR)
+
+    schema.add_field("name", DataType.VARCHAR, max_length=512, nullable=True)
+    schema.add_field("profile_id", DataType.VARCHAR, max_length=64)
+    schema.add_field("type", DataType.VARCHAR, max_length=32, nullable=True)
+    schema.add_field("status", DataType.VARCHAR, max_length=32, nullable=True)
+    schema.add_field("active", DataType.BOOL, nullable=True)
+    schema.add_field("total_experience", DataType.FLOAT, nullable=True)
+    schema.add_field("job_title", DataType.VARCHAR, max_length=2048, nullable=True)
+    for field in PARTITION_KEY_FIELDS:
+        if field == partition_key:
+            # Partition keys can't be null; rows without a value share the "" partition
+            schema.add_field(field, DataType.VARCHAR, max_length=64, is_partition_key=True)
+        else:
+            schema.add_field(field, DataType.VARCHAR, max_length=64, nullable=True)
+
+    schema.add_function(Function(
+        name="content_bm25",
+        function_type=FunctionType.BM25,
+        input_field_names=[TEXT_FIELD],
+        output_field_names=[SPARSE_FIELD],
+    ))
+    return schema
+
+
+def scalar_index_name(field: str) -> str:
+    return f"{field}_index"
+
+
+def build_index_params(client: MilvusClient, scalar_indexes: bool = True):
+    index_params = client.prepare_index_params()
+    index_params.add_index(field_name=DENSE_FIELD, index_name="content_dense_index", **DENSE_INDEX_PARAMS)
+    index_params.add_index(field_name=SPARSE_FIELD, index_name="content_sparse_index", **SPARSE_INDEX_PARAMS)
+    if scalar_indexes:
+        # Filters and filtered deletes use these instead of scanning every row
+        for field, index_type in SCALAR_INDEX_PARAMS.items():
+            index_params.add_index(field_name=field, index_name=scalar_index_name(field), index_type=index_type)
+    return index_params
+
+
+def ensure_scalar_indexes(client: MilvusClient, collection_name: str):
+    """Create the configured scalar indexes an existing collection is missing (built in the background)"""
+    existing = set(client.list_indexes(collection_name))
+    fields = {field["name"] for field in client.describe_collection(collection_name)["fields"]}
+    index_params = client.prepare_index_params()
+    missing = []
+    for field, index_type in SCALAR_INDEX_PARAMS.items():
+        if field in fields and scalar_index_name(field) not in existing:
+            index_params.add_index(field_name=field, index_name=scalar_index_name(field), index_type=index_type)
+            missing.append(field)
+    if not missing:
+        return []
+    try:
+        client.create_index(collection_name, index_params, sync=False)
+        logger.info(f"Creating scalar indexes on {collection_name}: {', '.join(missing)}")
+    except Exception as err:
+        logger.warning(f"Could not create scalar indexes on {collection_name} ({err}); "
+                       f"filters scan {', '.join(missing)} until the collection is rebuilt")
+        return []
+    return missing
+
+
+def partition_key_field(client: MilvusClient, collection_name: str) -> Optional[str]:
+    """Partition key field of an existing collection (None when it has none)"""
+    for field in client.describe_collection(collection_name)["fields"]:
+        if field.get("is_partition_key"):
+            return field["name"]
+    return None
+
+
+def dense_index_type(client: MilvusClient, collection_name: str) -> Optional[str]:
+    """Index type of the dense field of an existing collection (None when it can't be read)"""
+    try:
+        return client.describe_index(collection_name, index_name="content_dense_index").get("index_type")
+    except Exception:
+        return None
+
+
+def check_dense_index(client: MilvusClient, collection_name: str, dim: int = EMBEDDING_DIM):
+    for field in client.describe_collection(collection_name)["fields"]:
+        stored_dim = int((field.get("params") or {}).get("dim", dim))
+        if field["name"] == DENSE_FIELD and stored_dim != dim:
+            logger.error(f"Collection {collection_name} holds {stored_dim}-dim vectors but the embedding model "
+                         f"returns {dim}; it belongs to another model (see utils/embeddings.py)")
+    index_type = dense_index_type(client, collection_name)
+    if index_type and index_type != DENSE_INDEX_PARAMS["index_type"]:
+        logger.warning(f"Collection {collection_name} has a {index_type} dense index but "
+                       f"{DENSE_INDEX_PARAMS['index_type']} is configured; rebuild it before searching with "
+                       f"the configured search parameters")
+
+
+def alias_target(client: MilvusClient, name: str) -> Optional[str]:
+    """Collection an alias points to (None when `name` is not an alias)"""
+    try:
+        return client.describe_alias(alias=name)["collection_name"]
+    except Exception:
+        return None
+
+
+def ensure_collection(client: MilvusClient, collection_name: str, drop_old: bool = False, dim: int = EMBEDDING_DIM,
+                      partition_key: Optional[str] = MILVUS_PARTITION_KEY,
+                      num_partitions: int = MILVUS_NUM_PARTITIONS, scalar_indexes: bool = True):
+    """Create the chunk collection with its indexes unless it already exists, and load it"""
+    target = alias_target(client, collection_name)
+    if target is not None:
+        # Blue/green alias (db/milvus/versions.py): the versions are created and loaded by the rebuild
+        logger.info(f"{collection_name} is an alias of {target}")
+        check_dense_index(client, target, dim)
+        if scalar_indexes:
+            ensure_scalar_indexes(client, target)
+        return
+
+    if drop_old and client.has_collection(collection_name):
+        client.drop_collection(collection_name)
+        logger.info(f"Dropped collection {collection_name}")
+
+    if not client.has_collection(collection_name):
+        client.create_collection(
+            collection_name=collection_name,
+            schema=build_schema(dim, partition_key),
+            index_params=build_index_params(client, scalar_indexes),
+            consistency_level="Bounded",
+            **({"num_partitions": num_partitions} if partition_key else {}),
+        )
+        logger.info(f"Created collection {collection_name}")
+    else:
+        description = client.describe_collection(collection_name)
+        fields = {field["name"] for field in description["fields"]}
+        if description.get("auto_id"):
+            logger.warning(f"Collection {collection_name} uses auto ids; upserts need it to be rebuilt "
+                           f"(python -m db.milvus.versions rebuild)")
+        if SPARSE_FIELD not in fields:
+            logger.warning(f"Collection {collection_name} has no {SPARSE_FIELD} field; hybrid and keyword "
+                           f"search need it to be rebuilt with initialize_milvus.py")
+        check_dense_index(client, collection_name, dim)
+        if partition_key and partition_key_field(client, collection_name) != partition_key:
+            logger.warning(f"Collection {collection_name} is not partitioned by {partition_key}; scoped searches "
+                           f"scan the whole collection until it is migrated with db/milvus/migrate.py")
+        if scalar_indexes:
+            ensure_scalar_indexes(client, collection_name)
+
+    client.load_collection(collection_name)
@@ -0,0 +1,347 @@
+import asyncio
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+from pymilvus import AnnSearchRequest, RRFRanker, WeightedRanker
+
+from db.milvus.expr import all_of
+from db.milvus.schema import (DENSE_FIELD, DENSE_RERANK_FACTOR, DENSE_SEARCH_PARAMS, OUTPUT_FIELDS, PRIMARY_FIELD,
+                              SPARSE_FIELD, SPARSE_SEARCH_PARAMS, TEXT_FIELD)
+
+logger = logging.getLogger(__name__)
+
+VECTOR_SEARCH_MAX_WORKERS = int(os.getenv("VECTOR_SEARCH_MAX_WORKERS", 8))
+VECTOR_SEARCH_MAX_CONCURRENCY = int(os.getenv("VECTOR_SEARCH_MAX_CONCURRENCY", VECTOR_SEARCH_MAX_WORKERS))
+VECTOR_SEARCH_TIMEOUT = float(os.getenv("VECTOR_SEARCH_TIMEOUT", 30))
+TIMEOUT_GRACE = 5
+
+# Hybrid (dense + BM25) reranking: "weighted" or "rrf"
+HYBRID_RANKER = os.getenv("HYBRID_RANKER", "weighted")
+HYBRID_DENSE_WEIGHT = float(os.getenv("HYBRID_DENSE_WEIGHT", 0.6))
+HYBRID_SPARSE_WEIGHT = float(os.getenv("HYBRID_SPARSE_WEIGHT", 0.4))
+HYBRID_RRF_K = int(os.getenv("HYBRID_RRF_K", 60))
+# Candidates fetched from each sub-search before reranking, as a multiple of k
+HYBRID_CANDIDATE_FACTOR = int(os.getenv("HYBRID_CANDIDATE_FACTOR", 2))
+
+SEARCH_MODES = ("dense", "sparse", "hybrid")
+
+# Searches group chunks by profile_id, so k counts distinct profiles rather than chunks
+MILVUS_GROUP_BY_PROFILE = os.getenv("MILVUS_GROUP_BY_PROFILE", "true").lower() in ("1", "true", "yes")
+# Chunks returned per profile (each profile has an "experience" and a "learning" chunk)
+MILVUS_GROUP_SIZE = int(os.getenv("MILVUS_GROUP_SIZE", 2))
+# How the scores of a profile's chunks combine: "max" or "mean"
+PROFILE_SCORE_AGGREGATION = os.getenv("PROFILE_SCORE_AGGREGATION", "max")
+GROUP_FIELD = "profile_id"
+
+# Chunks of deactivated profiles stay in the collection flagged inactive (see db/milvus/sync.py)
+ACTIVE_FILTER = "active == true"
+
+
+class VectorSearchTimeout(Exception):
+    """Raised when a vector search does not finish within the configured timeout"""
+
+
+def build_ranker(name: str = HYBRID_RANKER, dense_weight: float = HYBRID_DENSE_WEIGHT,
+                 sparse_weight: float = HYBRID_SPARSE_WEIGHT, rrf_k: int = HYBRID_RRF_K):
+    """Ranker fusing the dense and BM25 result lists of a hybrid search"""
+    if name == "rrf":
+        return RRFRanker(rrf_k)
+    if name == "weighted":
+        return WeightedRanker(dense_weight, sparse_weight)
+    raise ValueError(f"Unknown hybrid ranker '{name}', expected 'weighted' or 'rrf'")
+
+
+def cosine_relevance(distance: float) -> float:
+    """Map a COSINE distance from [-1, 1] to a [0, 1] relevance score (as the langchain store did)"""
+    return (distance + 1.0) / 2.0
+
+
+def active_only(expr: Optional[str]) -> str:
+    """`expr` restricted to chunks of active profiles"""
+    return all_of(ACTIVE_FILTER, expr)
+
+
+def rerank_exact(vector: List[float], hits, k: int) -> List[Dict]:
+    """
+    Top `k` of `hits` by exact cosine between `vector` and each hit's stored embedding (returned
+    in the hit's entity), replacing the approximate distances of a quantized index
+    """
+    hits = [hit for hit in hits if (hit.get("entity") or {}).get(DENSE_FIELD) is not None]
+    if not hits:
+        return []
+    query = np.asarray(vector, dtype=np.float32)
+    stored = np.asarray([hit["entity"][DENSE_FIELD] for hit in hits], dtype=np.float32)
+    norms = np.linalg.norm(stored, axis=1) * (np.linalg.norm(query) or 1.0)
+    scores = stored @ query / np.where(norms == 0, 1.0, norms)
+    reranked = []
+    for i in np.argsort(-scores)[:k]:
+        entity = {key: value for key, value in hits[i]["entity"].items() if key != DENSE_FIELD}
+        reranked.append({"id": hits[i].get("id"), "distance": float(scores[i]), "entity": entity})
+    return reranked
+
+
+def hits_to_documents(hits, score_fn=None) -> List[Tuple[Document, float]]:
+    results = []
+    for hit in hits:
+        entity = dict(hit.get("entity") or {})
+        content = entity.pop(TEXT_FIELD, "") or ""
+        entity[PRIMARY_FIELD] = hit.get("id")
+        score = hit.get("distance")
+        results.append((Document(page_content=content, metadata=entity), score_fn(score) if score_fn else score))
+    return results
+
+
+def grouping_params(enabled: bool = MILVUS_GROUP_BY_PROFILE, group_size: int = MILVUS_GROUP_SIZE) -> Dict:
+    """Milvus grouping-search arguments (limit then counts profiles; groups may hold fewer chunks)"""
+    if not enabled:
+        return {}
+    return {"group_by_field": GROUP_FIELD, "group_size": max(1, group_size), "strict_group_size": False}
+
+
+def aggregate_profiles(results: List[Tuple[Document, float]], k: int,
+                       aggregation: str = PROFILE_SCORE_AGGREGATION) -> List[Tuple[Document, float]]:
+    """
+    One result per profile_id: its best chunk with the chunk scores combined by `aggregation`
+    ("max" or "mean"), best first, at most `k`
+    """
+    if aggregation not in ("max", "mean"):
+        raise ValueError(f"Unknown score aggregation '{aggregation}', expected 'max' or 'mean'")
+    groups: Dict[str, List] = {}
+    for doc, score in results:
+        group = groups.setdefault(doc.metadata.get(GROUP_FIELD), [doc, score, []])
+        if score > group[1]:
+            group[0], group[1] = doc, score
+        group[2].append(score)
+    profiles = [(doc, best if aggregation == "max" else sum(scores) / len(scores))
+                for doc, best, scores in groups.values()]
+    profiles.sort(key=lambda item: item[1], reverse=True)
+    return profiles[:k]
+
+
+class VectorSearchService:
+    """
+    Non-blocking access to the profile chunk collection in Milvus.
+
+    Searches run on a dedicated, bounded thread pool so concurrent requests overlap instead of
+    blocking the event loop. A semaphore caps in-flight searches (callers beyond the limit
+    wait without holding a thread), and each search carries a timeout that is passed to Milvus
+    as the gRPC deadline, so a slow search frees its thread rather than pinning it.
+
+    Three retrieval modes are supported: dense (embedding similarity on `content_dense`),
+    sparse (BM25 on `content_sparse`, which Milvus derives from `content` at insert) and
+    hybrid, which runs both through Milvus's multi-vector search and fuses them with a ranker.
+
+    With MILVUS_GROUP_BY_PROFILE (the default) every mode is a grouping search on profile_id:
+    k is the number of distinct profiles, each returned once with its chunk scores aggregated.
+    """
+
+    def __init__(self, client=None, collection_name: Optional[str] = None, embedding=None,
+                 max_workers: int = VECTOR_SEARCH_MAX_WORKERS,
+                 max_concurrency: int = VECTOR_SEARCH_MAX_CONCURRENCY,
+                 timeout: float = VECTOR_SEARCH_TIMEOUT):
+        self._client = client
+        self._collection_name = collection_name
+        self._embedding = embedding
+        self.max_workers = max(1, max_workers)
+        self.max_concurrency = max(1, max_concurrency)
+        self.timeout = timeout
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            from db.milvus.config import milvus_client
+            self._client = milvus_client
+        return self._client
+
+    @property
+    def collection_name(self) -> str:
+        if self._collection_name is None:
+            from db.milvus.config import collection_name
+            self._collection_name = collection_name
+        return self._collection_name
+
+    @property
+    def embedding(self):
+        if self._embedding is None:
+            from utils.chatgpt import dense_embedding
+            self._embedding = dense_embedding
+        return self._embedding
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="vector-search")
+        return self._executor
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def run(self, fn, *args, timeout: Optional[float] = None, **kwargs) -> Any:
+        """
+        Run a blocking Milvus call on the search pool with the concurrency limit and timeout.
+
+        `timeout` bounds the wait here; forward a deadline to the call itself through kwargs. A
+        call that outlives the wait keeps its semaphore slot until its thread finishes.
+        """
+        timeout = timeout or self.timeout
+        semaphore = self.semaphore
+        await semaphore.acquire()
+        try:
+            future = asyncio.get_running_loop().run_in_executor(self.executor, partial(fn, *args, **kwargs))
+        except BaseException:
+            semaphore.release()
+            raise
+
+        def finished(done: asyncio.Future):
+            # The slot is held until the call itself returns, not until the caller stops waiting,
+            # so timed-out searches still count against the concurrency limit
+            semaphore.release()
+            if not done.cancelled() and done.exception() is not None:
+                logger.debug(f"Abandoned vector search failed: {done.exception()}")
+
+        future.add_done_callback(finished)
+        try:
+            # shield: cancelling the wrapper would not stop the thread, only release the slot early
+            return await asyncio.wait_for(asyncio.shield(future), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.error(f"Vector search timed out after {timeout}s")
+            raise VectorSearchTimeout(f"Vector search timed out after {timeout}s")
+
+    def _dense_search(self, query: str, k: int, expr: Optional[str], timeout: float):
+        vector = self.embedding.embed_query(query)
+        rerank = DENSE_RERANK_FACTOR > 1
+        hits = self.client.search(
+            collection_name=self.collection_name,
+            data=[vector],
+            anns_field=DENSE_FIELD,
+            search_params=DENSE_SEARCH_PARAMS,
+            limit=k * DENSE_RERANK_FACTOR,
+            filter=active_only(expr),
+            output_fields=OUTPUT_FIELDS + [DENSE_FIELD] if rerank else OUTPUT_FIELDS,
+            timeout=timeout,
+            **grouping_params()
+        )[0]
+        if not rerank:
+            return hits
+        # Grouped hits are cut to k profiles after aggregation, not to k chunks here
+        return rerank_exact(vector, hits, len(hits) if MILVUS_GROUP_BY_PROFILE else k)
+
+    def _sparse_search(self, query: str, k: int, expr: Optional[str], timeout: float):
+        return self.client.search(
+            collection_name=self.collection_name,
+            data=[query],
+            anns_field=SPARSE_FIELD,
+            search_params=SPARSE_SEARCH_PARAMS,
+            limit=k,
+            filter=active_only(expr),
+            output_fields=OUTPUT_FIELDS,
+            timeout=timeout,
+            **grouping_params()
+        )[0]
+
+    def _hybrid_search(self, query: str, sparse_query: str, k: int, expr: Optional[str], ranker, timeout: float):
+        candidates = k * max(1, HYBRID_CANDIDATE_FACTOR)
+        requests = [
+            AnnSearchRequest(data=[self.embedding.embed_query(query)], anns_field=DENSE_FIELD,
+                             param=DENSE_SEARCH_PARAMS, limit=candidates, expr=active_only(expr)),
+            AnnSearchRequest(data=[sparse_query], anns_field=SPARSE_FIELD,
+                             param=SPARSE_SEARCH_PARAMS, limit=candidates, expr=active_only(expr)),
+        ]
+        return self.client.hybrid_search(
+            collection_name=self.collection_name,
+            reqs=requests,
+            ranker=ranker or build_ranker(),
+            limit=k,
+            output_fields=OUTPUT_FIELDS,
+            timeout=timeout,
+            **grouping_params()
+        )[0]
+
+    def group(self, results: List[Tuple[Document, float]], k: int) -> List[Tuple[Document, float]]:
+        return aggregate_profiles(results, k) if MILVUS_GROUP_BY_PROFILE else results
+
+    async def similarity_search_with_relevance_scores(self, query: str, k: int = 4, expr: Optional[str] = None,
+                                                      score_threshold: Optional[float] = None,
+                                                      timeout: Optional[float] = None) -> List[Tuple[Document, float]]:
+        """Dense search; scores are COSINE relevance in [0, 1], highest first"""
+        timeout = timeout or self.timeout
+        # Milvus enforces `timeout` as the search deadline; the wait allows a little more for embedding
+        hits = await self.run(self._dense_search, query, k, expr, timeout, timeout=timeout + TIMEOUT_GRACE)
+        results = self.group(hits_to_documents(hits, cosine_relevance), k)
+        if score_threshold is not None:
+            results = [(doc, score) for doc, score in results if score >= score_threshold]
+        return results
+
+    async def keyword_search(self, query: str, k: int = 4, expr: Optional[str] = None,
+                             score_threshold: Optional[float] = None,
+                             timeout: Optional[float] = None) -> List[Tuple[Document, float]]:
+        """BM25 search on the sparse field; scores are raw BM25 (unbounded), highest first"""
+        timeout = timeout or self.timeout
+        hits = await self.run(self._sparse_search, query, k, expr, timeout, timeout=timeout)
+        results = self.group(hits_to_documents(hits), k)
+        if score_threshold is not None:
+            results = [(doc, score) for doc, score in results if score >= score_threshold]
+        return results
+
+    async def hybrid_search(self, query: str, k: int = 4, expr: Optional[str] = None,
+                            sparse_query: Optional[str] = None, ranker=None,
+                            score_threshold: Optional[float] = None,
+                            timeout: Optional[float] = None) -> List[Tuple[Document, float]]:
+        """
+        Dense + BM25 search fused by `ranker` (HYBRID_RANKER by default).
+
+        `sparse_query` lets exact terms (skills, certification names) go to BM25 only; it
+        defaults to `query`. Scores are the ranker's fused scores, highest first.
+        """
+        timeout = timeout or self.timeout
+        hits = await self.run(self._hybrid_search, query, sparse_query or query, k, expr, ranker, timeout,
+                              timeout=timeout + TIMEOUT_GRACE)
+        results = self.group(hits_to_documents(hits), k)
+        if score_threshold is not None:
+            results = [(doc, score) for doc, score in results if score >= score_threshold]
+        return results
+
+    async def search(self, query: str, mode: str = "dense", **kwargs) -> List[Tuple[Document, float]]:
+        if mode == "hybrid":
+            return await self.hybrid_search(query, **kwargs)
+        kwargs.pop("sparse_query", None)
+        kwargs.pop("ranker", None)
+        if mode == "sparse":
+            return await self.keyword_search(query, **kwargs)
+        if mode == "dense":
+            return await self.similarity_search_with_relevance_scores(query, **kwargs)
+        raise ValueError(f"Unknown search mode '{mode}', expected one of {SEARCH_MODES}")
+
+    async def profile_scores(self, query: str, expr: Optional[str] = None, k: int = 100,
+                             score_threshold: Optional[float] = 0.4,
+                             timeout: Optional[float] = None) -> Dict[str, float]:
+        """
+        Relevance score per profile_id for the top-k profiles (chunk scores aggregated with
+        PROFILE_SCORE_AGGREGATION; without grouping, the best chunk of each profile)
+        """
+        results = await self.similarity_search_with_relevance_scores(
+            query, k=k, expr=expr, score_threshold=score_threshold, timeout=timeout
+        )
+        scores = {}
+        for rec, score in results:
+            profile_id = rec.metadata['profile_id']
+            scores[profile_id] = max(score, scores.get(profile_id, score))
+        return scores
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+vector_search = VectorSearchService()
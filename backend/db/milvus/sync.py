@@ -0,0 +1,368 @@
+"""
+Incremental Milvus sync: keeps profile chunks in Milvus in step with the Mongo profiles collection.
+
+    python -m db.milvus.sync
+    python -m db.milvus.sync --reconcile
+
+Tails a change stream on `profiles` (replica sets / Atlas). On a standalone Mongo, where change
+streams are unavailable, it polls instead: new profiles by `_id`, edited ones by an `updated_at`
+watermark (writers that edit profiles must set `updated_at`). Changed profiles are upserted
+(only chunks with new content are re-embedded); deleted profiles have their vectors deleted. The resume
+token / watermark is checkpointed in Mongo after each applied batch, so a restart resumes there.
+Without a checkpoint the worker starts from the current state, so run it after a full rebuild.
+
+Updates that only touch chunk metadata (deactivation, campaign reassignment, status) rewrite the
+stored chunks without re-embedding. Deactivated profiles are flagged active=false, which searches
+filter on, or deleted with MILVUS_INACTIVE_POLICY=delete.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import signal
+import sys
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Set
+
+from pymongo.errors import OperationFailure, PyMongoError
+
+from db.milvus.expr import in_list
+from db.milvus.ingest import delete_moved_chunks, update_metadata, upsert_documents
+from db.milvus.schema import MILVUS_PARTITION_KEY
+from db.mongo.config import db
+
+logger = logging.getLogger(__name__)
+
+PROFILES_COLLECTION = "profiles"
+SYNC_STATE_COLLECTION = "milvus_sync_state"
+SYNC_BATCH_SIZE = int(os.getenv("MILVUS_SYNC_BATCH_SIZE", 100))
+SYNC_FLUSH_INTERVAL = float(os.getenv("MILVUS_SYNC_FLUSH_INTERVAL", 5))
+SYNC_POLL_INTERVAL = float(os.getenv("MILVUS_SYNC_POLL_INTERVAL", 30))
+# "auto" tries a change stream and falls back to polling; "stream" or "poll" force one
+SYNC_MODE = os.getenv("MILVUS_SYNC_MODE", "auto")
+
+# Profile fields that make up chunk content; updates touching them re-chunk the profile
+CONTENT_FIELDS = {"primary_skills", "secondary_skills", "projects", "work_history", "certifications", "education"}
+# Profile fields copied to chunk metadata; updates touching only these rewrite metadata in place
+METADATA_SYNC_FIELDS = {"name", "total_experience", "status", "active", "client_id", "campaign_id"}
+# Deactivated profiles: "flag" keeps their chunks with active=false (searches filter them out),
+# "delete" removes them (reactivation re-embeds)
+INACTIVE_POLICY = os.getenv("MILVUS_INACTIVE_POLICY", "flag")
+# Mongo error code when change streams are not supported (standalone server)
+CHANGE_STREAM_UNSUPPORTED = 40573
+
+
+class MilvusSyncWorker:
+    """Applies profile changes to Milvus in batches and checkpoints progress in Mongo"""
+
+    def __init__(self, mongo_db=db, client=None, collection_name: Optional[str] = None,
+                 batch_size: int = SYNC_BATCH_SIZE, flush_interval: float = SYNC_FLUSH_INTERVAL,
+                 poll_interval: float = SYNC_POLL_INTERVAL):
+        self.db = mongo_db
+        self._client = client
+        self._collection_name = collection_name
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.poll_interval = poll_interval
+        self._stopped = asyncio.Event()
+
+    @property
+    def client(self):
+        if self._client is None:
+            from db.milvus.config import milvus_client
+            self._client = milvus_client
+        return self._client
+
+    @property
+    def collection_name(self) -> str:
+        if self._collection_name is None:
+            from db.milvus.config import collection_name
+            self._collection_name = collection_name
+        return self._collection_name
+
+    def stop(self):
+        self._stopped.set()
+
+    async def load_checkpoint(self) -> Dict:
+        return await self.db[SYNC_STATE_COLLECTION].find_one({"_id": PROFILES_COLLECTION}) or {}
+
+    async def save_checkpoint(self, **state):
+        state["checkpointed_at"] = datetime.utcnow()
+        await self.db[SYNC_STATE_COLLECTION].update_one({"_id": PROFILES_COLLECTION}, {"$set": state}, upsert=True)
+
+    async def apply(self, changed: List[Dict], deleted: Set[str], metadata: Optional[Dict[str, Dict]] = None):
+        """
+        Upsert the chunks of `changed` profiles, drop those of `deleted` profile_ids and rewrite the
+        chunk metadata of `metadata` ({profile_id: {field: value}}) without re-embedding
+        """
+        from db.milvus.config import create_dataset
+
+        changed = [profile for profile in changed if profile.get("profile_id")]
+        metadata = dict(metadata or {})
+        if INACTIVE_POLICY == "delete":
+            deleted = set(deleted)
+            deleted.update(p["profile_id"] for p in changed if p.get("active") is False)
+            deleted.update(pid for pid, fields in metadata.items() if fields.get("active") is False)
+            changed = [p for p in changed if p["profile_id"] not in deleted]
+            metadata = {pid: fields for pid, fields in metadata.items() if pid not in deleted}
+        if metadata:
+            rewritten = await asyncio.to_thread(update_metadata, self.client, self.collection_name, metadata)
+            logger.info(f"Updated metadata of {len(metadata)} profiles ({rewritten} chunks)")
+        if deleted:
+            await asyncio.to_thread(self.client.delete, collection_name=self.collection_name,
+                                    filter=in_list("profile_id", sorted(deleted)))
+        written = 0
+        if changed:
+            # Polled changes carry no pre-image, so a campaign reassignment can't be told apart from a
+            # content edit: drop chunks left under another partition key first (as update_metadata does)
+            moved = await asyncio.to_thread(delete_moved_chunks, self.client, self.collection_name,
+                                            {p["profile_id"]: p.get(MILVUS_PARTITION_KEY) for p in changed})
+            if moved:
+                logger.info(f"Deleted {moved} chunks of reassigned profiles from their previous partition")
+            # Upserts by deterministic chunk id: unchanged chunks keep their embedding, replaced ones are dropped
+            dataset = await create_dataset([{k: v for k, v in p.items() if k != "_id"} for p in changed])
+            written = await upsert_documents(dataset, client=self.client, collection_name=self.collection_name)
+        if changed or deleted:
+            logger.info(f"Synced {len(changed)} changed and {len(deleted)} deleted profiles ({written} chunks)")
+
+    # ---- change stream ----
+
+    @staticmethod
+    def classify(change: Dict) -> Optional[str]:
+        """"content" when chunks must be rebuilt, "metadata" when only chunk metadata changed, else None"""
+        if change["operationType"] != "update":
+            return "content"
+        description = change.get("updateDescription") or {}
+        touched = {field.split(".")[0] for field in
+                   set(description.get("updatedFields") or {}) | set(description.get("removedFields") or [])}
+        if touched & CONTENT_FIELDS:
+            return "content"
+        if "active" in touched and INACTIVE_POLICY == "delete":
+            # A reactivated profile has no chunks left to update under the delete policy
+            return "content"
+        if touched & METADATA_SYNC_FIELDS:
+            return "metadata"
+        return None
+
+    async def run_change_stream(self, resume_token=None):
+        collection = self.db[PROFILES_COLLECTION]
+        pipeline = [{"$match": {"operationType": {"$in": ["insert", "update", "replace", "delete"]}}}]
+        async with collection.watch(pipeline, full_document="updateLookup",
+                                    full_document_before_change="whenAvailable",
+                                    resume_after=resume_token) as stream:
+            logger.info("Tailing profile change stream")
+            changed: Dict[str, Dict] = {}
+            metadata: Dict[str, Dict] = {}
+            deleted: Set[str] = set()
+            last_token, last_flush = resume_token, time.monotonic()
+            while not self._stopped.is_set():
+                change = await stream.try_next()
+                if change is not None:
+                    last_token = change["_id"]
+                    if change["operationType"] == "delete":
+                        before = change.get("fullDocumentBeforeChange") or {}
+                        if before.get("profile_id"):
+                            deleted.add(before["profile_id"])
+                            changed.pop(before["profile_id"], None)
+                            metadata.pop(before["profile_id"], None)
+                        else:
+                            logger.warning(f"Profile {change['documentKey']['_id']} deleted without a pre-image; "
+                                           f"enable changeStreamPreAndPostImages on profiles to drop its vectors")
+                    elif change.get("fullDocument"):
+                        profile = change["fullDocument"]
+                        profile_id = profile.get("profile_id")
+                        kind = self.classify(change)
+                        if kind == "content" or profile_id in changed:
+                            changed[profile_id] = profile
+                            metadata.pop(profile_id, None)
+                        elif kind == "metadata":
+                            metadata[profile_id] = {field: profile.get(field) for field in METADATA_SYNC_FIELDS}
+                        if kind:
+                            deleted.discard(profile_id)
+
+                pending = len(changed) + len(metadata) + len(deleted)
+                due = time.monotonic() - last_flush >= self.flush_interval
+                if pending >= self.batch_size or (due and last_token != resume_token):
+                    await self.apply(list(changed.values()), deleted, metadata)
+                    await self.save_checkpoint(resume_token=last_token, mode="stream")
+                    changed, metadata, deleted = {}, {}, set()
+                    resume_token, last_flush = last_token, time.monotonic()
+                elif change is None:
+                    await asyncio.sleep(0.5)
+
+    # ---- reconciliation ----
+
+    def stored_profiles(self) -> Dict[str, Optional[bool]]:
+        """profile_id -> active flag of every profile with chunks in Milvus"""
+        iterator = self.client.query_iterator(collection_name=self.collection_name, batch_size=5000, filter="",
+                                              output_fields=["profile_id", "active"])
+        stored = {}
+        try:
+            while True:
+                batch = iterator.next()
+                if not batch:
+                    break
+                for row in batch:
+                    stored[row["profile_id"]] = row.get("active")
+        finally:
+            iterator.close()
+        return stored
+
+    async def reconcile(self) -> Dict:
+        """
+        One-off pass that drops chunks of profiles missing from Mongo and fixes their `active` flag.
+        Covers deletes the polling mode can't see and changes made while the worker was down.
+        """
+        stored = await asyncio.to_thread(self.stored_profiles)
+        profile_ids = sorted(pid for pid in stored if pid)
+        deleted, metadata = set(), {}
+        for start in range(0, len(profile_ids), 1000):
+            batch = profile_ids[start:start + 1000]
+            found = {}
+            async for profile in self.db[PROFILES_COLLECTION].find({"profile_id": {"$in": batch}},
+                                                                    {"_id": 0, "profile_id": 1, "active": 1}):
+                found[profile["profile_id"]] = profile.get("active", True) is not False
+            deleted.update(pid for pid in batch if pid not in found)
+            # Under the delete policy apply() turns every inactive entry into a delete
+            metadata.update({pid: {"active": active} for pid, active in found.items()
+                             if stored[pid] != active or (not active and INACTIVE_POLICY == "delete")})
+        await self.apply([], deleted, metadata)
+        result = {"stored_profiles": len(profile_ids), "deleted": len(deleted), "active_fixed": len(metadata)}
+        logger.info(f"Reconciled Milvus with Mongo: {result}")
+        return result
+
+    # ---- polling fallback ----
+
+    async def poll_once(self, state: Dict) -> Dict:
+        """
+        Two ordered passes, each checkpointed per batch in its own sort order so a crash never
+        skips a change: new profiles by `_id` (advances last_id), then edited profiles by
+        (`updated_at`, `_id`) (advances the watermark). Checkpointing the watermark out of
+        `updated_at` order would let a later edit's watermark hide an earlier, unapplied one.
+        """
+        state = dict(state)
+        profiles = self.db[PROFILES_COLLECTION]
+
+        if state.get("last_id") is not None:
+            query = {"_id": {"$gt": state["last_id"]}}
+            state = await self.poll_pass(profiles.find(query).sort("_id", 1), state, self.advance_last_id)
+
+        if state.get("watermark") is not None:
+            watermark_ids = set(state.get("watermark_ids") or [])
+            last_id = state.get("last_id")
+
+            def pending(profile: Dict) -> bool:
+                # New profiles were applied by the first pass; ties at the watermark already were
+                if last_id is not None and profile["_id"] > last_id:
+                    return False
+                return not (profile.get("updated_at") == state["watermark"]
+                            and profile.get("profile_id") in watermark_ids)
+
+            cursor = profiles.find({"updated_at": {"$gte": state["watermark"]}}).sort([("updated_at", 1), ("_id", 1)])
+            state = await self.poll_pass(cursor, state, self.advance_watermark, pending)
+        return state
+
+    async def poll_pass(self, cursor, state: Dict, advance, pending=None) -> Dict:
+        """Apply the cursor's profiles in batches, checkpointing `advance`d state after each one"""
+        batch = []
+        async for profile in cursor:
+            batch.append(profile)
+            if len(batch) >= self.batch_size:
+                state = await self.apply_batch(batch, state, advance, pending)
+                batch = []
+        if batch:
+            state = await self.apply_batch(batch, state, advance, pending)
+        return state
+
+    async def apply_batch(self, batch: List[Dict], state: Dict, advance, pending=None) -> Dict:
+        changed = [profile for profile in batch if pending is None or pending(profile)]
+        if changed:
+            await self.apply(changed, set())
+        # Skipped profiles still move the checkpoint past them
+        state = advance(state, batch)
+        await self.save_checkpoint(**state, mode="poll")
+        return state
+
+    @staticmethod
+    def advance_last_id(state: Dict, profiles: List[Dict]) -> Dict:
+        last_id = state.get("last_id")
+        for profile in profiles:
+            if last_id is None or profile["_id"] > last_id:
+                last_id = profile["_id"]
+        return {**state, "last_id": last_id}
+
+    @staticmethod
+    def advance_watermark(state: Dict, profiles: List[Dict]) -> Dict:
+        watermark = state.get("watermark")
+        watermark_ids = set(state.get("watermark_ids") or [])
+        for profile in profiles:
+            updated_at = profile.get("updated_at")
+            if not isinstance(updated_at, datetime):
+                continue
+            if watermark is None or updated_at > watermark:
+                watermark, watermark_ids = updated_at, {profile.get("profile_id")}
+            elif updated_at == watermark:
+                watermark_ids.add(profile.get("profile_id"))
+        return {**state, "watermark": watermark, "watermark_ids": sorted(filter(None, watermark_ids))}
+
+    async def run_polling(self, state: Dict):
+        logger.info(f"Polling profiles every {self.poll_interval}s")
+        state = {key: state.get(key) for key in ("last_id", "watermark", "watermark_ids")}
+        if state["last_id"] is None:
+            # No checkpoint: assume the collection is current (initialize_milvus.py) and start from now
+            latest = await self.db[PROFILES_COLLECTION].find_one({}, {"_id": 1}, sort=[("_id", -1)])
+            state = {"last_id": latest["_id"] if latest else None, "watermark": datetime.utcnow(), "watermark_ids": []}
+            await self.save_checkpoint(**state, mode="poll")
+        while not self._stopped.is_set():
+            state = await self.poll_once(state)
+            try:
+                await asyncio.wait_for(self._stopped.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def run(self, mode: str = SYNC_MODE):
+        state = await self.load_checkpoint()
+        if mode in ("auto", "stream"):
+            try:
+                await self.run_change_stream(state.get("resume_token") if state.get("mode") == "stream" else None)
+                return
+            except OperationFailure as err:
+                if mode == "stream" or err.code != CHANGE_STREAM_UNSUPPORTED:
+                    raise
+                logger.warning("Change streams are not supported by this Mongo deployment; falling back to polling")
+        await self.run_polling(state if state.get("mode") == "poll" else {})
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Keep Milvus profile chunks in sync with Mongo")
+    parser.add_argument("--reconcile", action="store_true",
+                        help="drop chunks of deleted profiles and fix active flags once, then exit")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    logging.basicConfig(level=logging.INFO)
+    args = parse_args(argv)
+    worker = MilvusSyncWorker()
+
+    if args.reconcile:
+        print(asyncio.run(worker.reconcile()))
+        return 0
+
+    async def runner():
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, worker.stop)
+        await worker.run()
+
+    try:
+        asyncio.run(runner())
+    except PyMongoError as err:
+        logger.error(f"Milvus sync stopped: {err}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,225 @@
+"""
+Blue/green rebuilds of the chunk collection behind a Milvus alias.
+
+Readers and writers use MILVUS_COLLECTION, which is an alias for the live versioned collection
+(<alias>_v<timestamp>). A rebuild fills a fresh version from Mongo, builds and loads its index,
+validates it against Mongo and only then switches the alias, so searches keep hitting the old
+version until the new one is complete. Previous versions are kept for rollback.
+
+    python -m db.milvus.versions rebuild
+    python -m db.milvus.versions list
+    python -m db.milvus.versions rollback [--to <collection>]
+    python -m db.milvus.versions prune --keep 2
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from bson import ObjectId
+
+from db.milvus.ingest import upsert_documents
+from db.milvus.schema import alias_target, ensure_collection
+
+logger = logging.getLogger(__name__)
+
+MILVUS_KEEP_VERSIONS = int(os.getenv("MILVUS_KEEP_VERSIONS", 3))
+REBUILD_BATCH_SIZE = int(os.getenv("MILVUS_REBUILD_BATCH_SIZE", 500))
+# Share of Mongo profiles allowed to be missing from a new version (profiles without content)
+REBUILD_TOLERANCE = float(os.getenv("MILVUS_REBUILD_TOLERANCE", 0.01))
+LEGACY_VERSION = "v0"
+
+
+class RebuildValidationError(Exception):
+    """Raised when a rebuilt version does not match Mongo; the alias is left unchanged"""
+
+
+def version_prefix(alias: str) -> str:
+    return f"{alias}_v"
+
+
+def new_version_name(alias: str) -> str:
+    return f"{version_prefix(alias)}{datetime.utcnow().strftime('%Y%m%d%H%M%S')}"
+
+
+def list_versions(client, alias: str) -> List[str]:
+    """Versioned collections of `alias`, oldest first"""
+    prefix = version_prefix(alias)
+    return sorted(name for name in client.list_collections() if name.startswith(prefix))
+
+
+def switch_alias(client, alias: str, collection_name: str):
+    """Point `alias` at `collection_name` (atomic on the Milvus side)"""
+    if alias_target(client, alias) is None:
+        client.create_alias(collection_name=collection_name, alias=alias)
+    else:
+        client.alter_alias(collection_name=collection_name, alias=alias)
+    logger.info(f"Alias {alias} now points to {collection_name}")
+
+
+def adopt_legacy_collection(client, alias: str) -> Optional[str]:
+    """
+    Turn a plain collection named `alias` into version v0 behind an alias of that name.
+    An alias can't share a name with a collection, so this is a rename followed by an alias
+    create; searches fail only for the instant in between. Runs once per deployment.
+    """
+    if alias_target(client, alias) is not None or not client.has_collection(alias):
+        return None
+    legacy = f"{alias}_{LEGACY_VERSION}"
+    client.rename_collection(alias, legacy)
+    switch_alias(client, alias, legacy)
+    logger.info(f"Adopted collection {alias} as version {legacy}")
+    return legacy
+
+
+def row_count(client, collection_name: str) -> int:
+    return client.query(collection_name=collection_name, filter="", output_fields=["count(*)"],
+                        consistency_level="Strong")[0]["count(*)"]
+
+
+async def ingest_profiles(client, collection_name: str, profiles_db, query: Dict,
+                          build_dataset: Callable[[List[Dict]], Awaitable[List]],
+                          batch_size: int = REBUILD_BATCH_SIZE) -> Dict:
+    """Chunk, embed and insert the profiles matching `query`; returns inserted chunk and profile counts"""
+    chunks, profile_ids, batch = 0, set(), []
+
+    async def flush():
+        nonlocal chunks
+        dataset = await build_dataset(batch)
+        profile_ids.update(doc.metadata.get("profile_id") for doc in dataset)
+        chunks += await upsert_documents(dataset, client=client, collection_name=collection_name)
+
+    async for profile in profiles_db["profiles"].find(query, {"_id": 0}):
+        batch.append(profile)
+        if len(batch) >= batch_size:
+            await flush()
+            batch = []
+    if batch:
+        await flush()
+    return {"chunks": chunks, "profiles": len(profile_ids - {None, ""})}
+
+
+async def catch_up(client, collection_name: str, profiles_db, build_dataset: Callable[[List[Dict]], Awaitable[List]],
+                   since: datetime) -> Dict:
+    """Upsert profiles inserted or updated since `since` (re-upserting unchanged ones is harmless)"""
+    query = {"$or": [{"_id": {"$gte": ObjectId.from_datetime(since)}}, {"updated_at": {"$gte": since}}]}
+    late = await ingest_profiles(client, collection_name, profiles_db, query, build_dataset)
+    if late["chunks"]:
+        logger.info(f"Caught up {late['profiles']} profiles changed since {since.isoformat()}")
+    return late
+
+
+async def rebuild(client, alias: str, profiles_db, build_dataset: Callable[[List[Dict]], Awaitable[List]],
+                  tolerance: float = REBUILD_TOLERANCE, keep: int = MILVUS_KEEP_VERSIONS) -> Dict:
+    """
+    Build a new version from Mongo, validate it and switch `alias` to it.
+
+    Changes made during the rebuild are caught up before the switch and again after it, and a
+    reconcile pass then removes profiles deleted (or deactivated) in Mongo in the meantime.
+    """
+    adopt_legacy_collection(client, alias)
+    target = new_version_name(alias)
+    started_at = datetime.utcnow()
+    start = time.perf_counter()
+
+    # Created and loaded up front: the index is built as segments are flushed during ingestion
+    ensure_collection(client, target)
+    expected = await profiles_db["profiles"].count_documents({})
+    stats = await ingest_profiles(client, target, profiles_db, {}, build_dataset)
+
+    # Profiles added or edited while the rebuild ran were only written to the old version;
+    # upserting them replaces whatever the first pass saw of them
+    caught_up_at = datetime.utcnow()
+    await catch_up(client, target, profiles_db, build_dataset, started_at)
+
+    client.flush(target)
+    rows = row_count(client, target)
+    if rows == 0 or rows < stats["chunks"] * (1 - tolerance):
+        raise RebuildValidationError(f"{target} has {rows} rows, {stats['chunks']} were written")
+    if stats["profiles"] < expected * (1 - tolerance):
+        raise RebuildValidationError(f"{target} has {stats['profiles']} profiles, Mongo has {expected}")
+
+    previous = alias_target(client, alias)
+    switch_alias(client, alias, target)
+    # Writes made between the catch-up and the switch still went to the previous version: replay
+    # them now that writers hit the new one, and drop profiles deleted or deactivated meanwhile
+    await catch_up(client, target, profiles_db, build_dataset, caught_up_at)
+    from db.milvus.sync import MilvusSyncWorker
+    await MilvusSyncWorker(mongo_db=profiles_db, client=client, collection_name=target).reconcile()
+    pruned = prune_versions(client, alias, keep)
+    result = {"alias": alias, "collection": target, "previous": previous, "rows": rows,
+              "profiles": stats["profiles"], "mongo_profiles": expected, "pruned": pruned,
+              "duration_s": round(time.perf_counter() - start, 1)}
+    logger.info(f"Rebuild complete: {result}")
+    return result
+
+
+def rollback(client, alias: str, to: Optional[str] = None) -> str:
+    """Point `alias` back at `to`, or at the version before the current one"""
+    current = alias_target(client, alias)
+    versions = list_versions(client, alias)
+    if to is None:
+        older = [name for name in versions if current is None or name < current]
+        if not older:
+            raise ValueError(f"No version of {alias} older than {current}")
+        to = older[-1]
+    elif to not in versions:
+        raise ValueError(f"{to} is not a version of {alias}")
+    client.load_collection(to)
+    switch_alias(client, alias, to)
+    return to
+
+
+def prune_versions(client, alias: str, keep: int = MILVUS_KEEP_VERSIONS) -> List[str]:
+    """Drop the oldest versions beyond `keep`, never the one the alias points to"""
+    current = alias_target(client, alias)
+    versions = [name for name in list_versions(client, alias) if name != current]
+    stale = versions[:max(0, len(versions) - max(0, keep - 1))]
+    for name in stale:
+        client.drop_collection(name)
+        logger.info(f"Dropped old version {name}")
+    return stale
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Blue/green versions of the Milvus chunk collection")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("rebuild", help="build a new version from Mongo and switch the alias to it")
+    sub.add_parser("list", help="list versions and the one the alias points to")
+    rollback_parser = sub.add_parser("rollback", help="switch the alias back to an older version")
+    rollback_parser.add_argument("--to", help="version to switch to (defaults to the previous one)")
+    prune_parser = sub.add_parser("prune", help="drop old versions")
+    prune_parser.add_argument("--keep", type=int, default=MILVUS_KEEP_VERSIONS,
+                              help="versions to keep, including the live one")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    logging.basicConfig(level=logging.INFO)
+    args = parse_args(argv)
+
+    from db.milvus.config import collection_name as alias, create_dataset, milvus_client as client
+    if args.command == "rebuild":
+        from db.mongo.config import db
+        try:
+            print(asyncio.run(rebuild(client, alias, db, create_dataset)))
+        except RebuildValidationError as err:
+            print(f"Rebuild rejected, alias unchanged: {err}", file=sys.stderr)
+            return 1
+    elif args.command == "list":
+        current = alias_target(client, alias)
+        for name in list_versions(client, alias):
+            print(f"{'*' if name == current else ' '} {name}")
+    elif args.command == "rollback":
+        print(f"{alias} -> {rollback(client, alias, args.to)}")
+    elif args.command == "prune":
+        print(prune_versions(client, alias, args.keep))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
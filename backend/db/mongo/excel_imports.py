@@ -0,0 +1,60 @@
+import argparse
+import asyncio
+import logging
+import os
+import sys
+from typing import Dict
+
+from pymongo import UpdateOne
+
+from utils.helper import location_keys, parse_notice_period_days
+
+logger = logging.getLogger(__name__)
+
+EXCEL_FILTER_BACKFILL = os.getenv("EXCEL_FILTER_BACKFILL", "true").lower() in ("1", "true", "yes")
+WRITE_BATCH_SIZE = 1000
+
+# Rows imported before the notice/location match filters existed lack the normalized fields
+MISSING_FILTER_FIELDS = {"$or": [{"notice_period_days": {"$exists": False}}, {"location_keys": {"$exists": False}}]}
+
+
+def excel_filter_fields(record: Dict) -> Dict:
+    """Normalized fields the notice/location match filters query (see utils/match_filters.py)"""
+    return {
+        "notice_period_days": parse_notice_period_days(record.get("notice")),
+        "location_keys": location_keys(record.get("current_location"), record.get("preferred_location")),
+    }
+
+
+async def backfill_excel_filter_fields(db=None, batch_size: int = WRITE_BATCH_SIZE) -> int:
+    """Compute notice_period_days and location_keys for stored rows missing them; returns rows updated"""
+    if db is None:
+        from db.mongo.config import db
+    collection = db["excel_imports"]
+    projection = {"_id": 1, "notice": 1, "current_location": 1, "preferred_location": 1}
+    operations, updated = [], 0
+    async for record in collection.find(MISSING_FILTER_FIELDS, projection):
+        operations.append(UpdateOne({"_id": record["_id"]}, {"$set": excel_filter_fields(record)}))
+        if len(operations) >= batch_size:
+            await collection.bulk_write(operations, ordered=False)
+            updated += len(operations)
+            operations = []
+    if operations:
+        await collection.bulk_write(operations, ordered=False)
+        updated += len(operations)
+    if updated:
+        logger.info(f"Backfilled notice/location filter fields of {updated} excel_imports rows")
+    return updated
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Backfill the notice/location filter fields of excel_imports rows")
+    parser.add_argument("--batch-size", type=int, default=WRITE_BATCH_SIZE)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+    print(asyncio.run(backfill_excel_filter_fields(batch_size=args.batch_size)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
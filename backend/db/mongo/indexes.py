@@ -0,0 +1,43 @@
+import logging
+
+from pymongo import ASCENDING, DESCENDING
+
+from db.mongo.config import db
+
+logger = logging.getLogger(__name__)
+
+# collection -> [(keys, options)]
+INDEXES = {
+    "match_scores": [
+        ([("campaign_id", ASCENDING), ("jd_hash", ASCENDING), ("profile_id", ASCENDING)],
+         {"unique": True, "name": "match_scores_key"}),
+        ([("campaign_id", ASCENDING), ("jd_hash", ASCENDING), ("aggregated_score", DESCENDING)],
+         {"name": "match_scores_rank"}),
+    ],
+    "parsed_jds": [
+        ([("text_hash", ASCENDING)], {"unique": True, "name": "parsed_jds_text_hash"}),
+        ([("jd_hash", ASCENDING)], {"name": "parsed_jds_jd_hash"}),
+    ],
+    "profiles": [
+        ([("campaign_id", ASCENDING), ("active", ASCENDING), ("total_experience", ASCENDING)],
+         {"name": "profiles_campaign_active_experience"}),
+        ([("campaign_id", ASCENDING), ("email", ASCENDING)], {"name": "profiles_campaign_email"}),
+        ([("campaign_id", ASCENDING), ("file_hash", ASCENDING)], {"name": "profiles_campaign_file_hash"}),
+        ([("profile_id", ASCENDING)], {"name": "profiles_profile_id"}),
+    ],
+    "excel_imports": [
+        ([("campaign_id", ASCENDING), ("notice_period_days", ASCENDING)], {"name": "excel_imports_notice"}),
+        ([("campaign_id", ASCENDING), ("location_keys", ASCENDING)], {"name": "excel_imports_location"}),
+    ],
+}
+
+
+async def ensure_indexes():
+    """Create the indexes the matching endpoints rely on (no-op for existing indexes)"""
+    for collection_name, indexes in INDEXES.items():
+        for keys, options in indexes:
+            try:
+                await db[collection_name].create_index(keys, **options)
+            except Exception as err:
+                logger.error(f"Failed to create index {options.get('name')} on {collection_name}: {err}")
+    logger.info("Mongo indexes ensured")
@@ -0,0 +1,95 @@
+import logging
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from pymongo import UpdateOne
+
+logger = logging.getLogger(__name__)
+
+# Namespace of deterministic profile ids (uuid5 over campaign and email or file hash)
+PROFILE_NAMESPACE = uuid.UUID("6f1c8a52-3d4e-4b7a-9c0e-5a2f7d8b1e93")
+
+WRITE_BATCH_SIZE = 1000
+
+
+def normalize_email(email) -> str:
+    return email.strip().lower() if isinstance(email, str) else ""
+
+
+def profile_key(campaign_id: Optional[str], email: Optional[str], file_hash: Optional[str]) -> str:
+    """
+    Deterministic profile_id: the same candidate (by email, else by resume file) uploaded to the
+    same campaign always gets the same id, so its Milvus chunk ids are stable too.
+    """
+    identity = f"email:{normalize_email(email)}" if normalize_email(email) else f"file:{file_hash or ''}"
+    return str(uuid.uuid5(PROFILE_NAMESPACE, f"{campaign_id or ''}\x1f{identity}"))
+
+
+async def existing_profile_ids(collection, campaign_id: Optional[str], profiles: List[Dict]) -> Dict[str, str]:
+    """profile_id of stored profiles keyed by "email:..." / "file:..." for the campaign"""
+    emails = sorted({normalize_email(p.get("email")) for p in profiles} - {""})
+    hashes = sorted({p.get("file_hash") for p in profiles if p.get("file_hash")})
+    clauses = []
+    if emails:
+        clauses.append({"email": {"$in": emails}})
+    if hashes:
+        clauses.append({"file_hash": {"$in": hashes}})
+    if not clauses:
+        return {}
+
+    found = {}
+    cursor = collection.find(
+        {"campaign_id": campaign_id, "$or": clauses},
+        {"_id": 0, "profile_id": 1, "email": 1, "file_hash": 1}
+    ).sort("processed_at", 1)
+    async for rec in cursor:
+        if not rec.get("profile_id"):
+            continue
+        if normalize_email(rec.get("email")):
+            found.setdefault(f"email:{normalize_email(rec['email'])}", rec["profile_id"])
+        if rec.get("file_hash"):
+            found.setdefault(f"file:{rec['file_hash']}", rec["profile_id"])
+    return found
+
+
+async def save_profiles(collection, profiles: List[Dict]) -> Dict[str, str]:
+    """
+    Insert new profiles and overwrite re-uploaded ones in place.
+
+    A profile matching a stored one of its campaign (same email, else same resume file) takes
+    over that profile_id, so re-uploading a resume updates the profile and its vectors instead
+    of adding a duplicate; otherwise it gets a deterministic profile_key. Every write stamps
+    `updated_at`, which the match-score store and the Milvus sync worker use to detect edits.
+    `profile_id` is set on the dicts in place. Returns {profile_id: Mongo _id}.
+    """
+    if not profiles:
+        return {}
+    now = datetime.now(timezone.utc)
+    existing = {}
+    for campaign_id in {p.get("campaign_id") for p in profiles}:
+        batch = [p for p in profiles if p.get("campaign_id") == campaign_id]
+        existing[campaign_id] = await existing_profile_ids(collection, campaign_id, batch)
+
+    operations = []
+    for profile in profiles:
+        profile.pop("_id", None)
+        stored = existing[profile.get("campaign_id")]
+        email = normalize_email(profile.get("email"))
+        profile["profile_id"] = (
+            (email and stored.get(f"email:{email}"))
+            or stored.get(f"file:{profile.get('file_hash')}")
+            or profile_key(profile.get("campaign_id"), email, profile.get("file_hash"))
+        )
+        profile["updated_at"] = now
+        operations.append(UpdateOne({"profile_id": profile["profile_id"]}, {"$set": profile}, upsert=True))
+
+    for i in range(0, len(operations), WRITE_BATCH_SIZE):
+        await collection.bulk_write(operations[i:i + WRITE_BATCH_SIZE], ordered=False)
+
+    ids = {}
+    async for rec in collection.find({"profile_id": {"$in": [p["profile_id"] for p in profiles]}},
+                                     {"_id": 1, "profile_id": 1}):
+        ids[rec["profile_id"]] = str(rec["_id"])
+    logger.info(f"Saved {len(profiles)} profiles as {len(ids)} distinct profile ids")
+    return ids
@@ -652,9 +652,22 @@ async def create_bulk_campaigns(files: List[UploadFile] = File(...), client_id:
         logger.error(f"Server error in create_bulk_campaigns: {str(e)}")
         return JSONResponse({"error": f"Server error: {str(e)}"}, status_code=500)
 
+@app.on_event("startup")
+async def startup_event():
+    await ensure_indexes()
+    if EXCEL_FILTER_BACKFILL:
+        # Rows imported before the notice/location filters existed would never match them
+        app.state.excel_backfill = asyncio.create_task(backfill_excel_filter_fields())
+    if SKILL_SOFT_MATCH and SKILL_EMBEDDING_BACKFILL:
+        # Profiles ingested before soft matching was enabled have no skill rows yet
+        app.state.skill_backfill = asyncio.create_task(backfill_skill_embeddings())
+
+
 @app.on_event("shutdown")
 def shutdown_event():
     logger.info("Shutting down application and cleaning up resources")
+    scoring_executor.shutdown()
+    vector_search.shutdown()
     
 
 #to update the talent aquisation team
@@ -1481,17 +1494,32 @@ from pydantic import BaseModel
 import uvicorn
 from pathlib import Path
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
+from fastapi.encoders import jsonable_encoder
 
 from dotenv import load_dotenv
 from fastapi import Depends, FastAPI, File, Form, HTTPException, Request, UploadFile, BackgroundTasks, Query, status
-from db.milvus.config import create_dataset, process_skills, vector_store
+from db.milvus.config import create_dataset, process_skills
+from db.milvus.expr import FilterBuilder
+from db.milvus.ingest import upsert_documents
+from db.milvus.search import SEARCH_MODES, VectorSearchTimeout, vector_search
 from resume_processor import Resume
 from utils.chatgpt import run_chatgpt, emb_text
 from db.mongo.config import db as mongo_db
+from db.mongo.profiles import save_profiles
 from utils.parser import DocumentParser
 from utils.helper import compute_duration
-from process import AggregatedScore, GenericSkillMatcher, JDProcessor, JobDescription, MatchingResponse, ResumeProcessor, SkillMatchDetails, SkillPriority, create_skill_matcher, get_skill_match_details, process_all_files, process_file
+from process import AggregatedScore, BatchMatchingResponse, ScoreExplanation, CandidateBestFit, GenericSkillMatcher, JDMatchResult, JDProcessor, JobDescription, MatchingResponse, ResumeProcessor, SkillMatchDetails, SkillPriority, create_skill_matcher, get_skill_match_details, process_all_files, process_file
+from utils.scoring import SCORING_PROJECTION, best_fit_rows, explain_resume, score_pairs, rank_matches, scoring_executor
+from utils.skill_vocabulary import build_skill_fingerprint, get_skill_vocabulary
+from utils.skill_embeddings import (SKILL_EMBEDDING_BACKFILL, SKILL_EMBEDDING_TIMEOUT, SKILL_SOFT_MATCH,
+                                    backfill_skill_embeddings, index_skill_embeddings, iter_record_skills,
+                                    skill_embedding_table)
+from utils.match_filters import MatchFilters, build_profile_filter
+from utils.search_cache import decode_cursor, encode_cursor, search_cache, search_cache_key
+from utils.match_store import PROFILE_VERSION_PROJECTION, SCORING_VERSION, match_store, profile_version
+from db.mongo.indexes import ensure_indexes
+from db.mongo.excel_imports import EXCEL_FILTER_BACKFILL, backfill_excel_filter_fields, excel_filter_fields
 from utils.prompt_templates.chunking_template import ChunkingPromptTemplate
 from utils.prompt_templates.job_description_template import JobDescriptionTemplate
 from utils.prompt_templates.search_preprocessing_template import SearchProcessTemplate
@@ -1505,6 +1533,9 @@ os.environ['HUGGINGFACE_HUB_DISABLE_SYMLINKS'] = '1'
 SERVER_TIMEOUT = int(os.getenv("SERVER_TIMEOUT", 10 * 60 * 1000))
 REQUEST_TIMEOUT = int(os.getenv("REQUEST_TIMEOUT", 10 * 60 * 1000)) 
 
+# Profile ids per Milvus search when scoring an explicit set of profiles
+VECTOR_SCORE_BATCH_SIZE = int(os.getenv("VECTOR_SCORE_BATCH_SIZE", 500))
+
 CURRENT_DIR = os.getcwd().replace("\\", "/")
 log_path = os.path.join(CURRENT_DIR, "logs")
 print("log path:", log_path)
@@ -1544,6 +1575,8 @@ def ping():
 
 
 processor = Resume()
+skill_vocabulary = get_skill_vocabulary()  # compiled once at startup
+
 @app.post("/upload-resume/{campaign_id}")
 async def upload_resumes(
     files: List[UploadFile] = File(...),
@@ -1650,9 +1683,10 @@ async def upload_resumes(
             )
         
         dataset = await create_dataset(result['stats']['success_data'])  # Use provided create_dataset
-        insertion = vector_store.add_documents(dataset, partition=campaign_id)  # Milvus insertion
+        insertion = await upsert_documents(dataset)  # Milvus insertion
         if insertion:
             logger.info("Inserted data to Milvus")
+        search_cache.invalidate_documents(dataset, client_id=client_id)
 
         # Convert datetime and ObjectId objects to strings in the result
         for profile in result["stats"]["parsed_content"].values():
@@ -1725,15 +1759,22 @@ async def process_resumes_background(file_paths: List[Tuple[bytes: str]], campai
                     rec['campaign_id'] = campaign_id
 
                 logger.info("inserting profiles in database...")
-                inserted = await mongo_db['profiles'].insert_many(chunked)
-                logger.info(f"Successfully inserted {len(inserted.inserted_ids)} profiles into database")
+                # Re-uploaded resumes overwrite their profile (save_profiles assigns profile_id)
+                inserted = await save_profiles(mongo_db['profiles'], chunked)
+                logger.info(f"Successfully saved {len(inserted)} profiles into database")
+                await index_skill_embeddings(chunked)
 
                 logger.info("Inseting profiles into Milvus database...")
                 df = pd.DataFrame(chunked)
                 dataset = await create_dataset(chunked)
-                insertion = vector_store.add_documents(dataset, partition_key_field=campaign_id)
+                insertion = await upsert_documents(dataset)
                 if insertion:
                     logger.info("Successfully inserted data into milvus")
+                # Chunks of this path carry no client_id, so invalidate the campaign's client
+                campaign = await asyncio.to_thread(
+                    campaign_tracker_collection.find_one, {"_id": campaign_id}, {"client_id": 1}
+                )
+                search_cache.invalidate_documents(dataset, client_id=(campaign or {}).get("client_id"))
             except Exception as err:
                 exc_type, exc_obj, exc_tb = sys.exc_info()
                 fname = os.path.split(exc_tb.tb_frame.f_code.co_filename)[1]
@@ -1863,9 +1904,10 @@ async def upload_resumes(
         
         
         dataset = await create_dataset(result['stats']['success_data'])
-        insertion = vector_store.add_documents(dataset, partition=campaign_id)
+        insertion = await upsert_documents(dataset)
         if insertion:
             logger.info("Inserted data to Milvus")
+        search_cache.invalidate_documents(dataset, client_id=client_id)
 
         # Convert datetime and ObjectId objects to strings in the result
         for profile in result["stats"]["parsed_content"].values():
@@ -2284,8 +2326,10 @@ async def upload_jd(
             jd = json.loads(jd.replace("```", '').lstrip("python\n"))
             logger.info("Contents extracted from job description")
             jd.update({"job_description": jd_text, "campaign_id": str(uuid4())})
+            jd['skill_fingerprint'] = build_skill_fingerprint(jd)
             inserted = await mongo_db['job'].insert_one(jd)
             logger.info("jd info inserted in database")
+            await index_skill_embeddings([jd])
             return JSONResponse(content={"message":"Successfully uploaded Job Desciption"}, status_code=200)
         logger.info("No job description found")
         return JSONResponse(content={"message": "No job description found!"}, status_code=200)
@@ -2295,14 +2339,104 @@ async def upload_jd(
         return JSONResponse(content={"message": "Error processing Job Description"}, status_code=500)
 
 
+REQUIRED_JD_FIELDS = ['job_title', 'primary_skills', 'secondary_skills']
+
+
+async def parse_job_description(jd_text: str) -> Dict:
+    """Extract job title, skills and specifications from raw job description text"""
+    prompt = JobDescriptionTemplate(jd_text)
+    system_prompt = "You are expert in extracting content from job description"
+    jd = await run_chatgpt(prompt.prompt, system_prompt, 0.4)
+    jd = json.loads(jd.replace("```", '').lstrip("python\n"))
+    logger.info("Contents extracted from job description")
+    return jd
+
+
+def jd_search_text(jd: Dict, jd_text: str) -> str:
+    """Text used for the vector search leg of matching"""
+    return "\n".join(jd["other_specifications"]) if jd.get("other_specifications") else jd_text
+
+
+async def fetch_vector_scores(query: str, campaign_id: Optional[str], client_id: Optional[str],
+                              filter_expr: str = "") -> Dict[str, float]:
+    """Vector similarity per profile_id for the campaign (or client) scope, narrowed by `filter_expr`"""
+    # An equality on the collection's partition key (MILVUS_PARTITION_KEY) limits the search to its partition
+    scope = FilterBuilder()
+    if campaign_id:
+        scope.eq("campaign_id", campaign_id)
+    else:
+        scope.eq("client_id", client_id)
+    expr = scope.where(filter_expr).build()
+
+    return await vector_search.profile_scores(
+        query,
+        expr=expr,
+        k=100,
+        score_threshold=0.4
+    )
+
+
+async def fetch_profile_vector_scores(query: str, campaign_id: str, profile_ids: List[str]) -> Dict[str, float]:
+    """
+    Vector similarity of exactly `profile_ids`, independent of any other profile in the pool.
+
+    Persisted match scores use this, so a profile's score does not depend on which filters
+    (and so which top-k candidate set) the call that first scored it happened to use.
+    """
+    scores = {}
+    for i in range(0, len(profile_ids), VECTOR_SCORE_BATCH_SIZE):
+        batch = profile_ids[i:i + VECTOR_SCORE_BATCH_SIZE]
+        expr = FilterBuilder().eq("campaign_id", campaign_id).isin("profile_id", batch).build()
+        # Every profile is stored as two chunks, so 2 x batch covers all of them ungrouped too
+        scores.update(await vector_search.profile_scores(
+            query,
+            expr=expr,
+            k=2 * len(batch),
+            score_threshold=0.4
+        ))
+    return scores
+
+
+async def resolve_match_filters(campaign_id: str, filters: Optional[MatchFilters]) -> Tuple[Optional[MatchFilters], Dict]:
+    """Filters with campaign experience bounds applied, and the matching Mongo profile conditions"""
+    if not filters:
+        return None, {}
+    if filters.use_campaign_experience:
+        campaign = await asyncio.to_thread(
+            campaign_tracker_collection.find_one, {"_id": campaign_id}, {"minExperience": 1, "maxExperience": 1}
+        )
+        filters = filters.with_campaign_experience(campaign)
+    return filters, await build_profile_filter(mongo_db, campaign_id, filters)
+
+
+async def build_skill_matcher(jds: List[Dict], resumes: List[Dict]) -> GenericSkillMatcher:
+    """Matcher for scoring; soft matching embeds only unseen JD skills, never per resume"""
+    if SKILL_SOFT_MATCH:
+        # Bounded: skills of stored records are embedded by the backfill, not on the request path
+        await index_skill_embeddings(jds, timeout=SKILL_EMBEDDING_TIMEOUT)
+        return GenericSkillMatcher(
+            skill_embeddings=skill_embedding_table.snapshot(iter_record_skills(jds + resumes))
+        )
+    return GenericSkillMatcher()
+
+
 @app.post("/find-match/{campaign_id}")
 async def get_matching_resumes(
     campaign_id: str = None,
     job_description: str = Form(None),
-    client_id: Optional[str] = None
+    client_id: Optional[str] = None,
+    top_k: Optional[int] = None,
+    min_experience: Optional[float] = None,
+    max_experience: Optional[float] = None,
+    max_notice_days: Optional[int] = None,
+    locations: Optional[List[str]] = Query(None),
+    use_campaign_experience: bool = False
 ):
     """
     Find matching resumes for a specific job with aggregated scoring
+
+    Experience, notice period and location filters are pushed into the Mongo profile query
+    and the Milvus expr, so ineligible profiles are never loaded or scored.
     
     Formula: (score1 + (0.5 * score2) + (0.5 * score3) + score4) / 3 + additional_score
     Where:
@@ -2351,14 +2485,9 @@ async def get_matching_resumes(
 
         jd = {}
         if jd_text:
-            prompt = JobDescriptionTemplate(jd_text)
-            system_prompt = "You are expert in extracting content from job description"
-            jd = await run_chatgpt(prompt.prompt, system_prompt, 0.4)
-            jd = json.loads(jd.replace("```", '').lstrip("python\n"))
-            logger.info("Contents extracted from job description")
-            print(jd.keys())
-            additional_info = "\n".join(jd["other_specifications"]) if jd.get("other_specifications") else job_description
-            print(additional_info)
+            # Parsed JDs are cached by text, so the JD hash keying persisted scores stays stable
+            jd, jd_hash = await match_store.get_parsed_jd(jd_text, parse_job_description)
+            additional_info = jd_search_text(jd, job_description)
             
             # prompt = QueryRoutePromptTemplate(additional_info)
             # response = await run_chatgpt(prompt.user_prompt, prompt.system_prompt, 0.4)
@@ -2366,13 +2495,8 @@ async def get_matching_resumes(
             # expr = expr['expr']
             # print(expr)
 
-        # Initialize matcher and results
-        matcher = GenericSkillMatcher()
-        matches = []
-
         # Validate job description structure
-        required_job_fields = ['job_title', 'primary_skills', 'secondary_skills']
-        missing_job_fields = [field for field in required_job_fields if field not in jd]
+        missing_job_fields = [field for field in REQUIRED_JD_FIELDS if field not in jd]
         if missing_job_fields:
             raise HTTPException(
                 status_code=400, 
@@ -2385,14 +2509,20 @@ async def get_matching_resumes(
         else:
             logger.info("No job title available")
 
-        # Fetch matching resumes
-        resumes_cursor = mongo_db['profiles'].find({
-            "active": True,
-            "campaign_id": campaign_id
-        }, {"_id": 0})
-        resumes = await resumes_cursor.to_list(length=None)
+        filters, profile_filter = await resolve_match_filters(campaign_id, MatchFilters(
+            min_experience=min_experience,
+            max_experience=max_experience,
+            max_notice_days=max_notice_days,
+            locations=locations,
+            use_campaign_experience=use_campaign_experience
+        ))
+        filtered = bool(profile_filter)
+
+        # Version stamps of the eligible pool decide which persisted scores are still current
+        profiles_query = {"active": True, "campaign_id": campaign_id, **profile_filter}
+        profiles = await mongo_db['profiles'].find(profiles_query, PROFILE_VERSION_PROJECTION).to_list(length=None)
         
-        if not resumes:
+        if not profiles:
             logger.warning(f"No active resumes found for job_title: {job_title}")
             return MatchingResponse(
                 jd_text=jd_text,
@@ -2403,94 +2533,38 @@ async def get_matching_resumes(
                 execution_time_ms=0.0
             )
         
-        expr = f"(campaign_id=='{campaign_id}')" if campaign_id else f"(client_id=='{client_id}')"
-
-        result = vector_store.similarity_search_with_relevance_scores(
-            query=additional_info,
-            partition_name=campaign_id,
-            expr=expr,
-            k=100,
-            score_threshold=0.4
-        )
-
-        res = {}
-
-        for rec, score in result:
-            key = rec.metadata['profile_id']
-            res.update({key: score})
-
-        # Process each resume
-        for resume in resumes:
-            try:
-                # Validate resume structure
-                required_resume_fields = ['name', 'primary_skills', 'secondary_skills']
-                missing_resume_fields = [field for field in required_resume_fields if field not in resume]
-                if missing_resume_fields:
-                    logger.warning(f"Resume {resume.get('profile_id', 'unknown')} missing fields: {missing_resume_fields}")
-                    continue
-                
-                # Calculate individual scores
-                score1 = matcher.calculate_skill_match_score(
-                    resume['primary_skills'], jd['primary_skills']
-                )['overall_score']
-                
-                score2 = matcher.calculate_skill_match_score(
-                    resume['primary_skills'], jd['secondary_skills']
-                )['overall_score']
-                
-                score3 = matcher.calculate_skill_match_score(
-                    resume['secondary_skills'], jd['primary_skills']
-                )['overall_score']
-                
-                score4 = matcher.calculate_skill_match_score(
-                    resume['secondary_skills'], jd['secondary_skills']
-                )['overall_score']
-
-                # additional fields score
-                profile_id = resume.get("profile_id")
-                add_score = res.get(profile_id, 0)
-                
-                # Calculate aggregated score using the specified formula
-                aggregated_score = ((0.8 * score1) + (0.15 * score2) + (0.025 * score3) + (0.025 * score4))
-                aggregated_score = (0.7 * aggregated_score) + (0.3 * add_score)
-                aggregated_score = min(1, aggregated_score)
-                
-                # Get detailed skill matching for primary vs primary and secondary vs secondary
-                primary_vs_primary = get_skill_match_details(
-                    resume['primary_skills'], jd['primary_skills'], matcher
-                )
-                
-                secondary_vs_secondary = get_skill_match_details(
-                    resume['secondary_skills'], jd['secondary_skills'], matcher
-                )
-                
-                # Create result object
-                result = AggregatedScore(
-                    resume_name=resume['name'],
-                    profile_id=str(resume.get('profile_id', '')),
-                    aggregated_score=round(aggregated_score, 2),
-                    score_breakdown={
-                        'primary_vs_primary': min(1,round(score1, 2)),
-                        'primary_vs_secondary': min(1, round(score2, 2)),
-                        'secondary_vs_primary': min(1, round(score3, 2)),
-                        'secondary_vs_secondary': min(1, round(score4, 2))
-                    },
-                    vector_score=round(add_score, 2),
-                    primary_vs_primary=primary_vs_primary,
-                    secondary_vs_secondary=secondary_vs_secondary
-                )
-                
-                matches.append(result)
-                
-            except Exception as resume_error:
-                logger.error(f"Error processing resume {resume.get('profile_id', 'unknown')}: {resume_error}")
-                continue
-        
-        # Sort by aggregated score (descending) and assign ranks
-        matches = [x for x in matches if x.aggregated_score>0.2]
-        matches.sort(key=lambda x: x.aggregated_score, reverse=True)
-        for i, match in enumerate(matches, 1):
-            match.rank = i
+        eligible_ids = {p["profile_id"] for p in profiles if p.get("profile_id")}
+        stale, orphaned = await match_store.stale_profiles(campaign_id, jd_hash, profiles)
+        # With filters the pool is a subset, so missing profiles are filtered out rather than gone
+        if not filtered:
+            await match_store.remove(campaign_id, jd_hash, orphaned)
+
+        # Only new or updated profiles are scored; everything else is already materialized
+        if stale:
+            if len(stale) < len(profiles):
+                profiles_query = {**profiles_query, "profile_id": {"$in": list(stale)}}
+            resumes = await mongo_db['profiles'].find(profiles_query, SCORING_PROJECTION).to_list(length=None)
+
+            res = await fetch_profile_vector_scores(additional_info, campaign_id, sorted(stale))
+            matcher = await build_skill_matcher([jd], resumes)
+
+            # Score resumes off the event loop; large campaigns are sharded across processes.
+            # Every score is persisted, so low scorers are not recomputed on the next call.
+            scored = await scoring_executor.score(resumes, jd, res, matcher=matcher, min_score=float("-inf"))
+            versions = {p["profile_id"]: profile_version(p) for p in profiles if p.get("profile_id")}
+            rejected = stale - {match.profile_id for match in scored}
+            # Skills still being embedded (request timeout, startup backfill) score without soft-match
+            # credit; such rows are served now but rescored on the next call
+            provisional = matcher.skill_embeddings is not None and not matcher.skill_embeddings.complete
+            if provisional:
+                logger.warning(f"Skill embeddings incomplete for {job_title}; scores are provisional")
+            await match_store.save(campaign_id, jd_hash, scored, versions, rejected=rejected,
+                                   provisional=provisional)
+            logger.info(f"Scored {len(scored)} new or updated profiles for {job_title}")
+
+        matches = await match_store.ranked(campaign_id, jd_hash, top_k=top_k,
+                                           profile_ids=eligible_ids if filtered else None)
+        rank_matches(matches)
         
         # Calculate execution time
         end_time = datetime.now()
@@ -2501,6 +2575,7 @@ async def get_matching_resumes(
         return MatchingResponse(
             jd_text=jd_text,
             job_title=job_title,
+            jd_hash=jd_hash,
             total_resumes_processed=len(matches),
             matching_results=matches,
             timestamp=start_time,
@@ -2509,6 +2584,9 @@ async def get_matching_resumes(
         
     except HTTPException:
         raise
+    except VectorSearchTimeout as err:
+        logger.error(str(err))
+        raise HTTPException(status_code=504, detail="Vector search timed out")
     except Exception as err:
         print(err)
         exc_type, exc_obj, exc_tb = sys.exc_info()
@@ -2521,6 +2599,189 @@ async def get_matching_resumes(
         )
 
 
+@app.get("/find-match/{campaign_id}/explain/{profile_id}", response_model=ScoreExplanation)
+async def explain_match(campaign_id: str, profile_id: str, jd_hash: str):
+    """
+    Full score breakdown for one candidate of a /find-match ranking
+
+    Served from the cached parsed JD, the profile's skill fingerprint and the persisted
+    score, so no LLM parse or vector search is repeated.
+    """
+    try:
+        jd = await match_store.find_parsed_jd(jd_hash)
+        if not jd:
+            raise HTTPException(status_code=404, detail="Job description not found for jd_hash")
+
+        score = await match_store.find_score(campaign_id, jd_hash, profile_id)
+        if not score:
+            raise HTTPException(status_code=404, detail="No match score found for this profile and job description")
+
+        profile = await mongo_db['profiles'].find_one({"profile_id": profile_id}, SCORING_PROJECTION)
+        if not profile:
+            raise HTTPException(status_code=404, detail="Profile not found")
+
+        matcher = await build_skill_matcher([jd], [profile])
+        components = await asyncio.to_thread(explain_resume, profile, jd, matcher)
+
+        return ScoreExplanation(
+            campaign_id=campaign_id,
+            jd_hash=jd_hash,
+            profile_id=profile_id,
+            resume_name=score["resume_name"],
+            job_title=jd.get("job_title", ""),
+            aggregated_score=score["aggregated_score"],
+            score_breakdown=score["score_breakdown"],
+            vector_score=score["vector_score"],
+            components=components
+        )
+
+    except HTTPException:
+        raise
+    except Exception as err:
+        exc_type, exc_obj, exc_tb = sys.exc_info()
+        fname = os.path.split(exc_tb.tb_frame.f_code.co_filename)[1]
+        message = f"{fname} : Line no {exc_tb.tb_lineno} - {exc_type} : {err}"
+        logger.error(f"Unexpected error in explain_match: {message}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Internal server error: {str(err)}"
+        )
+
+
+class BatchMatchRequest(BaseModel):
+    job_descriptions: Optional[List[str]] = []
+    job_ids: Optional[List[str]] = []
+    client_id: Optional[str] = None
+    top_k: Optional[int] = 10
+    filters: Optional[MatchFilters] = None
+
+
+def load_job_descriptions(job_ids: List[str]) -> List[Dict]:
+    """Job title and description text for jobs stored in the campaign-tracker collection"""
+    jobs = {
+        job["_id"]: job
+        for job in campaign_tracker_collection.find(
+            {"_id": {"$in": job_ids}}, {"_id": 1, "jobTitle": 1, "description": 1}
+        )
+    }
+    missing = [job_id for job_id in job_ids if job_id not in jobs]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Jobs not found: {missing}")
+    return [jobs[job_id] for job_id in job_ids]
+
+
+@app.post("/find-match/batch/{campaign_id}", response_model=BatchMatchingResponse)
+async def get_batch_matching_resumes(campaign_id: str, request: BatchMatchRequest):
+    """
+    Score a campaign's candidate pool against many job descriptions in one pass
+
+    The profile pool is fetched once and every JD is parsed concurrently; the JD x resume
+    score matrix is computed by the scoring executor. Returns the top_k matches per JD and,
+    for every scored candidate, the JD they fit best.
+    """
+    start_time = datetime.now()
+
+    try:
+        job_ids = request.job_ids or []
+        jd_texts = [text for text in (request.job_descriptions or []) if text and text.strip()]
+        if not (jd_texts or job_ids):
+            raise HTTPException(status_code=400, detail="At least one job description or job id is required")
+
+        sources = [{"text": text, "job_id": None, "job_title": ""} for text in jd_texts]
+        if job_ids:
+            jobs = await asyncio.to_thread(load_job_descriptions, job_ids)
+            sources.extend(
+                {"text": job.get("description") or "", "job_id": job["_id"], "job_title": job.get("jobTitle", "")}
+                for job in jobs
+            )
+
+        # Parse every JD concurrently instead of one /find-match round trip each
+        parsed = await asyncio.gather(*(
+            match_store.get_parsed_jd(source["text"], parse_job_description) for source in sources
+        ))
+        jds = [jd for jd, _ in parsed]
+        jd_hashes = [digest for _, digest in parsed]
+        for i, jd in enumerate(jds):
+            missing_job_fields = [field for field in REQUIRED_JD_FIELDS if field not in jd]
+            if missing_job_fields:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Job description {i} missing required fields: {missing_job_fields}"
+                )
+        job_titles = [jd.get("job_title") or source["job_title"] for jd, source in zip(jds, sources)]
+
+        # Fetch the eligible profile pool once for all JDs
+        filters, profile_filter = await resolve_match_filters(campaign_id, request.filters)
+        resumes_cursor = mongo_db['profiles'].find({
+            "active": True,
+            "campaign_id": campaign_id,
+            **profile_filter
+        }, SCORING_PROJECTION)
+        resumes = await resumes_cursor.to_list(length=None)
+
+        if not resumes:
+            logger.warning(f"No active resumes found for campaign: {campaign_id}")
+            per_jd, rows = [[] for _ in jds], []
+        else:
+            filter_expr = ""
+            if profile_filter:
+                eligible_ids = [r["profile_id"] for r in resumes if r.get("profile_id")]
+                filter_expr = filters.milvus_expr(eligible_ids if filters.has_candidate_filter else None)
+            vector_scores = await asyncio.gather(*(
+                fetch_vector_scores(jd_search_text(jd, source["text"]), campaign_id, request.client_id, filter_expr)
+                for jd, source in zip(jds, sources)
+            ))
+            matcher = await build_skill_matcher(list(jds), resumes)
+            per_jd, rows = await scoring_executor.score_matrix(
+                resumes, list(jds), list(vector_scores), matcher=matcher, top_k=request.top_k
+            )
+
+        jd_results = [
+            JDMatchResult(
+                jd_index=i,
+                job_title=job_titles[i],
+                job_id=source["job_id"],
+                jd_hash=jd_hashes[i],
+                # Every resume of the pool is scored against each JD; matches are only its top_k
+                total_resumes_processed=len(resumes),
+                matching_results=rank_matches(matches)
+            )
+            for i, (matches, source) in enumerate(zip(per_jd, sources))
+        ]
+        candidate_best_fit = [
+            CandidateBestFit(best_job_title=job_titles[row["best_jd_index"]], **row)
+            for row in best_fit_rows(rows)
+        ]
+
+        execution_time_ms = (datetime.now() - start_time).total_seconds() * 1000
+        logger.info(f"Scored {len(resumes)} resumes against {len(jds)} JDs in {execution_time_ms:.2f}ms")
+
+        return BatchMatchingResponse(
+            campaign_id=campaign_id,
+            job_titles=job_titles,
+            total_resumes_processed=len(rows),
+            jd_results=jd_results,
+            candidate_best_fit=candidate_best_fit,
+            timestamp=start_time,
+            execution_time_ms=round(execution_time_ms, 2)
+        )
+
+    except HTTPException:
+        raise
+    except VectorSearchTimeout as err:
+        logger.error(str(err))
+        raise HTTPException(status_code=504, detail="Vector search timed out")
+    except Exception as err:
+        exc_type, exc_obj, exc_tb = sys.exc_info()
+        fname = os.path.split(exc_tb.tb_frame.f_code.co_filename)[1]
+        message = f"{fname} : Line no {exc_tb.tb_lineno} - {exc_type} : {err}"
+        logger.error(f"Unexpected error in get_batch_matching_resumes: {message}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Internal server error: {str(err)}"
+        )
+
+
 @app.get("/profile/{profile_id}")
 async def fetch_profile(profile_id: str):
     try:
@@ -2540,6 +2801,129 @@ async def fetch_profile(profile_id: str):
         return JSONResponse(content={"message": "Error fetching profile"}, status_code=500)    
 
 
+class PairwiseScoreRequest(BaseModel):
+    profile_ids: List[str]
+    jd_ids: List[str]
+    skill_priorities: Optional[SkillPriority] = None
+
+
+class PairwiseScoreResponse(BaseModel):
+    profile_ids: List[str]
+    jd_ids: List[str]
+    scores: List[List[Optional[float]]]
+    score_breakdown: List[List[Optional[Dict[str, float]]]]
+    missing_profile_ids: List[str] = []
+    missing_jd_ids: List[str] = []
+    vocabulary_version: str
+
+
+MAX_PAIRWISE_CELLS = int(os.getenv("MAX_PAIRWISE_CELLS", 50000))
+PAIRWISE_PROFILE_PROJECTION = {**SCORING_PROJECTION, **PROFILE_VERSION_PROJECTION}
+
+
+async def load_pairwise_inputs(profile_ids: List[str], jd_ids: List[str]):
+    """Profiles by profile_id and JDs (job collection) by campaign_id or ObjectId, in request order"""
+    profiles = {
+        p["profile_id"]: p
+        async for p in mongo_db['profiles'].find({"profile_id": {"$in": profile_ids}}, PAIRWISE_PROFILE_PROJECTION)
+    }
+
+    object_ids = [ObjectId(jd_id) for jd_id in jd_ids if ObjectId.is_valid(jd_id)]
+    jds = {}
+    async for jd in mongo_db['job'].find(
+        {"$or": [{"campaign_id": {"$in": jd_ids}}, {"_id": {"$in": object_ids}}]},
+        {"job_title": 1, "campaign_id": 1, "primary_skills": 1, "secondary_skills": 1, "skill_fingerprint": 1}
+    ):
+        key = str(jd["_id"]) if str(jd["_id"]) in jd_ids else jd.get("campaign_id")
+        jds[key] = jd
+
+    return [profiles.get(pid) for pid in profile_ids], [jds.get(jd_id) for jd_id in jd_ids]
+
+
+def pairwise_etag(profiles: List[Dict], jds: List[Dict], skill_priorities: Optional[SkillPriority]) -> str:
+    """Validator over everything the score matrix depends on; unchanged inputs give the same ETag"""
+    payload = {
+        "profiles": [[p["profile_id"], profile_version(p)] if p else None for p in profiles],
+        "jds": [
+            [str(jd["_id"]), hashlib.sha1(json.dumps(
+                [jd.get("primary_skills"), jd.get("secondary_skills")], sort_keys=True, default=str
+            ).encode("utf-8")).hexdigest()] if jd else None
+            for jd in jds
+        ],
+        "priorities": skill_priorities.dict() if skill_priorities else None,
+        "vocabulary_version": skill_vocabulary.version,
+        "scoring_version": SCORING_VERSION
+    }
+    return '"' + hashlib.sha1(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest() + '"'
+
+
+async def compute_pairwise_scores(profile_ids: List[str], jd_ids: List[str],
+                                  skill_priorities: Optional[SkillPriority] = None,
+                                  if_none_match: Optional[str] = None):
+    """Returns (etag, response); response is None when `if_none_match` still matches"""
+    profiles, jds = await load_pairwise_inputs(profile_ids, jd_ids)
+    etag = pairwise_etag(profiles, jds, skill_priorities)
+    if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return etag, None
+
+    found_profiles = [p for p in profiles if p]
+    found_jds = [jd for jd in jds if jd]
+    for jd in found_jds:
+        if not jd.get("skill_fingerprint"):
+            jd["skill_fingerprint"] = build_skill_fingerprint(jd)
+
+    matcher = create_skill_matcher({}, skill_priorities)
+    scores, breakdowns = await asyncio.to_thread(score_pairs, found_profiles, found_jds, matcher)
+
+    response = PairwiseScoreResponse(
+        profile_ids=[p["profile_id"] for p in found_profiles],
+        jd_ids=[jd_id for jd_id, jd in zip(jd_ids, jds) if jd],
+        scores=scores,
+        score_breakdown=breakdowns,
+        missing_profile_ids=[pid for pid, p in zip(profile_ids, profiles) if not p],
+        missing_jd_ids=[jd_id for jd_id, jd in zip(jd_ids, jds) if not jd],
+        vocabulary_version=skill_vocabulary.version
+    )
+    return etag, response
+
+
+@app.post("/resume/score/batch", response_model=PairwiseScoreResponse)
+async def get_pairwise_scores(body: PairwiseScoreRequest, request: Request):
+    """
+    Skill score matrix for lists of profiles and job descriptions
+
+    Scores are computed from stored skill fingerprints with the optional priorities applied
+    as in create_skill_matcher. The response carries an ETag; a request with a matching
+    If-None-Match header gets 304 Not Modified without any scoring.
+    """
+    try:
+        profile_ids = list(dict.fromkeys(body.profile_ids))
+        jd_ids = list(dict.fromkeys(body.jd_ids))
+        if not profile_ids or not jd_ids:
+            raise HTTPException(status_code=400, detail="profile_ids and jd_ids are required")
+        if len(profile_ids) * len(jd_ids) > MAX_PAIRWISE_CELLS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Requested {len(profile_ids) * len(jd_ids)} pairs; at most {MAX_PAIRWISE_CELLS} are allowed"
+            )
+
+        etag, response = await compute_pairwise_scores(
+            profile_ids, jd_ids, body.skill_priorities, request.headers.get("if-none-match")
+        )
+        if response is None:
+            return Response(status_code=304, headers={"ETag": etag})
+        return JSONResponse(content=jsonable_encoder(response), headers={"ETag": etag}, status_code=200)
+
+    except HTTPException:
+        raise
+    except Exception as err:
+        exc_type, exc_obj, exc_tb = sys.exc_info()
+        fname = os.path.split(exc_tb.tb_frame.f_code.co_filename)[1]
+        message = f"{fname} : Line no {exc_tb.tb_lineno} - {exc_type} : {err}"
+        logger.error(f"Error calculating pairwise scores: {message}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
 @app.get("/resume/{resume_id}/score/{job_description_id}")
 async def get_resume_score(
     resume_id: str,
@@ -2550,33 +2934,19 @@ async def get_resume_score(
     Get detailed skill matching score for a specific resume against a job description
     """
     try:
-        # Validate ObjectId formats
-        if not ObjectId.is_valid(resume_id):
-            raise HTTPException(status_code=400, detail="Invalid resume_id format")
-        if not ObjectId.is_valid(job_description_id):
-            raise HTTPException(status_code=400, detail="Invalid job_description_id format")
-        
-        # Fetch resume and job description
-        resume = db_manager.get_resume_by_id(resume_id)
-        job_description = db_manager.get_job_description(job_description_id)
-        
-        # Validate skills fields
-        if 'skills' not in resume:
-            raise HTTPException(status_code=400, detail="Resume missing 'skills' field")
-        if 'skills' not in job_description:
-            raise HTTPException(status_code=400, detail="Job description missing 'skills' field")
-        
-        # Create skill matcher and calculate score
-        matcher = create_skill_matcher(job_description, skill_priorities)
-        score_result = matcher.calculate_skill_match_score(
-            resume['skills'], 
-            job_description['skills']
-        )
-        
+        _, response = await compute_pairwise_scores([resume_id], [job_description_id], skill_priorities)
+        if response.missing_profile_ids:
+            raise HTTPException(status_code=404, detail="Resume not found")
+        if response.missing_jd_ids:
+            raise HTTPException(status_code=404, detail="Job description not found")
+        if response.scores[0][0] is None:
+            raise HTTPException(status_code=400, detail="Resume could not be scored against the job description")
+
         return {
             "resume_id": resume_id,
             "job_description_id": job_description_id,
-            "scoring_details": score_result,
+            "score": response.scores[0][0],
+            "scoring_details": response.score_breakdown[0][0],
             "timestamp": datetime.now().isoformat()
         }
         
@@ -2589,9 +2959,110 @@ async def get_resume_score(
 
 class SearchObj(BaseModel):
     search_query: Optional[str] = ""
-    filters: Optional[Dict]
+    filters: Optional[Dict] = None
     page_size: Optional[int] = 10
     page_number: Optional[int] = 1
+    # "dense" (embedding similarity), or opt-in "hybrid" (dense + BM25) or "sparse"
+    search_mode: Optional[str] = "dense"
+    # next_cursor of a previous response; replaces every other field
+    cursor: Optional[str] = None
+
+
+# Fused hybrid scores are not on the dense relevance scale, so no threshold unless configured
+HYBRID_SCORE_THRESHOLD = float(os.getenv("HYBRID_SCORE_THRESHOLD")) if os.getenv("HYBRID_SCORE_THRESHOLD") else None
+
+
+async def rank_search_results(client_id: str, search_query: str, filters: Dict, search_mode: str) -> List[Dict]:
+    """Milvus hits for a query-match search, one per profile, best first (cached by search_profiles)"""
+    keyword_search = search_mode != "dense"
+    keyword_terms = []
+
+    # with open("./search_config.json", "r") as fc:
+    #     config = json.load(fc)
+    builder = FilterBuilder().eq("client_id", client_id)
+    qfilters = filters if filters else {}
+    if qfilters:
+        for k,v in qfilters.items():
+            if k=="experience":
+                bounds = re.sub("[^0-9]+", " ", str(v)).split()
+                if len(bounds)==2:
+                    mn, mx = sorted(int(b) for b in bounds)
+                    builder.between("total_experience", mn, mx)
+                elif len(bounds)==1:
+                    builder.between("total_experience", int(bounds[0]))
+
+            elif k=="job_title" and v:
+                # job titles are stored lowercased (fetch_job_title)
+                builder.eq("job_title", str(v).lower())
+
+            elif k in ("certifications", "skills") and v:
+                # Any of the terms (every word of a multi-word term), through the content text index
+                # instead of LIKE scans (only symbol terms like "c++"/".net" use LIKE); in keyword
+                # modes the terms are also scored by BM25
+                terms = [str(term).strip().lower() for term in ([v] if isinstance(v, str) else v)]
+                terms = [term for term in terms if term]
+                if terms:
+                    builder.text_match("content", terms)
+                    if keyword_search:
+                        keyword_terms.extend(terms)
+
+    search_query = search_query.strip("\n").strip()
+    search_query = re.sub(r"[^A-Za-z0-9]+", " ", search_query)
+    add_filters = []
+
+    if search_query:
+        template = SearchProcessTemplate(search_query)
+        add_filters = await run_chatgpt(template.user_prompt, template.system_prompt, 0.3)
+        print("additional filters", add_filters)
+
+    if type(add_filters)==str:
+        add_filters = add_filters.lstrip("```json\n").lstrip("```python").rstrip("```")
+        add_filters = ast.literal_eval(add_filters)
+
+    ref_search = re.sub(r"[^A-Za-z0-9]+", " ", search_query).lower()
+    expr = builder.build()
+
+    logger.info(expr)
+    logger.info("Filters generated ...")
+    logger.info("Loading search...")
+
+    score_threshold = 0.4
+    if not expr:
+        score_threshold = 0.6
+    if keyword_search and (ref_search or keyword_terms):
+        sparse_query = " ".join([ref_search] + keyword_terms).strip()
+        result = await vector_search.search(
+            sparse_query if search_mode == "sparse" else (ref_search or sparse_query),
+            mode=search_mode,
+            k=100,
+            score_threshold=HYBRID_SCORE_THRESHOLD if search_mode == "hybrid" else None,
+            expr=expr,
+            sparse_query=sparse_query
+        )
+    elif (ref_search or expr):
+        result = await vector_search.similarity_search_with_relevance_scores(
+            ref_search,
+            k=100,
+            score_threshold=score_threshold,
+            expr=expr
+        )
+    else:
+        result = []
+
+    results = {}
+    for rec, score in result:
+        key = rec.metadata['profile_id']
+        if key in results:
+            score = max(score, results[key]['score'])
+        results[key] = {
+            "name": rec.metadata['name'],
+            "score": score,
+            "content": rec.page_content,
+            "total_experience": rec.metadata['total_experience'],
+            "job_title": rec.metadata['job_title'],
+            "profile_id": key
+        }
+    return sorted(results.values(), key=lambda x: -x['score'])
 
 
 @app.post("/ai/query-match/{client_id}")
@@ -2624,50 +3095,49 @@ async def search_profiles(
     to fetch. The default value for `page_number` is set to 1, meaning that by default, the function
     will return
     :type page_number: Optional[int]
+    :param search_mode: The `search_mode` parameter selects the retrieval: "dense" (default) is
+    embedding similarity with the usual relevance threshold, "hybrid" fuses dense and BM25 results
+    with the configured ranker (thresholded only when HYBRID_SCORE_THRESHOLD is set) and "sparse" is
+    BM25 only. Outside dense mode, skills and certifications filters are matched through the
+    BM25 query and the content text index rather than `content like` scans.
+    :type search_mode: Optional[str]
+    :param cursor: The `cursor` parameter is the `next_cursor` of a previous response. It fetches the
+    following page of the same search, and the other fields of the body are ignored. Ranked results
+    are cached for SEARCH_CACHE_TTL_SECONDS (dropped when profiles are ingested for the client), so
+    later pages skip the LLM call and the Milvus search.
+    :type cursor: Optional[str]
     :return: The `search_profiles` function returns a JSONResponse containing information about the
     matching records found based on the search query and filters provided. The response includes a
     message indicating the number of matching records found, the actual records retrieved, the total
-    count of results, the page size, and the page number.
+    count of results, the page size, the page number and the cursor of the next page (None on the
+    last page).
     """
+    if body.cursor:
+        # Cursors carry the whole search, so the rest of the body is ignored
+        try:
+            cursor = decode_cursor(body.cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        if cursor.get("client_id") != client_id:
+            raise HTTPException(status_code=400, detail="Cursor belongs to a different client")
+        body = SearchObj(search_query=cursor.get("search_query") or "", filters=cursor.get("filters") or {},
+                         page_size=cursor.get("page_size") or 10, search_mode=cursor.get("search_mode"))
+        offset = cursor["offset"]
+    else:
+        offset = (max(body.page_number or 1, 1) - 1) * (body.page_size or 10)
+
+    search_mode = body.search_mode or "dense"
+    if search_mode not in SEARCH_MODES:
+        raise HTTPException(status_code=400, detail=f"search_mode must be one of {list(SEARCH_MODES)}")
+
     try:
         data = body.model_dump()
-        search_query = data['search_query']
-        filters = data.get('filters', {})
-        page_size = data.get('page_size', 10)
-        page_number = data.get('page_number', 1)
-
-        # with open("./search_config.json", "r") as fc:
-        #     config = json.load(fc)
-        expr = f"client_id=={client_id}" if client_id else ""
-        f = lambda x: f"%' OR content like '%".join(x).lstrip("%' OR ")+"%'"
-        qfilters = filters if filters else {}
-        if qfilters:
-            for k,v in qfilters.items():
-                if k=="experience":
-                    v = re.sub("[^0-9]+", " ", v).strip()
-                    if len(v)==2:
-                        mn, mx = v.split()
-                        expr += f" and (total_experience<={mx} and total_experience>={mn})"
-                    elif len(v)==1:
-                        expr += f" and total_experience>={v}"
-
-                elif k=="job_title":
-                    expr  += f" and (job_title=='{v}')"
-                
-                elif k=="certifications":
-                    v = [""] + v
-                    v = f(v)
-                    expr += f" and ({v})"
-                
-                elif k=="skills":
-                    v = [""] + v
-                    v = f(v)
-                    expr += f" and ({v})"
-
-        search_query = search_query.strip("\n").strip()
-        search_query = re.sub(r"[^A-Za-z0-9]+", " ", search_query)
-        add_filters = []
-        if not (search_query or qfilters):
+        search_query = data['search_query'] or ""
+        filters = data.get('filters') or {}
+        page_size = data.get('page_size') or 10
+        page_number = offset // page_size + 1
+
+        if not (search_query.strip() or filters):
             logger.info("Please Enter query or value in filter to search!")
             result = {}
             n = 0
@@ -2677,103 +3147,39 @@ async def search_profiles(
                     "body":result,
                     "result_count": n,
                     "page_size": page_size,
-                    "page_number": page_number
+                    "page_number": page_number,
+                    "next_cursor": None
                 },
                 status_code=200
             )
 
-        if search_query:
-            template = SearchProcessTemplate(search_query)
-            add_filters = await run_chatgpt(template.user_prompt, template.system_prompt, 0.3)
-            print("additional filters", add_filters)
-
-        if type(add_filters)==str:
-            add_filters = add_filters.lstrip("```json\n").lstrip("```python").rstrip("```")
-            add_filters = ast.literal_eval(add_filters)
-            
-        # template = QueryRoutePromptTemplate(search_query, qfilters)
-        # response = await run_chatgpt(template.user_prompt, template.system_prompt, 0.45)
-        # response = response.strip("```json\n")
-        # response = response.strip("```python")
-        # response = response.strip("```")
-        # filters = json.loads(response)
-
-        ref_search = re.sub(r"[^A-Za-z0-9]+", " ", search_query).lower()
-        expr = f"{expr.lstrip(' and ')}"
-        expr = re.sub(r'[$#*&+]', "", expr).lower()
-
-        logger.info(expr)
-        logger.info("Filters generated ...")  
-
-        offset = (page_number - 1) * page_size
-        limit = page_size
-        
-        logger.info("Loading search...")
-
-        score_threshold = 0.4
-        if not expr:
-            score_threshold = 0.6
-        print(expr)
-        if (ref_search or expr):
-            result = vector_store.similarity_search_with_relevance_scores(
-                query=ref_search,
-                k=100,
-                score_threshold=score_threshold,
-                expr=expr
-            )
-        
+        # Ranked hits are cached per search; page turns only fetch the page's skills from Mongo
+        cache_key = search_cache_key(client_id, search_query, filters, search_mode)
+        ranked = search_cache.get(cache_key)
+        if ranked is None:
+            ranked = await rank_search_results(client_id, search_query, filters, search_mode)
+            search_cache.put(cache_key, client_id, ranked)
         else:
-            result = []
-         
-        results = {}
-
-        for rec, score in result:
-            key = rec.metadata['profile_id']
-            content = rec.page_content
-            total_experience = rec.metadata['total_experience']
-            job_title = rec.metadata['job_title']
-            if key not in results:
-                results[key] = {
-                    "name": rec.metadata['name'],
-                    "score":score, 
-                    "content": content, 
-                    "total_experience": total_experience,
-                    "job_title": job_title,
-                    "profile_id": rec.metadata['profile_id']
-                }
-            else:
-                results[key]['name'] = rec.metadat['name']
-                results[key]['profile_id'] = rec.metadata['profile_id']
-                results[key]['score'] = max(score, results[key]['score'])
-                results[key]['total_experience'] = rec.metadata['total_experience']
-                results[key]['content'] = content
-                results[key]['job_title'] = job_title
-
-        profile_ids = [rec for rec in results]
-
-        find_params = {
-            "profile_id": {
-                "$in": profile_ids
-            }
-        }
-        
-        result = {k: results[k] for k in profile_ids}
-            
-        logger.info("fetched users data.")
-        profile_ids = list(result.keys())
-        project_params = {"_id": 0, "profile_id": 1, "primary_skills": 1, "secondary_skills": 1}
+            logger.info("Serving search from cache")
 
-        async for rec in mongo_db['profiles'].find(find_params, project_params):
-            results[rec['profile_id']]['primary_skills'] = rec['primary_skills']
-            results[rec['profile_id']]['secondary_skills'] = rec['secondary_skills']
-        
-        n = len(result)
-        
-        if result:
-            logger.info(f"fetched records from mongodb")
-            result = sorted(result.values(), key=lambda x: -x['score'])
-            result = result[offset: offset+limit]
-            print(result)
+        result = [dict(rec) for rec in ranked[offset: offset + page_size]]
+        page = {rec['profile_id']: rec for rec in result}
+        project_params = {"_id": 0, "profile_id": 1, "primary_skills": 1, "secondary_skills": 1}
+        async for rec in mongo_db['profiles'].find({"profile_id": {"$in": list(page)}}, project_params):
+            page[rec['profile_id']]['primary_skills'] = rec.get('primary_skills')
+            page[rec['profile_id']]['secondary_skills'] = rec.get('secondary_skills')
+
+        n = len(ranked)
+        next_cursor = None
+        if offset + page_size < n:
+            next_cursor = encode_cursor({
+                "client_id": client_id,
+                "search_query": search_query,
+                "filters": filters,
+                "search_mode": search_mode,
+                "page_size": page_size,
+                "offset": offset + page_size
+            })
 
         logger.info(f"Found {n} matching records!")
 
@@ -2783,7 +3189,8 @@ async def search_profiles(
                 "body":result,
                 "result_count": n,
                 "page_size": page_size,
-                "page_number": page_number
+                "page_number": page_number,
+                "next_cursor": next_cursor
             },
             status_code=200
         )
@@ -2860,6 +3267,8 @@ async def import_excel(campaign_id: str, file: UploadFile = File(...)):
                 "availability_for_interview": str(row.get("Availability for interview", "")) if pd.notna(row.get("Availability for interview")) else "",
                 "created_at": datetime.now(pytz.UTC)
             }
+            # Normalized fields for the notice/location match filters
+            candidate_data.update(excel_filter_fields(candidate_data))
             records.append(candidate_data)
 
         # Insert into MongoDB
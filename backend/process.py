@@ -22,6 +22,8 @@ from pydantic import BaseModel, Field
 from utils.chatgpt import run_chatgpt
 from utils.helper import compute_duration
 from utils.prompt_templates.chunking_template import ChunkingPromptTemplate
+from utils.skill_vocabulary import SkillVocabulary, build_skill_fingerprint, get_skill_vocabulary
+from utils.skill_embeddings import SKILL_SOFT_MATCH_THRESHOLD, SKILL_SOFT_MATCH_WEIGHT, SkillEmbeddingSnapshot
 
 
 class ResumeProcessor:
@@ -254,9 +256,19 @@ class JDProcessor:
             print(f"Cleaned up {len(expired_jds)} expired JDs")
 
 class GenericSkillMatcher:
-    def __init__(self, priority_weights: Dict[str, float] = None, category_weights: Dict[str, float] = None):
-        self.priority_weights = priority_weights or {}
-        self.category_weights = category_weights or {}
+    def __init__(self, priority_weights: Dict[str, float] = None, category_weights: Dict[str, float] = None,
+                 vocabulary: SkillVocabulary = None, skill_embeddings: SkillEmbeddingSnapshot = None,
+                 soft_match_threshold: float = SKILL_SOFT_MATCH_THRESHOLD,
+                 soft_match_weight: float = SKILL_SOFT_MATCH_WEIGHT):
+        self.vocabulary = vocabulary or get_skill_vocabulary()
+        # Priorities are keyed by skill ID so they apply to aliases and fingerprinted skills alike
+        self.priority_weights = {self.skill_key(skill): weight for skill, weight in (priority_weights or {}).items()}
+        self.category_weights = {self.normalize_text(category): weight
+                                 for category, weight in (category_weights or {}).items()}
+        # Soft matching is enabled by passing a skill-embedding snapshot
+        self.skill_embeddings = skill_embeddings
+        self.soft_match_threshold = soft_match_threshold
+        self.soft_match_weight = soft_match_weight
         
         self.default_category_weights = {
             'languages': 1.5,
@@ -270,6 +282,10 @@ class GenericSkillMatcher:
     def normalize_text(self, text: str) -> str:
         return re.sub(r'[^\w\s]', '', text.lower().strip())
     
+    def skill_key(self, skill) -> int:
+        """Canonical skill ID, so aliases (k8s / Kubernetes, NLP / Natural Language Processing) match"""
+        return self.vocabulary.skill_id(skill)
+    
     def extract_all_skills(self, skills_data: Dict) -> Dict[str, List[str]]:
         flattened_skills = defaultdict(list)
         
@@ -280,9 +296,10 @@ class GenericSkillMatcher:
         
         return dict(flattened_skills)
     
-    def get_skill_priority(self, skill: str) -> float:
-        normalized_skill = self.normalize_text(skill)
-        return self.priority_weights.get(normalized_skill, 1.0)
+    def get_skill_priority(self, skill) -> float:
+        if not self.priority_weights:
+            return 1.0
+        return self.priority_weights.get(self.skill_key(skill), 1.0)
     
     def get_category_weight(self, category: str) -> float:
         normalized_category = self.normalize_text(category)
@@ -291,18 +308,49 @@ class GenericSkillMatcher:
     
     def find_exact_matches(self, resume_skills: List[str], job_skills: List[str]) -> List[tuple]:
         matches = []
-        resume_normalized = {self.normalize_text(skill): skill for skill in resume_skills}
+        resume_ids = {self.skill_key(skill): skill for skill in resume_skills}
         
         for job_skill in job_skills:
-            normalized_job_skill = self.normalize_text(job_skill)
+            job_skill_id = self.skill_key(job_skill)
             
-            if normalized_job_skill in resume_normalized:
+            if job_skill_id in resume_ids:
                 priority = self.get_skill_priority(job_skill)
-                matches.append((resume_normalized[normalized_job_skill], job_skill, priority))
+                matches.append((resume_ids[job_skill_id], job_skill, priority))
         
         return matches
     
-    def calculate_category_metrics(self, matches: List[tuple], total_job_skills: int, category: str) -> Dict:
+    def find_soft_matches(self, resume_skills: List[str], job_skills: List[str], exact_matches: List[tuple]) -> List[tuple]:
+        """
+        Partial matches for job skills without an exact match, e.g. PyTorch vs TensorFlow.
+        
+        Each unmatched job skill is paired with its most similar resume skill; pairs at or above
+        the similarity threshold earn `similarity * soft_match_weight` credit. Returns
+        (resume_skill, job_skill, priority, credit) tuples.
+        """
+        if self.skill_embeddings is None or not resume_skills:
+            return []
+        
+        matched_job_ids = {self.skill_key(job_skill) for _, job_skill, _ in exact_matches}
+        unmatched = [skill for skill in job_skills if self.skill_key(skill) not in matched_job_ids]
+        if not unmatched:
+            return []
+        
+        resume_skills = list(resume_skills)
+        similarity = self.skill_embeddings.similarity(unmatched, resume_skills)
+        best = similarity.argmax(axis=1)
+        
+        partial_matches = []
+        for row, job_skill in enumerate(unmatched):
+            score = float(similarity[row, best[row]])
+            if score >= self.soft_match_threshold:
+                credit = round(score * self.soft_match_weight, 3)
+                partial_matches.append((resume_skills[best[row]], job_skill, self.get_skill_priority(job_skill), credit))
+        
+        return partial_matches
+    
+    def calculate_category_metrics(self, matches: List[tuple], total_job_skills: int, category: str,
+                                   partial_matches: List[tuple] = None) -> Dict:
+        partial_matches = partial_matches or []
         if total_job_skills == 0:
             return {
                 'matched_count': 0,
@@ -311,16 +359,20 @@ class GenericSkillMatcher:
                 'priority_score': 0.0,
                 'weighted_score': 0.0,
                 'high_priority_coverage': 0.0,
-                'matches': []
+                'matches': [],
+                'partial_matches': [],
+                'partial_credit': 0.0
             }
         
         matched_count = len(matches)
-        coverage_ratio = matched_count / total_job_skills
+        partial_credit = sum(credit for _, _, _, credit in partial_matches)
+        coverage_ratio = (matched_count + partial_credit) / total_job_skills
         
-        if matches:
-            total_priority = sum(priority for _, _, priority in matches)
-            max_possible_priority = sum(self.get_skill_priority(skill) 
-                                      for _, skill, _ in matches) if matches else 0
+        if matches or partial_matches:
+            total_priority = (sum(priority for _, _, priority in matches) +
+                              sum(priority * credit for _, _, priority, credit in partial_matches))
+            max_possible_priority = (sum(self.get_skill_priority(skill) for _, skill, _ in matches) +
+                                     sum(self.get_skill_priority(skill) for _, skill, _, _ in partial_matches))
             priority_score = total_priority / max_possible_priority if max_possible_priority > 0 else 0.0
         else:
             priority_score = 0.0
@@ -339,6 +391,8 @@ class GenericSkillMatcher:
             'weighted_score': weighted_score,
             'high_priority_coverage': high_priority_coverage,
             'matches': matches,
+            'partial_matches': partial_matches,
+            'partial_credit': round(partial_credit, 3),
             'category_weight': category_weight
         }
     
@@ -396,13 +450,11 @@ class GenericSkillMatcher:
                 matched_skills = []
                 
                 if resume_skills_list:
-                    # Normalize skills for comparison
-                    resume_normalized = {self.normalize_text(skill): skill 
-                                       for skill in resume_skills_list}
+                    # Canonicalize skills for comparison
+                    resume_ids = {self.skill_key(skill) for skill in resume_skills_list}
                     
                     for job_skill in job_skills_list:
-                        normalized_job_skill = self.normalize_text(job_skill)
-                        if normalized_job_skill in resume_normalized:
+                        if self.skill_key(job_skill) in resume_ids:
                             category_has_match = True
                             matched_skills.append(job_skill)
                 
@@ -458,25 +510,28 @@ class GenericSkillMatcher:
             }
         }
     
+    def calculate_category_breakdown(self, resume_skills: Dict, job_skills: Dict) -> Dict[str, Dict]:
+        """Per-category metrics (see calculate_category_metrics) for every category in the job skills"""
+        resume_by_category = self.extract_all_skills(resume_skills)
+        job_by_category = self.extract_all_skills(job_skills)
+        
+        category_results = {}
+        for category, job_category_skills in job_by_category.items():
+            resume_category_skills = resume_by_category.get(category, [])
+            matches = self.find_exact_matches(resume_category_skills, job_category_skills)
+            partial_matches = self.find_soft_matches(resume_category_skills, job_category_skills, matches)
+            category_results[category] = self.calculate_category_metrics(matches, len(job_category_skills), category,
+                                                                         partial_matches)
+        return category_results
+    
     def calculate_skill_match_score(self, resume_skills: Dict, job_skills: Dict) -> Dict:
         try:
-            resume_by_category = self.extract_all_skills(resume_skills)
             job_by_category = self.extract_all_skills(job_skills)
+            category_results = self.calculate_category_breakdown(resume_skills, job_skills)
             
-            category_results = {}
-            all_matches = []
-            total_weighted_score = 0.0
-            total_categories = 0
-            
-            for category, job_category_skills in job_by_category.items():
-                resume_category_skills = resume_by_category.get(category, [])
-                matches = self.find_exact_matches(resume_category_skills, job_category_skills)
-                category_metrics = self.calculate_category_metrics(matches, len(job_category_skills), category)
-                
-                category_results[category] = category_metrics
-                all_matches.extend(matches)
-                total_weighted_score += category_metrics['weighted_score']
-                total_categories += 1
+            all_matches = [match for result in category_results.values() for match in result['matches']]
+            total_weighted_score = sum(result['weighted_score'] for result in category_results.values())
+            total_categories = len(category_results)
             
             overall_score = total_weighted_score / total_categories if total_categories > 0 else 0.0
             total_required_skills = sum(len(skills) for skills in job_by_category.values())
@@ -546,15 +601,53 @@ class AggregatedScore(BaseModel):
     aggregated_score: float
     score_breakdown: Dict[str, float]
     vector_score: float
-    primary_vs_primary: SkillMatchDetails
-    secondary_vs_secondary: SkillMatchDetails
+    # Only populated on request; ranked lists carry scores and the breakdown is served by the explain endpoint
+    primary_vs_primary: Optional[SkillMatchDetails] = None
+    secondary_vs_secondary: Optional[SkillMatchDetails] = None
     rank: Optional[int] = None
 
 class MatchingResponse(BaseModel):
     jd_text: str
     job_title: str
+    jd_hash: Optional[str] = None
+    total_resumes_processed: int
+    matching_results: List[AggregatedScore]
+    timestamp: datetime
+    execution_time_ms: float
+
+class JDMatchResult(BaseModel):
+    jd_index: int
+    job_title: str
+    job_id: Optional[str] = None
+    jd_hash: Optional[str] = None
     total_resumes_processed: int
     matching_results: List[AggregatedScore]
+
+class CandidateBestFit(BaseModel):
+    resume_name: str
+    profile_id: str
+    best_jd_index: int
+    best_job_title: str
+    best_score: float
+    scores: List[Optional[float]]
+
+class ScoreExplanation(BaseModel):
+    campaign_id: str
+    jd_hash: str
+    profile_id: str
+    resume_name: str
+    job_title: str
+    aggregated_score: float
+    score_breakdown: Dict[str, float]
+    vector_score: float
+    components: Dict[str, Dict[str, Any]]
+
+class BatchMatchingResponse(BaseModel):
+    campaign_id: Optional[str] = None
+    job_titles: List[str]
+    total_resumes_processed: int
+    jd_results: List[JDMatchResult]
+    candidate_best_fit: List[CandidateBestFit]
     timestamp: datetime
     execution_time_ms: float
 
@@ -574,12 +667,12 @@ def process_response(content: bytes, response_text: str, file_path: str) -> Dict
         duration = compute_duration(start, end)
         total_exp += duration
     parsed_response['total_experience'] = total_exp
-    parsed_response['profile_id'] = str(uuid4())
     parsed_response['file_name'] = file_path
     parsed_response['file_hash'] = hashlib.sha256(content.encode()).hexdigest()
     parsed_response['processed_at'] = datetime.now(timezone.utc)
     parsed_response['status'] = "COMPLETED"
     parsed_response['active'] = True
+    parsed_response['skill_fingerprint'] = build_skill_fingerprint(parsed_response)
 
     return parsed_response
 
@@ -620,15 +713,15 @@ def get_skill_match_details(resume_skills: Dict, job_skills: Dict, matcher: Gene
     resume_skill_names = set(extract_skill_names(resume_skills))
     job_skill_names = set(extract_skill_names(job_skills))
     
-    # Find matched skills (case-insensitive)
-    resume_normalized = {matcher.normalize_text(skill): skill for skill in resume_skill_names}
-    job_normalized = {matcher.normalize_text(skill): skill for skill in job_skill_names}
+    # Find matched skills by canonical skill ID
+    resume_ids = {matcher.skill_key(skill) for skill in resume_skill_names}
+    job_ids = {matcher.skill_key(skill): skill for skill in job_skill_names}
     
     matched_skills = []
     missing_skills = []
     
-    for normalized_job_skill, original_job_skill in job_normalized.items():
-        if normalized_job_skill in resume_normalized:
+    for job_skill_id, original_job_skill in job_ids.items():
+        if job_skill_id in resume_ids:
             matched_skills.append(original_job_skill)
         else:
             missing_skills.append(original_job_skill)
@@ -645,16 +738,25 @@ def get_skill_match_details(resume_skills: Dict, job_skills: Dict, matcher: Gene
         match_percentage=round(match_percentage, 2)
     )
 
-def create_skill_matcher(job_description: Dict, skill_priorities: SkillPriority = None) -> GenericSkillMatcher:
+def create_skill_matcher(job_description: Dict, skill_priorities: SkillPriority = None, **matcher_kwargs) -> GenericSkillMatcher:
     """Create a skill matcher based on job requirements and optional priorities"""
     priority_weights = {}
     category_weights = {}
     
     if skill_priorities:
         # High priority skills (weight: 1.5)
-        for skill in skill_priorities.high_priority_skills:
-            priority_weights[skill.lower().strip()] = 1.5
+        for skill in skill_priorities.high_priority_skills or []:
+            priority_weights[skill.strip()] = 1.5
         
         # Medium priority skills (weight: 1.2)
-        for skill in skill_priorities.medium_priority_skills:
-            priority_weights[skill.lower().strip()] = 1.2
\ No newline at end of file
+        for skill in skill_priorities.medium_priority_skills or []:
+            priority_weights[skill.strip()] = 1.2
+        
+        # Category weights override the matcher defaults (languages, frameworks, ...)
+        category_weights.update(skill_priorities.category_weights or {})
+    
+    return GenericSkillMatcher(
+        priority_weights=priority_weights,
+        category_weights=category_weights,
+        **matcher_kwargs
+    )
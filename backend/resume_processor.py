@@ -9,6 +9,7 @@ import pytesseract
 import re
 import logging
 from db.mongo.config import db as mongo_db
+from db.mongo.profiles import save_profiles
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 import tiktoken
 from typing import Dict, List, Tuple, Any
@@ -19,6 +20,8 @@ import tempfile
 import zipfile
 from uuid import uuid4
 from utils.helper import compute_duration
+from utils.skill_vocabulary import build_skill_fingerprint
+from utils.skill_embeddings import index_skill_embeddings
 import json
 import time
 from tenacity import retry, stop_after_attempt, wait_exponential
@@ -327,6 +330,7 @@ class Resume:
             # Sanitize skills fields to ensure nested dictionary structure
             parsed['primary_skills'] = self._sanitize_skills(parsed.get('primary_skills', {}))
             parsed['secondary_skills'] = self._sanitize_skills(parsed.get('secondary_skills', {}))
+            parsed['skill_fingerprint'] = build_skill_fingerprint(parsed)
             logger.debug(f"Processed skills for {filename}: primary={parsed['primary_skills']}, secondary={parsed['secondary_skills']}")
  
             # Calculate total experience
@@ -340,7 +344,6 @@ class Resume:
  
             # Structure output
             result = {
-                'profile_id': str(uuid4()),
                 'file_name': filename,
                 'file_hash': hashlib.sha256(content).hexdigest(),
                 'total_experience': total_exp,
@@ -399,11 +402,13 @@ class Resume:
             # Store in MongoDB
             if successful:
                 mongo_start = time.time()
-                insert_result = await self.collection.insert_many(successful)
+                # Re-uploaded resumes overwrite their profile (save_profiles assigns profile_id)
+                stored_ids = await save_profiles(self.collection, successful)
                 # Add MongoDB _id to results
-                for i, result in enumerate(successful):
-                    result["_id"] = str(insert_result.inserted_ids[i])  # Convert ObjectId to string
+                for result in successful:
+                    result["_id"] = stored_ids.get(result["profile_id"])
                 logger.info(f"Stored {len(successful)} resumes in profiles in {(time.time() - mongo_start):.2f} seconds")
+                await index_skill_embeddings(successful)
             
             total_time = time.time() - start_time
             return {
@@ -1,6 +1,7 @@
 import os
 import concurrent
 from langchain_openai import OpenAIEmbeddings
+from utils.embeddings import build_dense_embedding
 import openai
 import asyncio
 import time
@@ -28,7 +29,12 @@ open_ai_client = AsyncOpenAI(
     api_key=os.environ.get("OPENAI_API_KEY"),
 )
 
-dense_embedding = OpenAIEmbeddings(async_client=open_ai_client,model="text-embedding-3-small")
+# OpenAI text-embedding-3-small, or a local ONNX model with EMBEDDING_BACKEND=onnx (utils/embeddings.py)
+dense_embedding = build_dense_embedding(open_ai_client)
+
+# Skill strings are short; a reduced dimension keeps the skill-embedding table small
+SKILL_EMBEDDING_DIM = int(os.getenv("SKILL_EMBEDDING_DIM", 256))
+skill_embedding = OpenAIEmbeddings(async_client=open_ai_client, model=embed_model, dimensions=SKILL_EMBEDDING_DIM)
 
 MAX_CONCURRENT_TASKS = min(20, (os.cpu_count() or 4) * 5)
 semaphore = asyncio.Semaphore(MAX_CONCURRENT_TASKS)
@@ -0,0 +1,182 @@
+"""
+Dense embedding backends for profile chunks and search queries.
+
+EMBEDDING_BACKEND=openai (default) uses text-embedding-3-small over the API. EMBEDDING_BACKEND=onnx
+runs a sentence-embedding model locally on CPU through onnxruntime, so query embeddings don't
+need a network round trip. Either backend embeds both the chunks at ingest and the queries at
+search time, and each model gets its own Milvus collection (collection_for_model), so vectors
+of different models are never mixed. Switching backend means building that collection first
+(python -m db.milvus.versions rebuild).
+"""
+import asyncio
+import logging
+import os
+import re
+import threading
+from typing import List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "openai").lower()
+OPENAI_EMBEDDING_MODEL = "text-embedding-3-small"
+OPENAI_EMBEDDING_DIM = 1536
+
+# Hugging Face repo id of an ONNX export, or a local directory with the model and tokenizer.json
+ONNX_EMBEDDING_MODEL = os.getenv("ONNX_EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+ONNX_EMBEDDING_MODEL_PATH = os.getenv("ONNX_EMBEDDING_MODEL_PATH") or None
+ONNX_EMBEDDING_FILE = os.getenv("ONNX_EMBEDDING_FILE", "onnx/model.onnx")
+ONNX_EMBEDDING_DIM = int(os.getenv("ONNX_EMBEDDING_DIM", 384))
+ONNX_EMBEDDING_MAX_LENGTH = int(os.getenv("ONNX_EMBEDDING_MAX_LENGTH", 512))
+# "mean" over tokens (sentence-transformers) or "cls"
+ONNX_EMBEDDING_POOLING = os.getenv("ONNX_EMBEDDING_POOLING", "mean")
+ONNX_EMBEDDING_BATCH_SIZE = int(os.getenv("ONNX_EMBEDDING_BATCH_SIZE", 32))
+ONNX_EMBEDDING_THREADS = int(os.getenv("ONNX_EMBEDDING_THREADS", 0))
+# Instruction prefixes of models trained with them (e5: "query: " / "passage: ")
+ONNX_EMBEDDING_QUERY_PREFIX = os.getenv("ONNX_EMBEDDING_QUERY_PREFIX", "")
+ONNX_EMBEDDING_DOCUMENT_PREFIX = os.getenv("ONNX_EMBEDDING_DOCUMENT_PREFIX", "")
+
+EMBEDDING_BACKENDS = ("openai", "onnx")
+
+
+def embedding_model_id() -> str:
+    """Identifier of the configured dense embedding model"""
+    if EMBEDDING_BACKEND == "onnx":
+        if ONNX_EMBEDDING_MODEL_PATH:
+            return os.path.basename(os.path.normpath(ONNX_EMBEDDING_MODEL_PATH))
+        return ONNX_EMBEDDING_MODEL
+    return OPENAI_EMBEDDING_MODEL
+
+
+def default_embedding_dim() -> int:
+    return ONNX_EMBEDDING_DIM if EMBEDDING_BACKEND == "onnx" else OPENAI_EMBEDDING_DIM
+
+
+def collection_for_model(base: str, model_id: Optional[str] = None) -> str:
+    """
+    Milvus collection (or alias) holding vectors of `model_id`. The original OpenAI model keeps
+    the configured name, so existing deployments are unaffected.
+    """
+    model_id = model_id or embedding_model_id()
+    if model_id == OPENAI_EMBEDDING_MODEL:
+        return base
+    slug = re.sub(r"[^a-z0-9]+", "_", model_id.lower()).strip("_")
+    return f"{base}_{slug}"[:255]
+
+
+class OnnxEmbeddings(Embeddings):
+    """
+    Sentence embeddings from an ONNX transformer on CPU (token embeddings pooled and L2-normalized).
+
+    The model and tokenizer are loaded once, on first use; inference releases the GIL, so
+    concurrent searches on the vector-search pool embed in parallel.
+    """
+
+    def __init__(self, model_name: str = ONNX_EMBEDDING_MODEL, model_path: Optional[str] = ONNX_EMBEDDING_MODEL_PATH,
+                 model_file: str = ONNX_EMBEDDING_FILE, dim: Optional[int] = ONNX_EMBEDDING_DIM,
+                 max_length: int = ONNX_EMBEDDING_MAX_LENGTH, pooling: str = ONNX_EMBEDDING_POOLING,
+                 batch_size: int = ONNX_EMBEDDING_BATCH_SIZE, threads: int = ONNX_EMBEDDING_THREADS,
+                 query_prefix: str = ONNX_EMBEDDING_QUERY_PREFIX,
+                 document_prefix: str = ONNX_EMBEDDING_DOCUMENT_PREFIX):
+        if pooling not in ("mean", "cls"):
+            raise ValueError(f"Unknown pooling '{pooling}', expected 'mean' or 'cls'")
+        self.model_name = model_name
+        self.model_path = model_path
+        self.model_file = model_file
+        self.dim = dim
+        self.max_length = max_length
+        self.pooling = pooling
+        self.batch_size = max(1, batch_size)
+        self.threads = threads
+        self.query_prefix = query_prefix
+        self.document_prefix = document_prefix
+        self._session = None
+        self._tokenizer = None
+        self._input_names = set()
+        self._lock = threading.Lock()
+
+    def _resolve(self, filename: str) -> str:
+        if self.model_path:
+            return os.path.join(self.model_path, filename)
+        from huggingface_hub import hf_hub_download
+        return hf_hub_download(repo_id=self.model_name, filename=filename)
+
+    def _load(self):
+        if self._session is not None:
+            return
+        with self._lock:
+            if self._session is not None:
+                return
+            import onnxruntime as ort
+            from tokenizers import Tokenizer
+
+            tokenizer = Tokenizer.from_file(self._resolve("tokenizer.json"))
+            tokenizer.enable_truncation(max_length=self.max_length)
+            pad_token = next((token for token in ("[PAD]", "<pad>") if tokenizer.token_to_id(token) is not None),
+                             None)
+            tokenizer.enable_padding(pad_id=tokenizer.token_to_id(pad_token) if pad_token else 0,
+                                     pad_token=pad_token or "[PAD]")
+
+            options = ort.SessionOptions()
+            if self.threads:
+                options.intra_op_num_threads = self.threads
+            session = ort.InferenceSession(self._resolve(self.model_file), sess_options=options,
+                                           providers=["CPUExecutionProvider"])
+            self._input_names = {model_input.name for model_input in session.get_inputs()}
+            self._tokenizer = tokenizer
+            self._session = session
+            logger.info(f"Loaded ONNX embedding model {self.model_path or self.model_name}")
+
+    def _embed(self, texts: List[str]) -> List[List[float]]:
+        self._load()
+        vectors = []
+        for start in range(0, len(texts), self.batch_size):
+            encodings = self._tokenizer.encode_batch(texts[start:start + self.batch_size])
+            mask = np.asarray([encoding.attention_mask for encoding in encodings], dtype=np.int64)
+            feed = {
+                "input_ids": np.asarray([encoding.ids for encoding in encodings], dtype=np.int64),
+                "attention_mask": mask,
+                "token_type_ids": np.asarray([encoding.type_ids for encoding in encodings], dtype=np.int64),
+            }
+            output = self._session.run(None, {name: value for name, value in feed.items()
+                                              if name in self._input_names})[0]
+            if output.ndim == 3:
+                if self.pooling == "cls":
+                    output = output[:, 0]
+                else:
+                    weights = mask[:, :, None].astype(np.float32)
+                    output = (output * weights).sum(axis=1) / np.maximum(weights.sum(axis=1), 1e-9)
+            norms = np.linalg.norm(output, axis=1, keepdims=True)
+            vectors.append(output / np.where(norms == 0, 1, norms))
+        if not vectors:
+            return []
+        vectors = np.concatenate(vectors).astype(np.float32)
+        if self.dim and vectors.shape[1] != self.dim:
+            raise ValueError(f"{self.model_path or self.model_name} returns {vectors.shape[1]}-dim embeddings, "
+                             f"{self.dim} are configured (set ONNX_EMBEDDING_DIM and EMBEDDING_DIM)")
+        return vectors.tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._embed([self.document_prefix + text for text in texts])
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed([self.query_prefix + text])[0]
+
+    # Inference is CPU bound; keep it off the event loop
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return await asyncio.to_thread(self.embed_documents, texts)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return await asyncio.to_thread(self.embed_query, text)
+
+
+def build_dense_embedding(openai_client=None) -> Embeddings:
+    """The configured dense embedding backend"""
+    if EMBEDDING_BACKEND not in EMBEDDING_BACKENDS:
+        raise ValueError(f"EMBEDDING_BACKEND must be one of {EMBEDDING_BACKENDS}, got '{EMBEDDING_BACKEND}'")
+    if EMBEDDING_BACKEND == "onnx":
+        return OnnxEmbeddings()
+    from langchain_openai import OpenAIEmbeddings
+    return OpenAIEmbeddings(async_client=openai_client, model=OPENAI_EMBEDDING_MODEL)
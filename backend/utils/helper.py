@@ -22,3 +22,39 @@ def compute_duration(start: str, end: str) -> float:
         print(err)
         print(end)
         return 0
+
+
+NOTICE_UNITS = {"day": 1, "week": 7, "month": 30, "year": 365}
+
+
+def parse_notice_period_days(notice: str):
+    """
+    Notice period in days from free text such as "30 days", "2 Months", "15-30 days" or
+    "Immediate". Ranges resolve to their upper bound; returns None when nothing can be parsed.
+    """
+    try:
+        text = str(notice or "").strip().lower()
+        if not text:
+            return None
+        if any(word in text for word in ("immediate", "serving", "available now")):
+            return 0
+
+        numbers = [float(n) for n in re.findall(r"\d+(?:\.\d+)?", text)]
+        if not numbers:
+            return None
+        unit = next((days for name, days in NOTICE_UNITS.items() if name in text), 1)
+        return int(round(max(numbers) * unit))
+    except Exception as err:
+        print(err)
+        return None
+
+
+def location_keys(*locations: str) -> list:
+    """Normalized location tokens ("Bangalore / Hyderabad" -> ["bangalore", "hyderabad"]) for indexed matching"""
+    keys = []
+    for location in locations:
+        for part in re.split(r"[,/;|&]|\bor\b|\band\b", str(location or "").lower()):
+            part = re.sub(r"\s+", " ", part).strip(" .-")
+            if part and part not in keys:
+                keys.append(part)
+    return keys
@@ -0,0 +1,120 @@
+import logging
+import math
+import os
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel
+
+from db.milvus.expr import FilterBuilder
+from utils.helper import location_keys
+
+logger = logging.getLogger(__name__)
+
+# Candidate sets up to this size are also pushed into the Milvus expr as a profile_id IN list
+MILVUS_MAX_IN_LIST = int(os.getenv("MILVUS_MAX_IN_LIST", 1000))
+
+
+class MatchFilters(BaseModel):
+    """
+    Hard eligibility filters applied before matching.
+
+    Experience is a profile field and is pushed into both the Mongo profile query and the
+    Milvus expr. Notice period and location come from the campaign's excel_imports rows,
+    which are joined to profiles by email.
+    """
+    min_experience: Optional[float] = None
+    max_experience: Optional[float] = None
+    max_notice_days: Optional[int] = None
+    locations: Optional[List[str]] = None
+    # Take min/max experience from the campaign (minExperience/maxExperience) when not given
+    use_campaign_experience: bool = False
+
+    @property
+    def has_experience_filter(self) -> bool:
+        return self.min_experience is not None or self.max_experience is not None
+
+    @property
+    def has_candidate_filter(self) -> bool:
+        return self.max_notice_days is not None or bool(self.locations)
+
+    @property
+    def is_active(self) -> bool:
+        return self.has_experience_filter or self.has_candidate_filter
+
+    def with_campaign_experience(self, campaign: Optional[Dict]) -> "MatchFilters":
+        """Fill unset experience bounds from a campaign-tracker document"""
+        if not (self.use_campaign_experience and campaign):
+            return self
+
+        def as_float(value):
+            try:
+                return float(value) if value not in (None, "") else None
+            except (TypeError, ValueError):
+                return None
+
+        return self.copy(update={
+            "min_experience": self.min_experience if self.min_experience is not None
+            else as_float(campaign.get("minExperience")),
+            "max_experience": self.max_experience if self.max_experience is not None
+            else as_float(campaign.get("maxExperience")),
+        })
+
+    def profile_query(self) -> Dict:
+        """Conditions on the profiles collection (served by the campaign/experience index)"""
+        query = {}
+        if self.has_experience_filter:
+            query["total_experience"] = {}
+            if self.min_experience is not None:
+                query["total_experience"]["$gte"] = self.min_experience
+            if self.max_experience is not None:
+                query["total_experience"]["$lte"] = self.max_experience
+        return query
+
+    def excel_query(self, campaign_id: str) -> Dict:
+        """Conditions on excel_imports rows (served by the notice/location indexes)"""
+        query = {"campaign_id": campaign_id}
+        if self.max_notice_days is not None:
+            query["notice_period_days"] = {"$lte": self.max_notice_days}
+        if self.locations:
+            query["location_keys"] = {"$in": location_keys(*self.locations)}
+        return query
+
+    def milvus_expr(self, profile_ids: Optional[List[str]] = None) -> str:
+        """Milvus boolean expression for the same filters ("" when there is nothing to push down)"""
+        # Collections built before the explicit schema store total_experience as INT32; round outwards
+        # so they still match, and let Mongo apply the exact bounds
+        builder = FilterBuilder().between(
+            "total_experience",
+            math.floor(self.min_experience) if self.min_experience is not None else None,
+            math.ceil(self.max_experience) if self.max_experience is not None else None,
+        )
+        if profile_ids is not None and len(profile_ids) <= MILVUS_MAX_IN_LIST:
+            builder.isin("profile_id", profile_ids)
+        return builder.build()
+
+
+async def eligible_emails(db, campaign_id: str, filters: MatchFilters) -> Optional[List[str]]:
+    """
+    Emails of the campaign's candidates passing the notice/location filters, in the
+    spellings needed to match profile emails (None when no candidate filter is set).
+    """
+    if not filters.has_candidate_filter:
+        return None
+    emails = set()
+    async for record in db["excel_imports"].find(filters.excel_query(campaign_id), {"_id": 0, "email_id": 1}):
+        email = (record.get("email_id") or "").strip()
+        if email:
+            emails.update((email, email.lower()))
+    logger.info(f"{len(emails)} candidate emails pass notice/location filters for campaign {campaign_id}")
+    return list(emails)
+
+
+async def build_profile_filter(db, campaign_id: str, filters: Optional[MatchFilters]) -> Dict:
+    """Mongo conditions for eligible profiles of a campaign, joining excel_imports when needed"""
+    if not filters or not filters.is_active:
+        return {}
+    query = filters.profile_query()
+    emails = await eligible_emails(db, campaign_id, filters)
+    if emails is not None:
+        query["email"] = {"$in": emails}
+    return query
@@ -0,0 +1,214 @@
+import hashlib
+import json
+import logging
+import os
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from pymongo import UpdateOne
+
+from process import AggregatedScore
+from utils.scoring import MIN_AGGREGATED_SCORE
+from utils.skill_embeddings import SKILL_SOFT_MATCH
+from utils.skill_vocabulary import SKILL_FIELDS, get_skill_vocabulary
+
+logger = logging.getLogger(__name__)
+
+MATCH_SCORES_COLLECTION = os.getenv("MATCH_SCORES_COLLECTION", "match_scores")
+PARSED_JDS_COLLECTION = os.getenv("PARSED_JDS_COLLECTION", "parsed_jds")
+
+# Bump whenever the scoring formula changes so persisted scores are recomputed
+# (2: vector scores computed per profile instead of from a filter-dependent top-k)
+SCORING_VERSION = 2
+
+# Profile fields that decide whether a persisted score is still current
+PROFILE_VERSION_PROJECTION = {"_id": 0, "profile_id": 1, "processed_at": 1, "updated_at": 1}
+
+# Ranked lists carry scores only (rows written by older versions may still hold skill details)
+RANKED_PROJECTION = {"_id": 0, "primary_vs_primary": 0, "secondary_vs_secondary": 0}
+
+# Cleared on the rows of rejected profiles, so they never show up in a ranking
+SCORE_FIELDS = ("resume_name", "aggregated_score", "score_breakdown", "vector_score")
+
+WRITE_BATCH_SIZE = 1000
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha1(text.strip().encode("utf-8")).hexdigest()
+
+
+def jd_hash(jd: Dict) -> str:
+    """
+    Stable key for a parsed job description.
+
+    Covers only the fields that feed the score, plus everything else the score depends on
+    (vocabulary version, soft-match mode, scoring version), so a change to any of them
+    yields a new key instead of serving stale scores.
+    """
+    payload = {
+        "job_title": jd.get("job_title"),
+        "other_specifications": jd.get("other_specifications"),
+        **{field: jd.get(field) for field in SKILL_FIELDS},
+        "vocabulary_version": get_skill_vocabulary().version,
+        "soft_match": SKILL_SOFT_MATCH,
+        "scoring_version": SCORING_VERSION
+    }
+    return hashlib.sha1(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def profile_version(profile: Dict) -> str:
+    """
+    Version stamp of a profile; changes whenever the profile is re-ingested or updated.
+
+    `updated_at` is stamped by db.mongo.profiles.save_profiles on every upload, including
+    re-uploads that overwrite an existing profile; any other profile writer must set it too,
+    otherwise its edits are not detected and stored scores are served as current.
+    """
+    stamp = profile.get("updated_at") or profile.get("processed_at")
+    return stamp.isoformat() if isinstance(stamp, datetime) else str(stamp or "")
+
+
+class MatchScoreStore:
+    """
+    Materialized match scores per (campaign, parsed-JD hash, profile).
+
+    Scores are written once per profile version; a `/find-match` call only scores profiles
+    that are new or changed since the last run and reads the ranking from the score index.
+    """
+
+    def __init__(self, db=None, collection_name: str = MATCH_SCORES_COLLECTION,
+                 parsed_jds_collection: str = PARSED_JDS_COLLECTION):
+        self._db = db
+        self.collection_name = collection_name
+        self.parsed_jds_collection = parsed_jds_collection
+
+    @property
+    def db(self):
+        if self._db is None:
+            from db.mongo.config import db as mongo_db
+            self._db = mongo_db
+        return self._db
+
+    @property
+    def collection(self):
+        return self.db[self.collection_name]
+
+    @property
+    def parsed_jds(self):
+        return self.db[self.parsed_jds_collection]
+
+    async def get_parsed_jd(self, jd_text: str, parser: Callable[[str], Awaitable[Dict]]) -> Tuple[Dict, str]:
+        """
+        Parsed JD for raw text, parsing through the LLM only on the first request.
+
+        Caching the parse keeps the JD hash stable across calls with the same text.
+        """
+        key = text_hash(jd_text)
+        cached = await self.parsed_jds.find_one({"text_hash": key}, {"_id": 0, "jd": 1, "jd_hash": 1})
+        if cached:
+            jd = cached["jd"]
+            # Recomputed every call: a vocabulary, soft-match or scoring-version change yields a new key
+            digest = jd_hash(jd)
+            if digest != cached.get("jd_hash"):
+                await self.parsed_jds.update_one({"text_hash": key}, {"$set": {"jd_hash": digest}})
+            return jd, digest
+
+        jd = await parser(jd_text)
+        digest = jd_hash(jd)
+        await self.parsed_jds.update_one(
+            {"text_hash": key},
+            {"$set": {"jd": jd, "jd_hash": digest, "created_at": datetime.now(timezone.utc)}},
+            upsert=True
+        )
+        return jd, digest
+
+    async def find_parsed_jd(self, digest: str) -> Optional[Dict]:
+        cached = await self.parsed_jds.find_one({"jd_hash": digest}, {"_id": 0, "jd": 1})
+        return cached["jd"] if cached else None
+
+    async def stale_profiles(self, campaign_id: str, digest: str, profiles: List[Dict]) -> Tuple[Set[str], Set[str]]:
+        """
+        Compare active profiles with persisted scores.
+
+        Returns (profile_ids to score, profile_ids whose scores are orphaned and should be dropped).
+        Provisional rows are always rescored.
+        """
+        current = {p["profile_id"]: profile_version(p) for p in profiles if p.get("profile_id")}
+        stored = {}
+        async for rec in self.collection.find(
+            {"campaign_id": campaign_id, "jd_hash": digest},
+            {"_id": 0, "profile_id": 1, "profile_version": 1, "provisional": 1}
+        ):
+            stored[rec["profile_id"]] = None if rec.get("provisional") else rec.get("profile_version")
+
+        stale = {pid for pid, version in current.items() if stored.get(pid) != version}
+        orphaned = set(stored) - set(current)
+        return stale, orphaned
+
+    async def save(self, campaign_id: str, digest: str, matches: List[AggregatedScore],
+                   versions: Dict[str, str], rejected: Iterable[str] = (), provisional: bool = False) -> int:
+        """
+        Upsert freshly computed scores; returns the number of rows written.
+
+        Profiles the scorer `rejected` (e.g. missing required fields) get a row without a score,
+        so they count as current for their version instead of being rescored on every call.
+        `provisional` rows (scored while skill embeddings were missing) are ranked like any other
+        but rescored by the next call instead of being served as current.
+        """
+        now = datetime.now(timezone.utc)
+        # Provisional rows carry the flag; final scores clear one left by an earlier provisional run
+        flag = {"provisional": True} if provisional else {}
+        unset_flag = {} if provisional else {"provisional": ""}
+        operations = [
+            UpdateOne(
+                {"campaign_id": campaign_id, "jd_hash": digest, "profile_id": match.profile_id},
+                {"$set": {
+                    **match.dict(exclude={"rank", "primary_vs_primary", "secondary_vs_secondary"}),
+                    "profile_version": versions.get(match.profile_id, ""),
+                    "scored_at": now,
+                    **flag
+                }, "$unset": {"rejected": "", **unset_flag}},
+                upsert=True
+            )
+            for match in matches
+        ]
+        operations.extend(
+            UpdateOne(
+                {"campaign_id": campaign_id, "jd_hash": digest, "profile_id": profile_id},
+                {"$set": {"profile_version": versions.get(profile_id, ""), "rejected": True, "scored_at": now,
+                          **flag},
+                 "$unset": {**{field: "" for field in SCORE_FIELDS}, **unset_flag}},
+                upsert=True
+            )
+            for profile_id in rejected
+        )
+        for i in range(0, len(operations), WRITE_BATCH_SIZE):
+            await self.collection.bulk_write(operations[i:i + WRITE_BATCH_SIZE], ordered=False)
+        return len(operations)
+
+    async def remove(self, campaign_id: str, digest: str, profile_ids: Set[str]):
+        if profile_ids:
+            await self.collection.delete_many(
+                {"campaign_id": campaign_id, "jd_hash": digest, "profile_id": {"$in": list(profile_ids)}}
+            )
+
+    async def ranked(self, campaign_id: str, digest: str, top_k: Optional[int] = None,
+                     min_score: float = MIN_AGGREGATED_SCORE,
+                     profile_ids: Optional[Set[str]] = None) -> List[AggregatedScore]:
+        """Matches for (campaign, JD) read straight off the score index, best first (optionally only `profile_ids`)"""
+        query = {"campaign_id": campaign_id, "jd_hash": digest, "aggregated_score": {"$gt": min_score}}
+        if profile_ids is not None:
+            query["profile_id"] = {"$in": list(profile_ids)}
+        cursor = self.collection.find(query, RANKED_PROJECTION).sort("aggregated_score", -1)
+        if top_k:
+            cursor = cursor.limit(top_k)
+        return [AggregatedScore(**rec) async for rec in cursor]
+
+    async def find_score(self, campaign_id: str, digest: str, profile_id: str) -> Optional[Dict]:
+        return await self.collection.find_one(
+            {"campaign_id": campaign_id, "jd_hash": digest, "profile_id": profile_id, "rejected": {"$ne": True}},
+            RANKED_PROJECTION
+        )
+
+
+match_store = MatchScoreStore()
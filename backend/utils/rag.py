@@ -1,68 +1,171 @@
 import re
-from langchain_community.vectorstores import Milvus
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Union, Optional, Set, Tuple
 from collections import Counter, defaultdict
 from typing import List, Dict, Any
 from dataclasses import dataclass
+from functools import lru_cache
 import logging
 
+from db.milvus.expr import FilterBuilder
+from db.milvus.search import VectorSearchService, vector_search
+
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+class KeywordMatcher:
+    """
+    Case-insensitive substring matcher for a fixed set of keywords, compiled once per query.
+
+    One regex scan per text finds, at every position, the longest keyword starting there (a
+    lookahead over a prefix trie of the keywords, so overlapping occurrences are seen). Shorter keywords contained in
+    a matched one are implied by it, so `present` agrees with checking `keyword in text` for
+    every keyword, at the cost of a single pass.
+    """
+
+    def __init__(self, keywords):
+        self.keywords = sorted({kw.lower() for kw in keywords if kw}, key=lambda kw: (-len(kw), kw))
+        self.pattern = None
+        if self.keywords:
+            self.pattern = re.compile(f"(?=({self.trie_pattern(self.keywords)}))", re.IGNORECASE)
+        # Keywords found inside each keyword ("java" inside "javascript")
+        self.implied = {kw: {other for other in self.keywords if other != kw and other in kw}
+                        for kw in self.keywords}
+
+    @staticmethod
+    def trie_pattern(keywords: List[str]) -> str:
+        """
+        Alternation of `keywords` factored by common prefix, so the regex engine tries each
+        character once per position instead of once per keyword; greedy, so the longest wins
+        """
+        trie = {}
+        for keyword in keywords:
+            node = trie
+            for char in keyword:
+                node = node.setdefault(char, {})
+            node[""] = {}
+
+        def build(node: Dict) -> str:
+            branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+            if not branches:
+                return ""
+            body = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+            return f"(?:{body})?" if "" in node else body
+
+        return build(trie)
+
+    @classmethod
+    def from_query(cls, query: str) -> "KeywordMatcher":
+        return cls(re.findall(r'\b\w+\b', query.lower()))
+
+    def __len__(self) -> int:
+        return len(self.keywords)
+
+    def spans(self, text: str) -> List[Tuple[int, int, str]]:
+        """(start, end, keyword) of the longest keyword starting at each matching position"""
+        if self.pattern is None or not text:
+            return []
+        spans = []
+        for match in self.pattern.finditer(text):
+            keyword = match.group(1).lower()
+            spans.append((match.start(1), match.end(1), keyword))
+        return spans
+
+    def present(self, spans: List[Tuple[int, int, str]]) -> Set[str]:
+        """Keywords occurring in the text `spans` were found in"""
+        found = set()
+        for _, _, keyword in spans:
+            if keyword not in found:
+                found.add(keyword)
+                found.update(self.implied.get(keyword, ()))
+        return found & set(self.keywords)
+
+    def counts(self, spans: List[Tuple[int, int, str]]) -> Counter:
+        """Occurrences per keyword (the longest keyword at each position)"""
+        return Counter(keyword for _, _, keyword in spans)
+
+    @staticmethod
+    def sentences(text: str, spans: List[Tuple[int, int, str]]) -> List[str]:
+        """Each '.'-terminated sentence of `text` holding a match, once, in text order"""
+        sentences, seen = [], set()
+        for start, end, _ in spans:
+            sentence_start = text.rfind(".", 0, start) + 1
+            if sentence_start in seen:
+                continue
+            sentence_end = text.find(".", end)
+            if sentence_end == -1:
+                continue
+            seen.add(sentence_start)
+            sentences.append(text[sentence_start:sentence_end + 1])
+        return sentences
+
+
+@lru_cache(maxsize=256)
+def keyword_matcher(query: str) -> KeywordMatcher:
+    """Matcher for the keywords of `query`, compiled once and reused for every document"""
+    return KeywordMatcher.from_query(query)
+
+
 class EnhancedMilvusSearch:
-    def __init__(self, vector_store: Milvus, filter_fields: List[str]):
-        self.vector_store = vector_store
+    def __init__(self, filter_fields: List[str], search_service: VectorSearchService = vector_search):
+        self.search_service = search_service
         self.filter_fields = filter_fields
         logger.info(f"Initialized EnhancedMilvusSearch with filter_fields: {filter_fields}")
         
     def analyze_keyword_matches(
         self, 
         query: str, 
-        doc: Dict[str, Any]
+        doc: Dict[str, Any],
+        matcher: Optional[KeywordMatcher] = None
     ) -> Dict[str, Any]:
         """Analyze keyword matches in document fields"""
-        # Extract keywords from query
-        keywords = set(re.findall(r'\b\w+\b', query.lower()))
+        # Distinct query keywords present in each field, one scan per field
+        matcher = matcher or keyword_matcher(query)
         matches = {field: 0 for field in self.filter_fields}
         total_matches = 0
-        
-        # Count matches in each field
+
         for field in self.filter_fields:
             if field in doc:
-                field_text = str(doc[field]).lower()
-                field_matches = sum(1 for kw in keywords if kw in field_text)
+                field_matches = len(matcher.present(matcher.spans(str(doc[field]))))
                 matches[field] = field_matches
                 total_matches += field_matches
                 
         return {
             "field_matches": matches,
             "total_matches": total_matches,
-            "match_ratio": total_matches / len(keywords) if keywords else 0
+            "match_ratio": total_matches / len(matcher) if len(matcher) else 0
         }
 
-    def hybrid_search_with_analytics(
+    async def hybrid_search_with_analytics(
         self,
         query: str,
         k: int = 10,
-        filter_expr: str = None,
+        filter_expr: Union[str, FilterBuilder] = None,
         score_threshold: float = 0.25,
-        field_weights: Dict[str, float] = None
+        field_weights: Dict[str, float] = None,
+        search_mode: str = "hybrid",
+        keywords: List[str] = None
     ) -> List[Dict[str, Any]]:
         """Enhanced hybrid search with keyword matching analysis"""
+        # Filters should come from db.milvus.expr so values are escaped
+        if isinstance(filter_expr, FilterBuilder):
+            filter_expr = filter_expr.build()
+
         # Default field weights
         if field_weights is None:
             field_weights = {field: 1.0 for field in self.filter_fields}
 
-        logger.info(f"Performing hybrid search with query: {query[:100]}..., k={k}, filter_expr={filter_expr}, text_field='content'")
+        logger.info(f"Performing {search_mode} search with query: {query[:100]}..., k={k}, filter_expr={filter_expr}")
 
-        # Perform vector search
+        # Dense, BM25 or fused retrieval; `keywords` are matched by BM25 only
+        sparse_query = " ".join([query] + (keywords or [])).strip()
         try:
-            vector_results = self.vector_store.similarity_search_with_relevance_scores(
-                query,
+            vector_results = await self.search_service.search(
+                sparse_query if search_mode == "sparse" else query,
+                mode=search_mode,
                 k=k,
-                filter=filter_expr,
-                text_field="content"  # Explicitly specify the text field
+                expr=filter_expr,
+                sparse_query=sparse_query
             )
             logger.info(f"Hybrid search returned {len(vector_results)} results")
         except Exception as e:
@@ -70,9 +173,10 @@ class EnhancedMilvusSearch:
             raise
 
         enhanced_results = []
+        matcher = keyword_matcher(query)
         for doc, vector_score in vector_results:
             # Analyze keyword matches
-            keyword_analysis = self.analyze_keyword_matches(query, doc.metadata)
+            keyword_analysis = self.analyze_keyword_matches(query, doc.metadata, matcher)
             
             # Calculate weighted keyword score
             weighted_keyword_score = sum(
@@ -80,8 +184,11 @@ class EnhancedMilvusSearch:
                 for field, matches in keyword_analysis["field_matches"].items()
             ) / sum(field_weights.values())
 
-            # Normalize vector score (assuming cosine similarity)
-            norm_vector_score = 1 - (vector_score / 2)
+            # Dense and fused scores are already relevance in [0, 1]; squash raw BM25 scores
+            if search_mode == "sparse":
+                norm_vector_score = vector_score / (1 + vector_score)
+            else:
+                norm_vector_score = vector_score
 
             # Combined scoring
             combined_score = (norm_vector_score + weighted_keyword_score) / 2
@@ -102,22 +209,17 @@ class EnhancedMilvusSearch:
     def get_match_highlights(
         self, 
         query: str, 
-        doc: Dict[str, Any]
+        doc: Dict[str, Any],
+        matcher: Optional[KeywordMatcher] = None
     ) -> Dict[str, List[str]]:
-        """Extract matching context snippets"""
-        keywords = set(re.findall(r'\b\w+\b', query.lower()))
+        """Extract matching context snippets (each sentence holding a keyword, once)"""
+        matcher = matcher or keyword_matcher(query)
         highlights = {}
 
         for field in self.filter_fields:
             if field in doc:
                 text = str(doc[field])
-                matches = []
-                
-                # Extract context around matches
-                for keyword in keywords:
-                    pattern = re.compile(f'[^.]*{keyword}[^.]*\.', re.I)
-                    matches.extend(pattern.findall(text))
-                
+                matches = matcher.sentences(text, matcher.spans(text))
                 if matches:
                     highlights[field] = matches
 
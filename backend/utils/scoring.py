@@ -0,0 +1,365 @@
+import asyncio
+import heapq
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from process import AggregatedScore, GenericSkillMatcher, get_skill_match_details
+from utils.skill_embeddings import iter_record_skills
+from utils.skill_vocabulary import fingerprint_skills
+
+logger = logging.getLogger(__name__)
+
+# Campaigns smaller than this are scored in-process (on a worker thread);
+# larger ones are split into shards and scored in a process pool.
+SCORING_SHARD_THRESHOLD = int(os.getenv("SCORING_SHARD_THRESHOLD", 2000))
+SCORING_SHARD_SIZE = int(os.getenv("SCORING_SHARD_SIZE", 1000))
+SCORING_MAX_WORKERS = int(os.getenv("SCORING_MAX_WORKERS", os.cpu_count() or 4))
+
+MIN_AGGREGATED_SCORE = 0.2
+REQUIRED_RESUME_FIELDS = ['name', 'primary_skills', 'secondary_skills']
+
+# Only these profile fields are needed for scoring; keeping the projection small
+# keeps both the Mongo fetch and the pickling cost of each shard low.
+SCORING_PROJECTION = {"_id": 0, "name": 1, "profile_id": 1, "primary_skills": 1, "secondary_skills": 1,
+                      "skill_fingerprint": 1}
+
+
+# (resume field, JD field) for each component of the aggregated score
+SCORE_COMPONENTS = {
+    'primary_vs_primary': ('primary_skills', 'primary_skills'),
+    'primary_vs_secondary': ('primary_skills', 'secondary_skills'),
+    'secondary_vs_primary': ('secondary_skills', 'primary_skills'),
+    'secondary_vs_secondary': ('secondary_skills', 'secondary_skills'),
+}
+
+# Weights of the components in the skill part of the aggregated score
+SKILL_COMPONENT_WEIGHTS = {
+    'primary_vs_primary': 0.8,
+    'primary_vs_secondary': 0.15,
+    'secondary_vs_primary': 0.025,
+    'secondary_vs_secondary': 0.025,
+}
+
+
+def score_resume(resume: Dict, jd: Dict, matcher: GenericSkillMatcher,
+                 vector_scores: Dict[str, float], include_details: bool = False) -> Optional[AggregatedScore]:
+    """
+    Score a single resume against a parsed job description.
+
+    Formula: 0.7 * (0.8 * pp + 0.15 * ps + 0.025 * sp + 0.025 * ss) + 0.3 * vector_score
+
+    Matched/missing skill details are only computed with `include_details`; ranked lists
+    carry scores alone.
+    """
+    missing_resume_fields = [field for field in REQUIRED_RESUME_FIELDS if field not in resume]
+    if missing_resume_fields:
+        logger.warning(f"Resume {resume.get('profile_id', 'unknown')} missing fields: {missing_resume_fields}")
+        return None
+
+    # Skill IDs canonicalized at ingest, when the profile has a current fingerprint
+    resume_primary = fingerprint_skills(resume, 'primary_skills', matcher.vocabulary)
+    resume_secondary = fingerprint_skills(resume, 'secondary_skills', matcher.vocabulary)
+
+    score1 = matcher.calculate_skill_match_score(
+        resume_primary, jd['primary_skills']
+    )['overall_score']
+
+    score2 = matcher.calculate_skill_match_score(
+        resume_primary, jd['secondary_skills']
+    )['overall_score']
+
+    score3 = matcher.calculate_skill_match_score(
+        resume_secondary, jd['primary_skills']
+    )['overall_score']
+
+    score4 = matcher.calculate_skill_match_score(
+        resume_secondary, jd['secondary_skills']
+    )['overall_score']
+
+    # additional fields score
+    profile_id = resume.get("profile_id")
+    add_score = vector_scores.get(profile_id, 0)
+
+    aggregated_score = ((0.8 * score1) + (0.15 * score2) + (0.025 * score3) + (0.025 * score4))
+    aggregated_score = (0.7 * aggregated_score) + (0.3 * add_score)
+    aggregated_score = min(1, aggregated_score)
+
+    primary_vs_primary = secondary_vs_secondary = None
+    if include_details:
+        primary_vs_primary = get_skill_match_details(
+            resume_primary, jd['primary_skills'], matcher
+        )
+        secondary_vs_secondary = get_skill_match_details(
+            resume_secondary, jd['secondary_skills'], matcher
+        )
+
+    return AggregatedScore(
+        resume_name=resume['name'],
+        profile_id=str(resume.get('profile_id', '')),
+        aggregated_score=round(aggregated_score, 2),
+        score_breakdown={
+            'primary_vs_primary': min(1, round(score1, 2)),
+            'primary_vs_secondary': min(1, round(score2, 2)),
+            'secondary_vs_primary': min(1, round(score3, 2)),
+            'secondary_vs_secondary': min(1, round(score4, 2))
+        },
+        vector_score=round(add_score, 2),
+        primary_vs_primary=primary_vs_primary,
+        secondary_vs_secondary=secondary_vs_secondary
+    )
+
+
+def skill_scores(resume: Dict, jd: Dict, matcher: GenericSkillMatcher) -> Tuple[float, Dict[str, float]]:
+    """
+    Skill-only score of a resume against a JD (the weighted component sum of the aggregated
+    score, without the vector term) and its per-component breakdown. Both sides are read
+    from their stored fingerprints when current.
+    """
+    breakdown = {}
+    for component, (resume_field, jd_field) in SCORE_COMPONENTS.items():
+        breakdown[component] = matcher.calculate_skill_match_score(
+            fingerprint_skills(resume, resume_field, matcher.vocabulary),
+            fingerprint_skills(jd, jd_field, matcher.vocabulary)
+        )['overall_score']
+
+    score = sum(SKILL_COMPONENT_WEIGHTS[component] * value for component, value in breakdown.items())
+    return round(min(1, score), 4), {component: min(1, round(value, 2)) for component, value in breakdown.items()}
+
+
+def score_pairs(resumes: List[Dict], jds: List[Dict], matcher: GenericSkillMatcher) -> Tuple[List[List[Optional[float]]], List[List[Optional[Dict[str, float]]]]]:
+    """Resume x JD matrices of skill scores and breakdowns (None where a pair could not be scored)"""
+    scores, breakdowns = [], []
+    for resume in resumes:
+        score_row, breakdown_row = [], []
+        for jd in jds:
+            try:
+                score, breakdown = skill_scores(resume, jd, matcher)
+            except Exception as pair_error:
+                logger.error(f"Error scoring resume {resume.get('profile_id', 'unknown')}: {pair_error}")
+                score, breakdown = None, None
+            score_row.append(score)
+            breakdown_row.append(breakdown)
+        scores.append(score_row)
+        breakdowns.append(breakdown_row)
+    return scores, breakdowns
+
+
+def explain_resume(resume: Dict, jd: Dict, matcher: GenericSkillMatcher) -> Dict[str, Dict[str, Any]]:
+    """
+    Full breakdown of each score component for one resume: per-category metrics, domain
+    coverage and matched/missing skills. Uses the resume's stored skill fingerprint.
+    """
+    # Fingerprinted skills are IDs; label them with the resume's own wording where possible
+    labels = {
+        matcher.vocabulary.skill_id(skill): skill
+        for skill in iter_record_skills([resume]) if skill
+    }
+
+    def label(skill):
+        if isinstance(skill, int):
+            return labels.get(skill) or matcher.vocabulary.canonical_name(skill) or str(skill)
+        return skill
+
+    components = {}
+    for component, (resume_field, jd_field) in SCORE_COMPONENTS.items():
+        resume_skills = fingerprint_skills(resume, resume_field, matcher.vocabulary)
+        job_skills = jd.get(jd_field) or {}
+
+        category_metrics = matcher.calculate_category_breakdown(resume_skills, job_skills)
+        for metrics in category_metrics.values():
+            metrics['matches'] = [
+                {'resume_skill': label(resume_skill), 'job_skill': job_skill, 'priority': priority}
+                for resume_skill, job_skill, priority in metrics['matches']
+            ]
+            metrics['partial_matches'] = [
+                {'resume_skill': label(resume_skill), 'job_skill': job_skill, 'priority': priority,
+                 'credit': credit}
+                for resume_skill, job_skill, priority, credit in metrics['partial_matches']
+            ]
+
+        components[component] = {
+            'category_metrics': category_metrics,
+            'coverage': matcher.calculate_average_coverage_ratio(resume_skills, job_skills),
+            'skill_match_details': get_skill_match_details(resume_skills, job_skills, matcher).dict()
+        }
+    return components
+
+
+def score_shard(resumes: List[Dict], jd: Dict, matcher: GenericSkillMatcher,
+                vector_scores: Dict[str, float], top_k: Optional[int] = None,
+                min_score: float = MIN_AGGREGATED_SCORE) -> List[AggregatedScore]:
+    """Score one shard of resumes and return its matches sorted by score (top_k only, if given)"""
+    matches = []
+    for resume in resumes:
+        try:
+            result = score_resume(resume, jd, matcher, vector_scores)
+        except Exception as resume_error:
+            logger.error(f"Error processing resume {resume.get('profile_id', 'unknown')}: {resume_error}")
+            continue
+        if result is not None and result.aggregated_score > min_score:
+            matches.append(result)
+
+    if top_k:
+        return heapq.nlargest(top_k, matches, key=lambda x: x.aggregated_score)
+    matches.sort(key=lambda x: x.aggregated_score, reverse=True)
+    return matches
+
+
+def score_shard_matrix(resumes: List[Dict], jds: List[Dict], matcher: GenericSkillMatcher,
+                       vector_scores: List[Dict[str, float]], top_k: Optional[int] = None,
+                       min_score: float = MIN_AGGREGATED_SCORE) -> Tuple[List[List[AggregatedScore]], List[Dict]]:
+    """
+    Score one shard of resumes against several job descriptions in a single pass.
+
+    Returns the per-JD matches (sorted, top_k only if given) and one compact row per
+    resume holding its aggregated score for every JD (None where it could not be scored).
+    """
+    per_jd: List[List[AggregatedScore]] = [[] for _ in jds]
+    rows = []
+    for resume in resumes:
+        scores = []
+        for i, jd in enumerate(jds):
+            try:
+                result = score_resume(resume, jd, matcher, vector_scores[i])
+            except Exception as resume_error:
+                logger.error(f"Error processing resume {resume.get('profile_id', 'unknown')}: {resume_error}")
+                result = None
+            if result is None:
+                scores.append(None)
+                continue
+            scores.append(result.aggregated_score)
+            if result.aggregated_score > min_score:
+                per_jd[i].append(result)
+        if any(score is not None for score in scores):
+            rows.append({
+                "profile_id": str(resume.get("profile_id", "")),
+                "resume_name": resume.get("name", ""),
+                "scores": scores
+            })
+
+    for i, matches in enumerate(per_jd):
+        if top_k:
+            per_jd[i] = heapq.nlargest(top_k, matches, key=lambda x: x.aggregated_score)
+        else:
+            matches.sort(key=lambda x: x.aggregated_score, reverse=True)
+    return per_jd, rows
+
+
+class ScoringExecutor:
+    """
+    Scores a campaign's profiles against a job description without blocking the event loop.
+
+    Small campaigns are scored on a worker thread of the running process. Campaigns at or
+    above `shard_threshold` profiles are split into shards of `shard_size`, scored in a
+    process pool, and the per-shard top-K lists are merged.
+    """
+
+    def __init__(self, shard_threshold: int = SCORING_SHARD_THRESHOLD,
+                 shard_size: int = SCORING_SHARD_SIZE,
+                 max_workers: int = SCORING_MAX_WORKERS):
+        self.shard_threshold = shard_threshold
+        self.shard_size = max(1, shard_size)
+        self.max_workers = max(1, max_workers)
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+            logger.info(f"Started scoring process pool with {self.max_workers} workers")
+        return self._pool
+
+    def split_shards(self, resumes: List[Dict]) -> List[List[Dict]]:
+        return [resumes[i:i + self.shard_size] for i in range(0, len(resumes), self.shard_size)]
+
+    async def score(self, resumes: List[Dict], jd: Dict, vector_scores: Dict[str, float] = None,
+                    matcher: GenericSkillMatcher = None, top_k: Optional[int] = None,
+                    min_score: float = MIN_AGGREGATED_SCORE) -> List[AggregatedScore]:
+        """Score resumes and return matches sorted by aggregated score (descending)"""
+        matcher = matcher or GenericSkillMatcher()
+        vector_scores = vector_scores or {}
+
+        if len(resumes) < self.shard_threshold:
+            return await asyncio.to_thread(score_shard, resumes, jd, matcher, vector_scores, top_k, min_score)
+
+        loop = asyncio.get_running_loop()
+        tasks = []
+        for shard in self.split_shards(resumes):
+            shard_scores = {
+                rec.get("profile_id"): vector_scores[rec.get("profile_id")]
+                for rec in shard if rec.get("profile_id") in vector_scores
+            }
+            tasks.append(loop.run_in_executor(
+                self.pool, score_shard, shard, jd, matcher, shard_scores, top_k, min_score
+            ))
+        logger.info(f"Scoring {len(resumes)} resumes in {len(tasks)} shards")
+        shard_results = await asyncio.gather(*tasks)
+
+        merged = heapq.merge(*shard_results, key=lambda x: x.aggregated_score, reverse=True)
+        if top_k:
+            return [match for _, match in zip(range(top_k), merged)]
+        return list(merged)
+
+    async def score_matrix(self, resumes: List[Dict], jds: List[Dict],
+                           vector_scores: List[Dict[str, float]] = None,
+                           matcher: GenericSkillMatcher = None, top_k: Optional[int] = None,
+                           min_score: float = MIN_AGGREGATED_SCORE) -> Tuple[List[List[AggregatedScore]], List[Dict]]:
+        """Score resumes against every JD; returns per-JD sorted matches and per-resume score rows"""
+        matcher = matcher or GenericSkillMatcher()
+        vector_scores = vector_scores or [{} for _ in jds]
+
+        # Sharding is driven by the size of the JD x resume matrix, not the pool alone
+        if len(resumes) * len(jds) < self.shard_threshold:
+            return await asyncio.to_thread(
+                score_shard_matrix, resumes, jds, matcher, vector_scores, top_k, min_score
+            )
+
+        loop = asyncio.get_running_loop()
+        tasks = []
+        for shard in self.split_shards(resumes):
+            shard_ids = {rec.get("profile_id") for rec in shard}
+            shard_scores = [
+                {profile_id: score for profile_id, score in jd_scores.items() if profile_id in shard_ids}
+                for jd_scores in vector_scores
+            ]
+            tasks.append(loop.run_in_executor(
+                self.pool, score_shard_matrix, shard, jds, matcher, shard_scores, top_k, min_score
+            ))
+        logger.info(f"Scoring {len(resumes)} resumes x {len(jds)} JDs in {len(tasks)} shards")
+        shard_results = await asyncio.gather(*tasks)
+
+        per_jd = []
+        for i in range(len(jds)):
+            merged = heapq.merge(*(result[0][i] for result in shard_results),
+                                 key=lambda x: x.aggregated_score, reverse=True)
+            per_jd.append([match for _, match in zip(range(top_k), merged)] if top_k else list(merged))
+        rows = [row for result in shard_results for row in result[1]]
+        return per_jd, rows
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+scoring_executor = ScoringExecutor()
+
+
+def rank_matches(matches: List[Any]) -> List[Any]:
+    """Assign 1-based ranks to matches already sorted by score"""
+    for i, match in enumerate(matches, 1):
+        match.rank = i
+    return matches
+
+
+def best_fit_rows(rows: List[Dict]) -> List[Dict]:
+    """Annotate each per-resume score row with its best-scoring JD, best candidates first"""
+    best = []
+    for row in rows:
+        scored = [(score, i) for i, score in enumerate(row["scores"]) if score is not None]
+        score, index = max(scored, key=lambda x: (x[0], -x[1]))
+        best.append({**row, "best_jd_index": index, "best_score": score})
+    best.sort(key=lambda x: x["best_score"], reverse=True)
+    return best
@@ -0,0 +1,127 @@
+import base64
+import binascii
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+SEARCH_CACHE_TTL_SECONDS = int(os.getenv("SEARCH_CACHE_TTL_SECONDS", 600))
+# Entries hold up to k=100 ranked hits with their chunk text, so keep the cache small
+SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", 128))
+
+
+def normalize_query(query: Optional[str]) -> str:
+    """The query as the search sees it (punctuation dropped, lowercased, single spaces)"""
+    return " ".join(re.sub(r"[^A-Za-z0-9]+", " ", query or "").lower().split())
+
+
+def search_cache_key(client_id: Optional[str], query: Optional[str], filters: Optional[Dict],
+                     search_mode: str) -> str:
+    payload = {
+        "client_id": client_id or "",
+        "query": normalize_query(query),
+        "filters": filters or {},
+        "search_mode": search_mode,
+    }
+    return hashlib.sha1(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def encode_cursor(payload: Dict) -> str:
+    """Opaque page cursor carrying everything needed to serve (or recompute) the page"""
+    raw = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Dict:
+    """Payload of a cursor from encode_cursor; raises ValueError when it is malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+    except (binascii.Error, UnicodeDecodeError, json.JSONDecodeError) as err:
+        raise ValueError("Invalid cursor") from err
+    if not isinstance(payload, dict) or not isinstance(payload.get("offset"), int) or payload["offset"] < 0:
+        raise ValueError("Invalid cursor")
+    return payload
+
+
+class SearchResultCache:
+    """
+    In-process TTL cache of ranked /ai/query-match results, keyed by search_cache_key.
+
+    Entries are dropped when profiles are ingested for their client (searches without a client
+    are dropped on every ingest, and everything is dropped when the ingested profiles' client
+    is unknown). Profile changes made by other processes (the Milvus sync worker)
+    are only picked up when the entry expires.
+    """
+
+    def __init__(self, ttl_seconds: int = SEARCH_CACHE_TTL_SECONDS, max_entries: int = SEARCH_CACHE_MAX_ENTRIES):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        # Ingest endpoints may run in the threadpool
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[List[Dict]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, _, results = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return results
+
+    def put(self, key: str, client_id: Optional[str], results: List[Dict]):
+        if self.ttl_seconds <= 0 or self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, client_id or "", results)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, client_ids: Iterable[Optional[str]]) -> int:
+        """Drop entries of `client_ids` and all unscoped entries, returning how many were dropped"""
+        clients = {client_id or "" for client_id in client_ids}
+        with self._lock:
+            stale = [key for key, (_, client_id, _) in self._entries.items() if not client_id or client_id in clients]
+            for key in stale:
+                del self._entries[key]
+        if stale:
+            logger.info(f"Dropped {len(stale)} cached searches after ingest")
+        return len(stale)
+
+    def invalidate_documents(self, documents: Iterable, client_id: Optional[str] = None) -> int:
+        """
+        invalidate() for the clients of freshly ingested chunk documents. `client_id` stands in for
+        chunks without a client_id in their metadata; if any chunk still has no client, the
+        whole cache is dropped since its client's searches can't be told apart.
+        """
+        documents = list(documents or [])
+        if not documents:
+            return 0
+        clients = {(doc.metadata or {}).get("client_id") or client_id or "" for doc in documents}
+        if "" in clients:
+            with self._lock:
+                dropped = len(self._entries)
+                self._entries.clear()
+            if dropped:
+                logger.info(f"Dropped all {dropped} cached searches after ingest of profiles without a client")
+            return dropped
+        return self.invalidate(clients)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+search_cache = SearchResultCache()
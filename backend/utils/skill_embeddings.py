@@ -0,0 +1,231 @@
+import argparse
+import asyncio
+import logging
+import os
+import sys
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Sequence, Union
+
+import numpy as np
+
+from utils.skill_vocabulary import SKILL_FIELDS, SkillVocabulary, get_skill_vocabulary
+
+logger = logging.getLogger(__name__)
+
+SKILL_SOFT_MATCH = os.getenv("SKILL_SOFT_MATCH", "false").lower() in ("1", "true", "yes")
+SKILL_SOFT_MATCH_THRESHOLD = float(os.getenv("SKILL_SOFT_MATCH_THRESHOLD", 0.75))
+SKILL_SOFT_MATCH_WEIGHT = float(os.getenv("SKILL_SOFT_MATCH_WEIGHT", 0.5))
+SKILL_EMBEDDING_COLLECTION = os.getenv("SKILL_EMBEDDING_COLLECTION", "skill_embeddings")
+# Longest a scoring request waits for unseen JD skills to be embedded; the embedding finishes
+# in the background and the request scores with the rows already in the table
+SKILL_EMBEDDING_TIMEOUT = float(os.getenv("SKILL_EMBEDDING_TIMEOUT", 3))
+# Embed the skills of stored profiles and JDs at startup (skills ingested before soft matching was on)
+SKILL_EMBEDDING_BACKFILL = os.getenv("SKILL_EMBEDDING_BACKFILL", "true").lower() in ("1", "true", "yes")
+EMBED_BATCH_SIZE = 256
+BACKFILL_BATCH_SIZE = 500
+BACKFILL_COLLECTIONS = ("profiles", "job")
+
+
+class SkillEmbeddingSnapshot:
+    """
+    Read-only slice of the skill-embedding table (unit-normalized rows keyed by skill ID).
+
+    Small enough to pickle into scoring worker processes; never calls the embedding API.
+    `complete` is False when some requested skill had no row yet (still being embedded), so
+    scores computed from it lack soft-match credit and must not be treated as final.
+    """
+
+    def __init__(self, index: Dict[int, int], vectors: np.ndarray, vocabulary: SkillVocabulary = None,
+                 complete: bool = True):
+        self.index = index
+        self.vectors = vectors
+        self.vocabulary = vocabulary or get_skill_vocabulary()
+        self.complete = complete
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def _rows(self, skills: Sequence[Union[str, int]]) -> np.ndarray:
+        dim = self.vectors.shape[1] if self.vectors.ndim == 2 else 0
+        rows = np.zeros((len(skills), dim), dtype=np.float32)
+        for i, skill in enumerate(skills):
+            row = self.index.get(self.vocabulary.skill_id(skill))
+            if row is not None:
+                rows[i] = self.vectors[row]
+        return rows
+
+    def similarity(self, job_skills: Sequence[Union[str, int]],
+                   resume_skills: Sequence[Union[str, int]]) -> np.ndarray:
+        """Cosine similarity matrix of shape (len(job_skills), len(resume_skills)); unknown skills score 0"""
+        if not len(self.index) or not job_skills or not resume_skills:
+            return np.zeros((len(job_skills), len(resume_skills)), dtype=np.float32)
+        return self._rows(job_skills) @ self._rows(resume_skills).T
+
+
+class SkillEmbeddingTable:
+    """
+    Incrementally grown table of skill embeddings, persisted in Mongo.
+
+    Each canonical skill is embedded once (aliases share their canonical skill's row). New
+    skills are embedded at ingest time through `ensure`; scoring only reads snapshots.
+    """
+
+    def __init__(self, collection_name: str = SKILL_EMBEDDING_COLLECTION, vocabulary: SkillVocabulary = None):
+        self.collection_name = collection_name
+        self.vocabulary = vocabulary or get_skill_vocabulary()
+        self.index: Dict[int, int] = {}
+        self.vectors = np.zeros((0, 0), dtype=np.float32)
+        self._loaded = False
+        self._lock = asyncio.Lock()
+
+    @property
+    def collection(self):
+        from db.mongo.config import db as mongo_db
+        return mongo_db[self.collection_name]
+
+    @property
+    def embedding_model(self):
+        from utils.chatgpt import skill_embedding
+        return skill_embedding
+
+    def _append(self, skill_ids: List[int], vectors: List[List[float]]):
+        if not skill_ids:
+            return
+        block = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(block, axis=1, keepdims=True)
+        block = block / np.where(norms == 0, 1, norms)
+        start = len(self.index)
+        self.vectors = block if not start else np.vstack([self.vectors, block])
+        for offset, skill_id in enumerate(skill_ids):
+            self.index[skill_id] = start + offset
+
+    async def load(self):
+        """Load every stored skill vector into memory (once per process)"""
+        async with self._lock:
+            if self._loaded:
+                return
+            skill_ids, vectors = [], []
+            async for rec in self.collection.find({}, {"_id": 0, "skill_id": 1, "vector": 1}):
+                if rec["skill_id"] not in self.index:
+                    skill_ids.append(rec["skill_id"])
+                    vectors.append(rec["vector"])
+            self._append(skill_ids, vectors)
+            self._loaded = True
+            logger.info(f"Loaded {len(self.index)} skill embeddings")
+
+    async def ensure(self, skills: Iterable[Union[str, int]]) -> int:
+        """Embed and persist any skills not yet in the table; returns the number of new rows"""
+        await self.load()
+        pending = {}
+        for skill in skills:
+            if not skill or isinstance(skill, int):
+                continue
+            skill_id = self.vocabulary.skill_id(skill)
+            if skill_id not in self.index and skill_id not in pending:
+                pending[skill_id] = self.vocabulary.canonical_name(skill_id) or str(skill)
+        if not pending:
+            return 0
+
+        async with self._lock:
+            pending = {k: v for k, v in pending.items() if k not in self.index}
+            skill_ids, names = list(pending.keys()), list(pending.values())
+            vectors = []
+            for i in range(0, len(names), EMBED_BATCH_SIZE):
+                vectors.extend(await self.embedding_model.aembed_documents(names[i:i + EMBED_BATCH_SIZE]))
+
+            now = datetime.now(timezone.utc)
+            await self.collection.insert_many([
+                {"skill_id": skill_id, "skill": name, "vector": vector, "created_at": now}
+                for skill_id, name, vector in zip(skill_ids, names, vectors)
+            ])
+            self._append(skill_ids, vectors)
+        logger.info(f"Embedded {len(skill_ids)} new skills")
+        return len(skill_ids)
+
+    def snapshot(self, skills: Optional[Iterable[Union[str, int]]] = None) -> SkillEmbeddingSnapshot:
+        """Snapshot of the rows for `skills` (or the whole table) for use by a matcher"""
+        if skills is None:
+            return SkillEmbeddingSnapshot(dict(self.index), self.vectors, self.vocabulary)
+        skill_ids = {self.vocabulary.skill_id(skill) for skill in skills if skill}
+        rows = sorted({self.index[skill_id] for skill_id in skill_ids if skill_id in self.index})
+        position = {row: i for i, row in enumerate(rows)}
+        index = {skill_id: position[row] for skill_id, row in self.index.items() if row in position}
+        vectors = self.vectors[rows] if rows else np.zeros((0, 0), dtype=np.float32)
+        return SkillEmbeddingSnapshot(index, vectors, self.vocabulary, complete=len(rows) == len(skill_ids))
+
+
+skill_embedding_table = SkillEmbeddingTable()
+
+
+def iter_record_skills(records: Iterable[Dict]) -> Iterable[str]:
+    """All skill names in the primary/secondary skill trees of resumes or JDs"""
+    for record in records:
+        for field in SKILL_FIELDS:
+            for categories in (record.get(field) or {}).values():
+                if isinstance(categories, dict):
+                    for skill_list in categories.values():
+                        if isinstance(skill_list, list):
+                            yield from skill_list
+
+
+async def index_skill_embeddings(records: Iterable[Dict], timeout: Optional[float] = None) -> int:
+    """
+    Ingest hook: embed unseen skills of new resumes/JDs when soft matching is enabled.
+
+    With `timeout`, waits at most that long; the embedding keeps running in the background and
+    its rows serve later requests.
+    """
+    if not SKILL_SOFT_MATCH:
+        return 0
+    task = asyncio.ensure_future(skill_embedding_table.ensure(list(iter_record_skills(records))))
+    try:
+        return await asyncio.wait_for(asyncio.shield(task), timeout=timeout)
+    except asyncio.TimeoutError:
+        logger.warning(f"Skill embedding still running after {timeout}s; scoring with the current table")
+        task.add_done_callback(_log_background_failure)
+        return 0
+    except Exception as err:
+        logger.error(f"Failed to index skill embeddings: {err}")
+        return 0
+
+
+def _log_background_failure(task: asyncio.Future):
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(f"Failed to index skill embeddings: {task.exception()}")
+
+
+async def backfill_skill_embeddings(mongo_db=None, collections: Sequence[str] = BACKFILL_COLLECTIONS,
+                                    batch_size: int = BACKFILL_BATCH_SIZE) -> int:
+    """
+    Embed the skills of every stored profile and JD that are missing from the table, e.g. records
+    ingested before SKILL_SOFT_MATCH was turned on. Returns the number of new rows.
+    """
+    if mongo_db is None:
+        from db.mongo.config import db as mongo_db
+    projection = {"_id": 0, **{field: 1 for field in SKILL_FIELDS}}
+    added = 0
+    for collection_name in collections:
+        batch = []
+        async for record in mongo_db[collection_name].find({}, projection):
+            batch.append(record)
+            if len(batch) >= batch_size:
+                added += await skill_embedding_table.ensure(list(iter_record_skills(batch)))
+                batch = []
+        if batch:
+            added += await skill_embedding_table.ensure(list(iter_record_skills(batch)))
+    logger.info(f"Skill embedding backfill added {added} skills ({len(skill_embedding_table.index)} total)")
+    return added
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Embed the skills of stored profiles and JDs for soft matching")
+    parser.add_argument("--collections", default=",".join(BACKFILL_COLLECTIONS),
+                        type=lambda v: [c.strip() for c in v.split(",") if c.strip()])
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+    print(asyncio.run(backfill_skill_embeddings(collections=args.collections)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,174 @@
+import hashlib
+import json
+import logging
+import os
+import re
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Set, Union
+
+logger = logging.getLogger(__name__)
+
+CORE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "core")
+SKILL_MATRIX_PATH = os.getenv("SKILL_MATRIX_PATH", os.path.join(CORE_DIR, "skill_matrix.json"))
+SKILL_ALIASES_PATH = os.getenv("SKILL_ALIASES_PATH", os.path.join(CORE_DIR, "skill_aliases.json"))
+
+SKILL_FIELDS = ("primary_skills", "secondary_skills")
+
+_PARENTHETICAL = re.compile(r"\(([^)]*)\)")
+# Shorter parenthetical acronyms ("CD", "CI") are too ambiguous to derive; list them as aliases instead
+_MIN_DERIVED_ACRONYM = 3
+_MAX_LOOKUP_CACHE = 200_000
+
+
+def normalize_skill(text: str) -> str:
+    """Surface-form key: lowercase, '&' spelled out, everything except word chars, '+' and '#' dropped"""
+    text = str(text).lower().replace("&", "and")
+    return re.sub(r"[^\w+#]", "", text)
+
+
+def unknown_skill_id(key: str) -> int:
+    """Stable negative ID for skills outside the vocabulary (identical across processes and restarts)"""
+    digest = hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest()
+    return -(int.from_bytes(digest, "big") >> 1) - 1
+
+
+class SkillVocabulary:
+    """
+    Canonical skill vocabulary compiled from the skill matrix and an alias file.
+
+    Every known surface form (the matrix entry, the entry without its parenthetical,
+    the parenthetical acronym, and any configured alias) maps to one positive integer
+    skill ID. Skills outside the vocabulary get a stable hashed negative ID, so matching
+    is always a comparison of integers.
+    """
+
+    def __init__(self, matrix_path: str = SKILL_MATRIX_PATH, aliases_path: Optional[str] = SKILL_ALIASES_PATH):
+        self.surface_to_id: Dict[str, int] = {}
+        self.canonical_names: Dict[int, str] = {}
+        self._lookup_cache: Dict[str, int] = {}
+
+        matrix = self._load_json(matrix_path) or {}
+        aliases = self._load_json(aliases_path) or {}
+        self.version = hashlib.sha1(
+            json.dumps([matrix, aliases], sort_keys=True).encode("utf-8")
+        ).hexdigest()[:12]
+
+        derived_forms = []
+        for categories in matrix.values():
+            for skills in categories.values():
+                for skill in skills:
+                    skill_id = self._register(skill)
+                    without_parenthetical = _PARENTHETICAL.sub("", skill).strip()
+                    self._register(without_parenthetical, skill_id)
+                    derived_forms.extend((inner, skill_id) for inner in _PARENTHETICAL.findall(skill))
+
+        # Parenthetical acronyms never shadow a skill that is listed on its own
+        for form, skill_id in derived_forms:
+            if len(normalize_skill(form)) >= _MIN_DERIVED_ACRONYM:
+                self._register(form, skill_id)
+
+        # Explicit aliases always win
+        for canonical, alias_list in aliases.items():
+            skill_id = self._register(canonical)
+            for alias in alias_list:
+                key = normalize_skill(alias)
+                if key:
+                    self.surface_to_id[key] = skill_id
+
+        logger.info(f"Compiled skill vocabulary {self.version}: {len(self.canonical_names)} skills, "
+                    f"{len(self.surface_to_id)} surface forms")
+
+    @staticmethod
+    def _load_json(path: Optional[str]) -> Any:
+        if not path or not os.path.exists(path):
+            if path:
+                logger.warning(f"Skill vocabulary source not found: {path}")
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _register(self, surface: str, skill_id: Optional[int] = None) -> int:
+        key = normalize_skill(surface)
+        if not key:
+            return skill_id
+        if key in self.surface_to_id:
+            return self.surface_to_id[key]
+        if skill_id is None:
+            skill_id = len(self.canonical_names) + 1
+            self.canonical_names[skill_id] = surface
+        self.surface_to_id[key] = skill_id
+        return skill_id
+
+    def __len__(self) -> int:
+        return len(self.canonical_names)
+
+    def skill_id(self, skill: Union[str, int]) -> int:
+        """Integer ID for a skill surface form (IDs are passed through unchanged)"""
+        if isinstance(skill, int):
+            return skill
+        cached = self._lookup_cache.get(skill)
+        if cached is not None:
+            return cached
+        key = normalize_skill(skill)
+        skill_id = self.surface_to_id.get(key)
+        if skill_id is None:
+            skill_id = unknown_skill_id(key)
+        if len(self._lookup_cache) >= _MAX_LOOKUP_CACHE:
+            self._lookup_cache.clear()
+        self._lookup_cache[skill] = skill_id
+        return skill_id
+
+    def canonical_name(self, skill: Union[str, int]) -> Optional[str]:
+        return self.canonical_names.get(self.skill_id(skill))
+
+    def canonicalize(self, skills: Dict) -> Dict[str, Dict[str, List[int]]]:
+        """Convert a nested domain -> category -> [skill] dict into sorted, de-duplicated skill IDs"""
+        canonical = {}
+        for domain, categories in (skills or {}).items():
+            if not isinstance(categories, dict):
+                continue
+            canonical[domain] = {
+                category: sorted({self.skill_id(skill) for skill in skill_list if skill})
+                for category, skill_list in categories.items()
+                if isinstance(skill_list, list)
+            }
+        return canonical
+
+    def skill_ids(self, skills: Dict) -> Set[int]:
+        """Flat set of skill IDs in a nested skills dict"""
+        return {
+            self.skill_id(skill)
+            for categories in (skills or {}).values() if isinstance(categories, dict)
+            for skill_list in categories.values() if isinstance(skill_list, list)
+            for skill in skill_list if skill
+        }
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_lookup_cache"] = {}
+        return state
+
+
+@lru_cache(maxsize=1)
+def get_skill_vocabulary() -> SkillVocabulary:
+    return SkillVocabulary()
+
+
+def build_skill_fingerprint(record: Dict, vocabulary: SkillVocabulary = None) -> Dict[str, Any]:
+    """Canonical skill IDs for a resume or job description, computed once at ingest"""
+    vocabulary = vocabulary or get_skill_vocabulary()
+    fingerprint = {field: vocabulary.canonicalize(record.get(field) or {}) for field in SKILL_FIELDS}
+    fingerprint["vocabulary_version"] = vocabulary.version
+    return fingerprint
+
+
+def fingerprint_skills(record: Dict, field: str, vocabulary: SkillVocabulary = None) -> Dict:
+    """
+    Skills for `field` as stored skill IDs when the record carries a fingerprint from the
+    current vocabulary, otherwise the raw skill names (which the matcher canonicalizes itself).
+    """
+    vocabulary = vocabulary or get_skill_vocabulary()
+    fingerprint = record.get("skill_fingerprint") or {}
+    if fingerprint.get("vocabulary_version") == vocabulary.version and field in fingerprint:
+        return fingerprint[field]
+    return record.get(field) or {}